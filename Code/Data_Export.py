@@ -0,0 +1,313 @@
+"""
+SciTech Ambulance Routing - Data Export Module
+==============================================
+
+Streaming, machine-readable exports of route logs for dispatch systems:
+JSON Lines, CSV or Parquet (with pyarrow). Steps are appended one at a time as
+the solver produces them, so batch runs can write any number of steps with
+constant memory. The PDF report can be rendered from an export file.
+"""
+
+import csv
+import json
+import os
+import sys
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa  # type: ignore
+    import pyarrow.parquet as pq  # type: ignore
+
+    HAS_PYARROW = True
+except ImportError:  # pragma: no cover - pyarrow is optional
+    HAS_PYARROW = False
+
+FORMATS = {".jsonl": "jsonl", ".json": "jsonl", ".csv": "csv", ".parquet": "parquet"}
+
+# Run metadata repeated on every row, so each row can be ingested on its own
+RUN_FIELDS = ["run", "scenario", "initial_point", "total_time", "exported_at"]
+STEP_FIELDS = [
+    "step",
+    "from",
+    "to_patient",
+    "priority",
+    "time_needed",
+    "cumulative_time",
+    "path_to_patient",
+    "path_to_hospital",
+]
+FIELDS = RUN_FIELDS + STEP_FIELDS
+
+PARQUET_ROW_GROUP = 65536  # Rows buffered before a Parquet row group is written
+
+
+def _plain(value: Any) -> Any:
+    """NumPy scalars and arrays to plain Python values"""
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (list, tuple, np.ndarray)):
+        return [_plain(v) for v in value]
+    return value
+
+
+def _format_path(path: List[int]) -> str:
+    return "-".join(str(int(v)) for v in path)
+
+
+def _parse_path(text: Any) -> List[int]:
+    if isinstance(text, (list, np.ndarray)):
+        return [int(v) for v in text]
+    if isinstance(text, (int, np.integer)):
+        # A one-vertex path is read back from CSV as a number
+        return [int(text)]
+    if isinstance(text, (float, np.floating)):
+        # ... or as a float (NaN for an empty path) when the column has gaps
+        return [] if np.isnan(text) else [int(text)]
+    if not isinstance(text, str) or not text:
+        return []
+    return [int(v) for v in text.split("-")]
+
+
+class RouteExportWriter:
+    """
+    Streaming writer of route steps. Use as a context manager:
+
+        with RouteExportWriter("runs.jsonl") as writer:
+            writer.begin_run(scenario="hard/8", initial_point=0, total_time=120)
+            ambulance_routing_optimized(..., on_step=writer.write_step)
+
+    The format comes from the file extension unless given explicitly.
+    """
+
+    def __init__(self, path: str, file_format: Optional[str] = None):
+        self.path = path
+        self.format = file_format or FORMATS.get(os.path.splitext(path)[1].lower())
+        if self.format not in FORMATS.values():
+            raise ValueError(f"Unknown export format for {path}")
+        if self.format == "parquet" and not HAS_PYARROW:
+            raise ImportError("Parquet export needs pyarrow (pip install pyarrow)")
+
+        self.run: Dict[str, Any] = {}
+        self.run_count = 0
+        self.step_count = 0
+        self._step = 0
+        self._cumulative_time = 0.0
+        self._rows: List[Dict[str, Any]] = []
+        self._parquet_writer = None
+        self._csv_writer = None
+        self._file = None
+        if self.format != "parquet":
+            self._file = open(path, "w", newline="" if self.format == "csv" else None)
+        if self.format == "csv":
+            self._csv_writer = csv.DictWriter(self._file, fieldnames=FIELDS)
+            self._csv_writer.writeheader()
+
+    def __enter__(self) -> "RouteExportWriter":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def begin_run(
+        self,
+        scenario: str = "",
+        initial_point: Optional[int] = None,
+        total_time: Optional[float] = None,
+    ) -> None:
+        """Start a new run; following steps are numbered from 1 again"""
+        self.run_count += 1
+        self.run = {
+            "run": self.run_count,
+            "scenario": scenario,
+            "initial_point": _plain(initial_point),
+            "total_time": _plain(total_time),
+            "exported_at": datetime.now().isoformat(timespec="seconds"),
+        }
+        self._step = 0
+        self._cumulative_time = 0.0
+
+    def write_step(self, step: Dict[str, Any]) -> None:
+        """Append one route_log step to the current run"""
+        if not self.run:
+            self.begin_run()
+        self._step += 1
+        self.step_count += 1
+        self._cumulative_time += float(step["time_needed"])
+        row = dict(
+            self.run,
+            step=self._step,
+            cumulative_time=self._cumulative_time,
+            **{
+                key: _plain(step[key])
+                for key in ("from", "to_patient", "priority", "time_needed")
+            },
+        )
+
+        for key in ("path_to_patient", "path_to_hospital"):
+            # CSV has no list type: paths are written as "1-4-7"
+            row[key] = _format_path(step[key]) if self.format == "csv" else _plain(step[key])
+
+        if self.format == "jsonl":
+            self._file.write(json.dumps(row) + "\n")
+        elif self.format == "csv":
+            self._csv_writer.writerow(row)
+        else:
+            self._rows.append(row)
+            if len(self._rows) >= PARQUET_ROW_GROUP:
+                self._flush_parquet()
+
+    def write_run(self, route_log: List[Dict[str, Any]], **run: Any) -> None:
+        """Write a whole route_log as one run"""
+        self.begin_run(**run)
+        for step in route_log:
+            self.write_step(step)
+
+    def _flush_parquet(self) -> None:
+        if not self._rows:
+            return
+        table = pa.Table.from_pylist(self._rows, schema=_parquet_schema())
+        if self._parquet_writer is None:
+            self._parquet_writer = pq.ParquetWriter(self.path, table.schema)
+        self._parquet_writer.write_table(table)
+        self._rows = []
+
+    def close(self) -> None:
+        if self.format == "parquet":
+            if self._parquet_writer is None and not self._rows:
+                # Still write a valid, empty file
+                self._parquet_writer = pq.ParquetWriter(self.path, _parquet_schema())
+            self._flush_parquet()
+            self._parquet_writer.close()
+        elif self._file is not None:
+            self._file.close()
+
+
+def _parquet_schema() -> "pa.Schema":
+    return pa.schema(
+        [
+            ("run", pa.int64()),
+            ("scenario", pa.string()),
+            ("initial_point", pa.int64()),
+            ("total_time", pa.float64()),
+            ("exported_at", pa.string()),
+            ("step", pa.int64()),
+            ("from", pa.int64()),
+            ("to_patient", pa.int64()),
+            ("priority", pa.int64()),
+            ("time_needed", pa.float64()),
+            ("cumulative_time", pa.float64()),
+            ("path_to_patient", pa.list_(pa.int64())),
+            ("path_to_hospital", pa.list_(pa.int64())),
+        ]
+    )
+
+
+def export_route_log(
+    route_log: List[Dict[str, Any]],
+    output_path: str,
+    data: Optional[Dict[str, Any]] = None,
+    scenario: str = "",
+) -> bool:
+    """Export a single route_log (with the instance metadata of data) to a file"""
+    try:
+        run: Dict[str, Any] = {"scenario": scenario}
+        if data is not None and "initial_data" in data:
+            run["initial_point"] = data["initial_data"].iloc[0]["ponto_inicial"]
+            run["total_time"] = data["initial_data"].iloc[0]["tempo_total"]
+        with RouteExportWriter(output_path) as writer:
+            writer.write_run(route_log, **run)
+        return True
+    except Exception as e:
+        print(f"Data export failed: {str(e)}")
+        return False
+
+
+def iter_runs(path: str) -> Iterator[Tuple[Dict[str, Any], List[Dict[str, Any]]]]:
+    """
+    Read an export file back as (run metadata, route_log) pairs. JSON Lines
+    and CSV are read in chunks, so only one run is held in memory at a time.
+    """
+    file_format = FORMATS.get(os.path.splitext(path)[1].lower())
+    if file_format == "jsonl":
+        chunks: Iterator[pd.DataFrame] = pd.read_json(
+            path, lines=True, chunksize=10000, convert_dates=False, keep_default_dates=False
+        )
+    elif file_format == "csv":
+        # Paths stay text: a column of one-vertex paths would read as numbers
+        chunks = pd.read_csv(
+            path,
+            chunksize=10000,
+            dtype={"path_to_patient": str, "path_to_hospital": str},
+        )
+    elif file_format == "parquet" and HAS_PYARROW:
+        batches = pq.ParquetFile(path).iter_batches(batch_size=10000)
+        chunks = (batch.to_pandas() for batch in batches)
+    else:
+        raise ValueError(f"Unknown export format for {path}")
+
+    run: Optional[Dict[str, Any]] = None
+    route_log: List[Dict[str, Any]] = []
+    for chunk in chunks:
+        for row in chunk.to_dict("records"):
+            if run is None or row["run"] != run["run"]:
+                if run is not None:
+                    yield run, route_log
+                run = {key: row[key] for key in RUN_FIELDS}
+                route_log = []
+            route_log.append(
+                {
+                    "from": int(row["from"]),
+                    "to_patient": int(row["to_patient"]),
+                    "path_to_patient": _parse_path(row["path_to_patient"]),
+                    "path_to_hospital": _parse_path(row["path_to_hospital"]),
+                    "time_needed": float(row["time_needed"]),
+                    "priority": int(row["priority"]),
+                }
+            )
+    if run is not None:
+        yield run, route_log
+
+
+def render_pdf_reports(export_path: str, output_folder: str) -> List[bool]:
+    """Render one PDF report per run of an export file (PDF as an optional view)"""
+    from .PDF_Export import export_batch  # type: ignore
+
+    os.makedirs(output_folder, exist_ok=True)
+    reports = [
+        (route_log, os.path.join(output_folder, f"run_{run['run']:05d}.pdf"))
+        for run, route_log in iter_runs(export_path)
+    ]
+    return export_batch(reports)
+
+
+if __name__ == "__main__":
+    # Usage: python -m Code.Data_Export <scenarios root|store> <output.jsonl|.csv|.parquet> [pdf folder]
+    from .Data_Store import find_scenarios, load_scenario  # type: ignore
+    from .alg import ambulance_routing_optimized  # type: ignore
+
+    scenarios_root, export_file = sys.argv[1], sys.argv[2]
+    with RouteExportWriter(export_file) as route_writer:
+        for scenario_name, scenario_source in find_scenarios(scenarios_root):
+            scenario_data = load_scenario(scenario_source)
+            initial = scenario_data["initial_data"].iloc[0]
+            route_writer.begin_run(
+                scenario=scenario_name,
+                initial_point=initial["ponto_inicial"],
+                total_time=initial["tempo_total"],
+            )
+            ambulance_routing_optimized(
+                scenario_data["graph"],
+                scenario_data["points_data"],
+                initial["ponto_inicial"],
+                initial["tempo_total"],
+                on_step=route_writer.write_step,
+            )
+    print(
+        f"Exported {route_writer.step_count} steps of {route_writer.run_count} runs to {export_file}"
+    )
+    if len(sys.argv) > 3:
+        render_pdf_reports(export_file, sys.argv[3])
@@ -0,0 +1,454 @@
+"""
+SciTech Ambulance Routing - SQLite Data Store
+=============================================
+
+Optional storage backend beside Data_Import: scenarios (points, streets and
+initial data) and routing results are kept in a local SQLite database so that
+loaders and batch runners can query them without scanning the filesystem.
+"""
+
+import json
+import os
+import sqlite3
+import sys
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+import pandas as pd
+
+from .Data_Import import (  # type: ignore
+    add_points_data_to_graph,
+    pd_to_igraph,
+    problem_data_dict_by_folder,
+)
+
+DEFAULT_DB_PATH = str(Path(__file__).parent.parent / "scitech.sqlite3")
+
+SCENARIO_FILES = ("dados_iniciais.csv", "pontos.csv", "ruas.csv")
+
+# A scenario source is a scenario folder or "<database path>::<scenario name>"
+STORE_SEPARATOR = "::"
+SQLITE_HEADER = b"SQLite format 3\x00"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS scenarios (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    source_path TEXT,
+    imported_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS points (
+    scenario_id INTEGER NOT NULL REFERENCES scenarios(id) ON DELETE CASCADE,
+    id INTEGER NOT NULL,
+    tipo TEXT NOT NULL,
+    nome TEXT,
+    prioridade NUMERIC NOT NULL,
+    tempo_cuidados_minimos NUMERIC NOT NULL,
+    PRIMARY KEY (scenario_id, id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS streets (
+    scenario_id INTEGER NOT NULL REFERENCES scenarios(id) ON DELETE CASCADE,
+    ponto_origem INTEGER NOT NULL,
+    ponto_destino INTEGER NOT NULL,
+    tempo_transporte NUMERIC NOT NULL
+);
+CREATE TABLE IF NOT EXISTS initial_data (
+    scenario_id INTEGER PRIMARY KEY REFERENCES scenarios(id) ON DELETE CASCADE,
+    ponto_inicial INTEGER NOT NULL,
+    tempo_total NUMERIC NOT NULL
+);
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    scenario_id INTEGER NOT NULL REFERENCES scenarios(id) ON DELETE CASCADE,
+    created_at TEXT NOT NULL,
+    solver TEXT NOT NULL,
+    patients INTEGER NOT NULL,
+    total_priority NUMERIC NOT NULL,
+    total_time NUMERIC NOT NULL
+);
+CREATE TABLE IF NOT EXISTS route_steps (
+    run_id INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+    step INTEGER NOT NULL,
+    from_node INTEGER NOT NULL,
+    to_patient INTEGER NOT NULL,
+    path_to_patient TEXT NOT NULL,
+    path_to_hospital TEXT NOT NULL,
+    time_needed NUMERIC NOT NULL,
+    priority NUMERIC NOT NULL,
+    PRIMARY KEY (run_id, step)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_streets_scenario ON streets (scenario_id);
+CREATE INDEX IF NOT EXISTS idx_points_scenario_tipo ON points (scenario_id, tipo);
+CREATE INDEX IF NOT EXISTS idx_runs_scenario_created ON runs (scenario_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_runs_total_priority ON runs (total_priority);
+CREATE INDEX IF NOT EXISTS idx_route_steps_patient ON route_steps (to_patient);
+"""
+
+# One connection per (process, thread, database); sqlite3 connections must not
+# cross threads and must not be inherited by forked workers
+_local = threading.local()
+
+
+def get_connection(db_path: str = DEFAULT_DB_PATH) -> sqlite3.Connection:
+    """Return the connection of the current worker for db_path, creating the schema once"""
+    connections = getattr(_local, "connections", None)
+    if connections is None or getattr(_local, "pid", None) != os.getpid():
+        connections = _local.connections = {}
+        _local.pid = os.getpid()
+
+    conn = connections.get(db_path)
+    if conn is None:
+        conn = sqlite3.connect(db_path)
+        conn.execute("PRAGMA foreign_keys = ON")
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("PRAGMA synchronous = NORMAL")
+        conn.executescript(SCHEMA)
+        connections[db_path] = conn
+    return conn
+
+
+def _connection(db: Union[str, sqlite3.Connection]) -> sqlite3.Connection:
+    return db if isinstance(db, sqlite3.Connection) else get_connection(db)
+
+
+def _rows(df: pd.DataFrame, columns: List[str]) -> Iterable[Tuple[Any, ...]]:
+    """Plain Python tuples for executemany (sqlite3 does not bind NumPy scalars)"""
+    return df[columns].astype(object).itertuples(index=False, name=None)
+
+
+def import_scenario_frames(
+    db: Union[str, sqlite3.Connection],
+    name: str,
+    initial_data: pd.DataFrame,
+    points_data: pd.DataFrame,
+    edges_data: pd.DataFrame,
+    source_path: Optional[str] = None,
+) -> int:
+    """Store one scenario, replacing any previous scenario with the same name"""
+    conn = _connection(db)
+    with conn:
+        conn.execute("DELETE FROM scenarios WHERE name = ?", (name,))
+        scenario_id = conn.execute(
+            "INSERT INTO scenarios (name, source_path, imported_at) VALUES (?, ?, ?)",
+            (name, source_path, datetime.now().isoformat(timespec="seconds")),
+        ).lastrowid
+        conn.executemany(
+            "INSERT INTO points VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                (scenario_id,) + row
+                for row in _rows(
+                    points_data,
+                    ["id", "tipo", "nome", "prioridade", "tempo_cuidados_minimos"],
+                )
+            ),
+        )
+        conn.executemany(
+            "INSERT INTO streets VALUES (?, ?, ?, ?)",
+            (
+                (scenario_id,) + row
+                for row in _rows(
+                    edges_data, ["ponto_origem", "ponto_destino", "tempo_transporte"]
+                )
+            ),
+        )
+        first = initial_data.iloc[:1]
+        conn.executemany(
+            "INSERT INTO initial_data VALUES (?, ?, ?)",
+            (
+                (scenario_id,) + row
+                for row in _rows(first, ["ponto_inicial", "tempo_total"])
+            ),
+        )
+    return scenario_id
+
+
+def import_scenario_folder(
+    db: Union[str, sqlite3.Connection], folder: str, name: Optional[str] = None
+) -> int:
+    """Bulk-load the three CSVs of a scenario folder"""
+    return import_scenario_frames(
+        db,
+        name or os.path.basename(os.path.normpath(folder)),
+        pd.read_csv(os.path.join(folder, "dados_iniciais.csv")),
+        pd.read_csv(os.path.join(folder, "pontos.csv")),
+        pd.read_csv(os.path.join(folder, "ruas.csv")),
+        source_path=os.path.abspath(folder),
+    )
+
+
+def find_scenario_folders(root: str) -> List[str]:
+    """All folders below root that contain a complete scenario"""
+    folders = []
+    for dirpath, _, filenames in os.walk(root):
+        if all(f in filenames for f in SCENARIO_FILES):
+            folders.append(dirpath)
+    return sorted(folders)
+
+
+def import_scenario_tree(db: Union[str, sqlite3.Connection], root: str) -> List[int]:
+    """
+    Bulk-load every scenario below root. Scenarios are named by their path
+    relative to root (e.g. "hard/8").
+    """
+    ids = []
+    for folder in find_scenario_folders(root):
+        name = Path(os.path.relpath(folder, root)).as_posix()
+        ids.append(import_scenario_folder(db, folder, name))
+    return ids
+
+
+def list_scenarios(db: Union[str, sqlite3.Connection]) -> pd.DataFrame:
+    """Scenario catalogue with point/street counts and the number of stored runs"""
+    return pd.read_sql_query(
+        """
+        SELECT s.id, s.name, s.source_path, s.imported_at,
+               (SELECT COUNT(*) FROM points p WHERE p.scenario_id = s.id) AS points,
+               (SELECT COUNT(*) FROM streets r WHERE r.scenario_id = s.id) AS streets,
+               (SELECT COUNT(*) FROM runs u WHERE u.scenario_id = s.id) AS runs
+        FROM scenarios s
+        ORDER BY s.name
+        """,
+        _connection(db),
+    )
+
+
+def _scenario_id(conn: sqlite3.Connection, scenario: Union[int, str]) -> int:
+    if isinstance(scenario, int):
+        return scenario
+    row = conn.execute("SELECT id FROM scenarios WHERE name = ?", (scenario,)).fetchone()
+    if row is None:
+        raise KeyError(f"Scenario not found in store: {scenario}")
+    return row[0]
+
+
+def problem_data_dict_by_scenario(
+    db: Union[str, sqlite3.Connection], scenario: Union[int, str]
+) -> Dict[str, Any]:
+    """
+    Loads a stored scenario and builds the full igraph Graph with attributes.
+    Returns the same dictionary as Data_Import.problem_data_dict_by_folder.
+    """
+    conn = _connection(db)
+    scenario_id = _scenario_id(conn, scenario)
+    params = (scenario_id,)
+
+    initial_data = pd.read_sql_query(
+        "SELECT ponto_inicial, tempo_total FROM initial_data WHERE scenario_id = ?",
+        conn,
+        params=params,
+    )
+    points_data = pd.read_sql_query(
+        "SELECT id, tipo, nome, prioridade, tempo_cuidados_minimos FROM points "
+        "WHERE scenario_id = ? ORDER BY id",
+        conn,
+        params=params,
+    )
+    edges_data = pd.read_sql_query(
+        "SELECT ponto_origem, ponto_destino, tempo_transporte FROM streets "
+        "WHERE scenario_id = ? ORDER BY rowid",
+        conn,
+        params=params,
+    )
+
+    graph = pd_to_igraph(edges_data)
+    add_points_data_to_graph(graph, points_data)
+
+    return {
+        "graph": graph,
+        "points_data": points_data,
+        "ruas_data": edges_data,
+        "initial_data": initial_data,
+    }
+
+
+def is_store(path: str) -> bool:
+    """Whether path is an SQLite database file (a store, not a scenario folder)"""
+    try:
+        with open(path, "rb") as f:
+            return f.read(len(SQLITE_HEADER)) == SQLITE_HEADER
+    except OSError:
+        return False
+
+
+def store_source(db_path: str, scenario: str) -> str:
+    """Scenario source of a stored scenario (see load_scenario)"""
+    return f"{db_path}{STORE_SEPARATOR}{scenario}"
+
+
+def split_store_source(source: str) -> Optional[Tuple[str, str]]:
+    """(database path, scenario name) of a store source, None for a folder"""
+    db_path, separator, scenario = source.partition(STORE_SEPARATOR)
+    if not separator or not is_store(db_path):
+        return None
+    return db_path, scenario
+
+
+def find_scenarios(root: str) -> List[Tuple[str, str]]:
+    """
+    (name, source) of every scenario in root: a store (all stored scenarios)
+    or a folder tree (named by their path relative to root, e.g. "hard/8")
+    """
+    if is_store(root):
+        return [(name, store_source(root, name)) for name in list_scenarios(root)["name"]]
+    return [
+        (Path(os.path.relpath(folder, root)).as_posix(), folder)
+        for folder in find_scenario_folders(root)
+    ]
+
+
+def load_scenario(source: str) -> Dict[str, Any]:
+    """
+    Loads a scenario folder or a stored scenario ("<database>::<name>").
+    Returns the same dictionary as Data_Import.problem_data_dict_by_folder.
+    """
+    stored = split_store_source(source)
+    if stored is not None:
+        return problem_data_dict_by_scenario(*stored)
+    return problem_data_dict_by_folder(source)
+
+
+def save_route_logs(
+    db: Union[str, sqlite3.Connection],
+    results: List[Tuple[Union[int, str], List[Dict[str, Any]]]],
+    solver: str = "greedy",
+) -> List[int]:
+    """
+    Save many (scenario, route_log) results in a single transaction, inserting
+    all route steps with one batched executemany.
+    """
+    conn = _connection(db)
+    created_at = datetime.now().isoformat(timespec="seconds")
+    run_ids = []
+    steps = []
+    with conn:
+        for scenario, route_log in results:
+            run_id = conn.execute(
+                "INSERT INTO runs (scenario_id, created_at, solver, patients, "
+                "total_priority, total_time) VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    _scenario_id(conn, scenario),
+                    created_at,
+                    solver,
+                    len(route_log),
+                    float(sum(step["priority"] for step in route_log)),
+                    float(sum(step["time_needed"] for step in route_log)),
+                ),
+            ).lastrowid
+            run_ids.append(run_id)
+            for i, step in enumerate(route_log, 1):
+                steps.append(
+                    (
+                        run_id,
+                        i,
+                        int(step["from"]),
+                        int(step["to_patient"]),
+                        json.dumps([int(v) for v in step["path_to_patient"]]),
+                        json.dumps([int(v) for v in step["path_to_hospital"]]),
+                        float(step["time_needed"]),
+                        float(step["priority"]),
+                    )
+                )
+        conn.executemany(
+            "INSERT INTO route_steps VALUES (?, ?, ?, ?, ?, ?, ?, ?)", steps
+        )
+    return run_ids
+
+
+def save_route_log(
+    db: Union[str, sqlite3.Connection],
+    scenario: Union[int, str],
+    route_log: List[Dict[str, Any]],
+    solver: str = "greedy",
+) -> int:
+    """Save one routing result and return its run id"""
+    return save_route_logs(db, [(scenario, route_log)], solver)[0]
+
+
+def load_route_log(
+    db: Union[str, sqlite3.Connection], run_id: int
+) -> List[Dict[str, Any]]:
+    """Rebuild a stored route_log in the format returned by the algorithm"""
+    rows = _connection(db).execute(
+        "SELECT from_node, to_patient, path_to_patient, path_to_hospital, "
+        "time_needed, priority FROM route_steps WHERE run_id = ? ORDER BY step",
+        (run_id,),
+    )
+    return [
+        {
+            "from": from_node,
+            "to_patient": to_patient,
+            "path_to_patient": json.loads(path_to_patient),
+            "path_to_hospital": json.loads(path_to_hospital),
+            "time_needed": time_needed,
+            "priority": priority,
+        }
+        for from_node, to_patient, path_to_patient, path_to_hospital, time_needed, priority in rows
+    ]
+
+
+def run_history(
+    db: Union[str, sqlite3.Connection], scenario: Optional[Union[int, str]] = None
+) -> pd.DataFrame:
+    """Stored runs, newest first, optionally restricted to one scenario"""
+    conn = _connection(db)
+    query = (
+        "SELECT r.id AS run_id, s.name AS scenario, r.created_at, r.solver, "
+        "r.patients, r.total_priority, r.total_time "
+        "FROM runs r JOIN scenarios s ON s.id = r.scenario_id"
+    )
+    params: Tuple[Any, ...] = ()
+    if scenario is not None:
+        query += " WHERE r.scenario_id = ?"
+        params = (_scenario_id(conn, scenario),)
+    query += " ORDER BY r.created_at DESC, r.id DESC"
+    return pd.read_sql_query(query, conn, params=params)
+
+
+def run_batch_from_store(
+    db_path: str = DEFAULT_DB_PATH, scenarios: Optional[List[str]] = None
+) -> pd.DataFrame:
+    """
+    Batch runner reading scenarios straight from the store; every result is
+    written back in one batched transaction. Returns the stored runs.
+    """
+    from .alg import ambulance_routing_optimized  # type: ignore
+
+    conn = get_connection(db_path)
+    if scenarios is None:
+        scenarios = list_scenarios(conn)["name"].tolist()
+
+    results = []
+    for name in scenarios:
+        data = problem_data_dict_by_scenario(conn, name)
+        initial_data = data["initial_data"]
+        route_log = ambulance_routing_optimized(
+            data["graph"],
+            data["points_data"],
+            initial_data.iloc[0]["ponto_inicial"],
+            initial_data.iloc[0]["tempo_total"],
+        )
+        results.append((name, route_log))
+
+    run_ids = save_route_logs(conn, results)
+    history = run_history(conn)
+    return history[history["run_id"].isin(run_ids)]
+
+
+if __name__ == "__main__":
+    # Usage:
+    #   python -m Code.Data_Store import <scenario root> [db path]
+    #   python -m Code.Data_Store run [db path]
+    #   python -m Code.Data_Store history [db path]
+    command = sys.argv[1] if len(sys.argv) > 1 else "history"
+    if command == "import":
+        store_path = sys.argv[3] if len(sys.argv) > 3 else DEFAULT_DB_PATH
+        imported = import_scenario_tree(store_path, sys.argv[2])
+        print(f"Imported {len(imported)} scenarios into {store_path}")
+    elif command == "run":
+        store_path = sys.argv[2] if len(sys.argv) > 2 else DEFAULT_DB_PATH
+        print(run_batch_from_store(store_path).to_string(index=False))
+    else:
+        store_path = sys.argv[2] if len(sys.argv) > 2 else DEFAULT_DB_PATH
+        print(run_history(store_path).to_string(index=False))
@@ -0,0 +1,333 @@
+"""
+SciTech Ambulance Routing - Folder Watch Module
+===============================================
+
+This module watches a scenario folder and applies row-level changes of
+pontos.csv, ruas.csv and dados_iniciais.csv to an already loaded problem data
+dictionary, patching the igraph Graph (and the routing matrices, when they
+have been computed) in place instead of rebuilding it.
+"""
+
+import os
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import pandas as pd
+import igraph  # type: ignore
+
+from .Data_Import import add_points_data_to_graph, problem_data_dict_by_folder
+from .what_if import refresh_routing_matrices
+
+POINT_FILE = "pontos.csv"
+EDGE_FILE = "ruas.csv"
+INITIAL_FILE = "dados_iniciais.csv"
+
+EDGE_KEY = ["ponto_origem", "ponto_destino"]
+
+
+def _file_signature(path: str) -> Optional[Tuple[int, int]]:
+    """Return (mtime_ns, size) of a file, or None if it does not exist"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def folder_signature(folder: str) -> Tuple[Optional[Tuple[int, int]], ...]:
+    """Signatures of the three scenario files, to tell whether a folder changed"""
+    return tuple(
+        _file_signature(os.path.join(folder, name))
+        for name in (POINT_FILE, EDGE_FILE, INITIAL_FILE)
+    )
+
+
+def diff_points(old: pd.DataFrame, new: pd.DataFrame) -> Optional[Dict[str, List[Any]]]:
+    """
+    Row diff of two pontos DataFrames keyed by "id".
+    Returns None when the files cannot be diffed (different columns or
+    duplicated ids), meaning a full reload is needed.
+    """
+    if list(old.columns) != list(new.columns):
+        return None
+    if old["id"].duplicated().any() or new["id"].duplicated().any():
+        return None
+
+    old_rows = old.set_index("id")
+    new_rows = new.set_index("id")
+
+    added = new_rows.index.difference(old_rows.index).tolist()
+    removed = old_rows.index.difference(new_rows.index).tolist()
+    common = old_rows.index.intersection(new_rows.index)
+
+    old_common = old_rows.loc[common]
+    new_common = new_rows.loc[common, old_common.columns]
+    changed_mask = (old_common != new_common).any(axis=1)
+
+    return {
+        "added": added,
+        "removed": removed,
+        "changed": common[changed_mask.to_numpy()].tolist(),
+    }
+
+
+def _edge_weights(edges: pd.DataFrame) -> pd.Series:
+    """
+    Index edge weights by (origin, destination, occurrence) so parallel streets
+    stay distinct. The graph is undirected, so the endpoints are ordered
+    (smaller id first) and occurrence k is the k-th street between them, in
+    file order, which is also their edge id order in the graph.
+    """
+    ends = edges[EDGE_KEY].to_numpy()
+    pairs = pd.DataFrame(
+        {"origem": ends.min(axis=1), "destino": ends.max(axis=1)}, index=edges.index
+    )
+    occurrence = pairs.groupby(["origem", "destino"]).cumcount().rename("ocorrencia")
+    return pd.Series(
+        edges["tempo_transporte"].to_numpy(),
+        index=pd.MultiIndex.from_arrays([pairs["origem"], pairs["destino"], occurrence]),
+    )
+
+
+def diff_edges(old: pd.DataFrame, new: pd.DataFrame) -> Optional[Dict[str, List[Any]]]:
+    """
+    Row diff of two ruas DataFrames keyed by street (see _edge_weights).
+    "added" holds (origin, dest, weight), "removed" (origin, dest, occurrence)
+    and "changed" (origin, dest, occurrence, weight).
+    Returns None when the files cannot be diffed, meaning a full reload is needed.
+    """
+    if list(old.columns) != list(new.columns):
+        return None
+
+    old_weights = _edge_weights(old)
+    new_weights = _edge_weights(new)
+
+    added = new_weights.index.difference(old_weights.index)
+    removed = old_weights.index.difference(new_weights.index)
+    common = old_weights.index.intersection(new_weights.index)
+    changed = common[(old_weights.loc[common] != new_weights.loc[common]).to_numpy()]
+
+    # Sorted keys: new parallel streets are appended in occurrence order
+    return {
+        "added": [(o, d, new_weights.loc[(o, d, k)]) for o, d, k in added],
+        "removed": list(removed),
+        "changed": [(o, d, k, new_weights.loc[(o, d, k)]) for o, d, k in changed],
+    }
+
+
+def _ensure_vertices(graph: igraph.Graph, max_id: int) -> None:
+    """Grow the graph so that vertex ids up to max_id exist"""
+    missing = max_id + 1 - graph.vcount()
+    if missing > 0:
+        first = graph.vcount()
+        graph.add_vertices(missing)
+        for i in range(first, max_id + 1):
+            graph.vs[i]["name"] = str(i)
+
+
+def apply_points_diff(
+    graph: igraph.Graph, new_points: pd.DataFrame, points_diff: Dict[str, List[Any]]
+) -> None:
+    """Patch vertex attributes of added, changed and removed points in place"""
+    touched = points_diff["added"] + points_diff["changed"]
+    if touched:
+        _ensure_vertices(graph, int(max(touched)))
+        add_points_data_to_graph(graph, new_points[new_points["id"].isin(touched)])
+
+    for point_id in points_diff["removed"]:
+        if point_id < graph.vcount():
+            vertex = graph.vs[int(point_id)]
+            for attribute in ("Name", "Type", "Priority", "Minimum_Care_Time"):
+                if attribute in graph.vs.attributes():
+                    vertex[attribute] = None
+
+
+def _parallel_edge(graph: igraph.Graph, origin: int, dest: int, occurrence: int) -> int:
+    """Edge id of the occurrence-th street between origin and dest, or -1"""
+    if max(origin, dest) >= graph.vcount():
+        return -1
+    eids = sorted(graph.es.select(_between=([origin], [dest])).indices)
+    return eids[occurrence] if occurrence < len(eids) else -1
+
+
+def apply_edges_diff(graph: igraph.Graph, edges_diff: Dict[str, List[Any]]) -> None:
+    """Patch edge weights, deletions and insertions in place"""
+    # Both lookups run before any deletion, while occurrences match edge ids
+    for origin, dest, occurrence, weight in edges_diff["changed"]:
+        eid = _parallel_edge(graph, int(origin), int(dest), int(occurrence))
+        if eid >= 0:
+            graph.es[eid]["weight"] = weight
+
+    removed_ids = set()
+    for origin, dest, occurrence in edges_diff["removed"]:
+        eid = _parallel_edge(graph, int(origin), int(dest), int(occurrence))
+        if eid >= 0:
+            removed_ids.add(eid)
+    if removed_ids:
+        graph.delete_edges(sorted(removed_ids))
+
+    if edges_diff["added"]:
+        pairs = [(int(o), int(d)) for o, d, _ in edges_diff["added"]]
+        _ensure_vertices(graph, max(max(pair) for pair in pairs))
+        graph.add_edges(
+            pairs, attributes={"weight": [w for _, _, w in edges_diff["added"]]}
+        )
+
+
+class FolderWatcher:
+    """
+    Polls a scenario folder and keeps a problem data dictionary in sync with it.
+
+    Polling compares file signatures (mtime and size) so that unchanged files
+    are never parsed again; changed files are diffed by row and only the
+    differences are applied to the graph.
+    """
+
+    def __init__(self, folder: str, data: Optional[Dict[str, Any]] = None):
+        self.folder = folder
+        self.data = data if data is not None else problem_data_dict_by_folder(folder)
+        self._signatures = {
+            name: _file_signature(os.path.join(folder, name))
+            for name in (POINT_FILE, EDGE_FILE, INITIAL_FILE)
+        }
+
+    def _changed_files(self) -> Dict[str, Optional[Tuple[int, int]]]:
+        changed = {}
+        for name, signature in self._signatures.items():
+            current = _file_signature(os.path.join(self.folder, name))
+            if current is not None and current != signature:
+                changed[name] = current
+        return changed
+
+    def poll(self) -> Optional[Dict[str, Any]]:
+        """
+        Check the folder once. Returns a summary of the applied changes, or None
+        if nothing changed (or a file is still being written by the exporter).
+        """
+        changed = self._changed_files()
+        if not changed:
+            return None
+
+        try:
+            new_frames = {
+                name: pd.read_csv(os.path.join(self.folder, name)) for name in changed
+            }
+        except (pd.errors.EmptyDataError, pd.errors.ParserError, OSError):
+            # Half-written file, try again on the next poll
+            return None
+
+        summary: Dict[str, Any] = {"full_reload": False}
+        graph = self.data["graph"]
+
+        points_diff = None
+        edges_diff = None
+        if POINT_FILE in new_frames:
+            points_diff = diff_points(self.data["points_data"], new_frames[POINT_FILE])
+        if EDGE_FILE in new_frames:
+            edges_diff = diff_edges(self.data["ruas_data"], new_frames[EDGE_FILE])
+
+        if (POINT_FILE in new_frames and points_diff is None) or (
+            EDGE_FILE in new_frames and edges_diff is None
+        ):
+            self.data = problem_data_dict_by_folder(self.folder)
+            summary["full_reload"] = True
+        else:
+            if edges_diff is not None:
+                apply_edges_diff(graph, edges_diff)
+                self.data["ruas_data"] = new_frames[EDGE_FILE]
+                summary["edges_added"] = len(edges_diff["added"])
+                summary["edges_removed"] = len(edges_diff["removed"])
+                summary["edges_changed"] = len(edges_diff["changed"])
+            if points_diff is not None:
+                apply_points_diff(graph, new_frames[POINT_FILE], points_diff)
+                self.data["points_data"] = new_frames[POINT_FILE]
+                summary["points_added"] = points_diff["added"]
+                summary["points_removed"] = points_diff["removed"]
+                summary["points_changed"] = points_diff["changed"]
+            if edges_diff is not None or points_diff is not None:
+                streets = [
+                    (int(street[0]), int(street[1]))
+                    for key in ("added", "removed", "changed")
+                    for street in (edges_diff or {}).get(key, [])
+                ]
+                refresh_routing_matrices(
+                    self.data, streets, points_changed=points_diff is not None
+                )
+            if INITIAL_FILE in new_frames:
+                self.data["initial_data"] = new_frames[INITIAL_FILE]
+                summary["initial_data_changed"] = True
+
+        self._signatures.update(changed)
+        return summary
+
+
+def describe_changes(summary: Dict[str, Any]) -> str:
+    """Short human readable description of a poll summary"""
+    if summary.get("full_reload"):
+        return "full reload"
+    parts = []
+    for key, label in (
+        ("points_added", "added"),
+        ("points_removed", "removed"),
+        ("points_changed", "changed"),
+    ):
+        if summary.get(key):
+            parts.append(f"{len(summary[key])} points {label}")
+    for key, label in (
+        ("edges_added", "added"),
+        ("edges_removed", "removed"),
+        ("edges_changed", "changed"),
+    ):
+        if summary.get(key):
+            parts.append(f"{summary[key]} streets {label}")
+    if summary.get("initial_data_changed"):
+        parts.append("initial data changed")
+    return ", ".join(parts) if parts else "no row changes"
+
+
+def watch_folder(
+    folder: str,
+    on_change: Callable[[Dict[str, Any], Dict[str, Any]], None],
+    interval: float = 2.0,
+    stop_event: Optional[threading.Event] = None,
+    data: Optional[Dict[str, Any]] = None,
+) -> None:
+    """
+    Blocking watch loop: calls on_change(data, summary) after every applied change
+    until stop_event is set.
+    """
+    watcher = FolderWatcher(folder, data)
+    stop_event = stop_event or threading.Event()
+    while not stop_event.wait(interval):
+        summary = watcher.poll()
+        if summary is not None:
+            on_change(watcher.data, summary)
+
+
+if __name__ == "__main__":
+    # Usage: python -m Code.Folder_Watch <scenario folder> [interval seconds]
+    from .alg import ambulance_routing_optimized
+
+    def _solve_and_print(data: Dict[str, Any], summary: Optional[Dict[str, Any]]) -> None:
+        initial_data = data["initial_data"]
+        route_log = ambulance_routing_optimized(
+            data["graph"],
+            data["points_data"],
+            initial_data.iloc[0]["ponto_inicial"],
+            initial_data.iloc[0]["tempo_total"],
+        )
+        label = describe_changes(summary) if summary is not None else "initial load"
+        print(f"[{time.strftime('%H:%M:%S')}] {label}")
+        for step in route_log:
+            print(step)
+
+    watch_folder_path = sys.argv[1]
+    watch_interval = float(sys.argv[2]) if len(sys.argv) > 2 else 2.0
+    watch_data = problem_data_dict_by_folder(watch_folder_path)
+    _solve_and_print(watch_data, None)
+    try:
+        watch_folder(watch_folder_path, _solve_and_print, watch_interval, data=watch_data)
+    except KeyboardInterrupt:
+        pass
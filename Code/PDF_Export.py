@@ -3,18 +3,39 @@ SciTech Ambulance Routing - PDF Export Module
 ============================================
 
 This module handles PDF export functionality using a template-based approach.
+The template is parsed once per process; export_batch spreads many reports
+over a process pool.
 """
 
+import multiprocessing
 import os
-from typing import Dict, List, Any, Optional
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from io import BytesIO
+from itertools import accumulate, islice
+from typing import Dict, List, Any, Optional, Sequence, Tuple
 from datetime import datetime
-import tempfile
 from pathlib import Path
-from datetime import datetime
-from PyPDF2 import PdfReader, PdfWriter
+from PyPDF2 import PageObject, PdfReader, PdfWriter
+from PyPDF2.generic import (
+    ArrayObject,
+    DecodedStreamObject,
+    DictionaryObject,
+    IndirectObject,
+    NameObject,
+)
 from reportlab.pdfgen import canvas
 from reportlab.lib.pagesizes import A4
 
+# Table rows fit between the header (y=465) and the signature area (y >= 250)
+TABLE_START_Y = 465
+ROW_HEIGHT = 25
+ROWS_PER_PAGE = 9
+
+TEMPLATE_PATH = Path(__file__).parent.parent / "Docs" / "Pdf_Template.pdf"
+REPORT_KEYS = ("to_patient", "priority", "time_needed")
+OVERLAY_NAME = "/SciTechOverlay"
+
 
 def export_to_pdf(
     data: Dict[str, Any],
@@ -39,7 +60,7 @@ def export_to_pdf(
             output_path = f"ambulance_routing_report_{timestamp}.pdf"
 
         # Get template path
-        template_path = Path(__file__).parent.parent / "Docs" / "Pdf_Template.pdf"
+        template_path = TEMPLATE_PATH
 
         if template_path.exists():
             return _export_with_template(data, route_log, output_path, template_path)
@@ -52,6 +73,49 @@ def export_to_pdf(
         return False
 
 
+def export_batch(
+    reports: Sequence[Tuple[List[Dict[str, Any]], str]],
+    max_workers: Optional[int] = None,
+) -> List[bool]:
+    """
+    Export many reports at once, one (route_log, output_path) pair each.
+    Reports are spread over a process pool whose workers parse the template
+    once; returns the success flag of every report, in order.
+    """
+    # Only the columns printed in the report are sent to the workers
+    jobs = [
+        ([{key: step[key] for key in REPORT_KEYS} for step in route_log], output_path)
+        for route_log, output_path in reports
+    ]
+    if not jobs:
+        return []
+    max_workers = min(max_workers or os.cpu_count() or 1, len(jobs))
+    if max_workers == 1:
+        return [_export_job(job) for job in jobs]
+
+    # spawn: the UI process owns a Tk interpreter and threads
+    with ProcessPoolExecutor(
+        max_workers=max_workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_read_template,
+        initargs=(str(TEMPLATE_PATH),),
+    ) as executor:
+        return list(
+            executor.map(_export_job, jobs, chunksize=max(1, len(jobs) // (4 * max_workers)))
+        )
+
+
+def _export_job(job: Tuple[List[Dict[str, Any]], str]) -> bool:
+    route_log, output_path = job
+    return export_to_pdf({}, route_log, output_path)
+
+
+@lru_cache(maxsize=4)
+def _read_template(template_path: str) -> PdfReader:
+    """Parsed template, cached for the lifetime of the process"""
+    return PdfReader(template_path)
+
+
 def _export_with_template(
     data: Dict[str, Any],
     route_log: List[Dict[str, Any]],
@@ -69,16 +133,71 @@ def _export_with_template(
         return False
 
 
+def _build_overlay(route_log: List[Dict[str, Any]]) -> BytesIO:
+    """
+    Draw the table rows of every page into one in-memory overlay PDF
+    (one overlay page per template page).
+    """
+    buffer = BytesIO()
+    c = canvas.Canvas(buffer, pagesize=A4)
+    width, height = A4
+
+    current_date = datetime.now().strftime("%d/%m/%Y")
+    total_priority = sum(step["priority"] for step in route_log)
+    # Single pass over the log instead of a prefix sum per row
+    cumulative_times = accumulate(step["time_needed"] for step in route_log)
+    rows = zip(route_log, cumulative_times)
+    n_pages = max(1, -(-len(route_log) // ROWS_PER_PAGE))
+
+    for page_number in range(1, n_pages + 1):
+        # Add current date (top right)
+        c.drawString(650, height - 213, current_date)
+
+        # Set font for table data
+        c.setFont("Helvetica", 9)
+        for i, (step, cumulative_time) in enumerate(islice(rows, ROWS_PER_PAGE)):
+            y_pos = TABLE_START_Y - (i * ROW_HEIGHT)
+
+            # Patient ID (column 1)
+            c.drawString(65, y_pos, str(step["to_patient"]))
+
+            # Priority (column 2)
+            c.drawString(165, y_pos, str(step["priority"]))
+
+            # Service time (column 3)
+            c.drawString(300, y_pos, f"{step['time_needed']:.1f}min")
+
+            # Hospital arrival time (column 4)
+            hours = int(cumulative_time // 60)
+            minutes = int(cumulative_time % 60)
+            c.drawString(495, y_pos, f"{hours:02d}:{minutes:02d}")
+
+        if n_pages > 1:
+            c.setFont("Helvetica", 8)
+            c.drawRightString(width - 40, 20, f"Page {page_number}/{n_pages}")
+
+        if page_number == n_pages:
+            # Add accumulated priority - position it in the red box at bottom
+            c.setFont("Helvetica-Bold", 14)
+            c.drawString(210, 140, str(total_priority))
+
+        c.showPage()
+
+    c.save()
+    buffer.seek(0)
+    return buffer
+
+
 def _fill_template_with_data(
     data: Dict[str, Any],
     route_log: List[Dict[str, Any]],
     template_path: Path,
     output_path: str,
 ) -> bool:
-    """Fill the template PDF with actual routing data"""
+    """Fill the template PDF with actual routing data, adding pages as needed"""
     try:
-        # Read the template
-        template_reader = PdfReader(str(template_path))
+        # Parsed template (cached per process)
+        template_reader = _read_template(str(template_path))
         writer = PdfWriter()
 
         if len(template_reader.pages) == 0:
@@ -86,81 +205,75 @@ def _fill_template_with_data(
 
         template_page = template_reader.pages[0]
 
-        # Create overlay with data
-        with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as temp_file:
-            overlay_path = temp_file.name
-
-        try:
-            # Create overlay PDF with the data
-            c = canvas.Canvas(overlay_path, pagesize=A4)
-            width, height = A4
-
-            # Add current date (top right)
-
-            current_date = datetime.now().strftime("%d/%m/%Y")
-            c.drawString(650, height - 213, current_date)
-
-            # Fill in the table with route data
-            # Move 30 pixels down from current position
-            start_y = 465  # 495 - 30 = 465 (30 pixels down)
-            row_height = 25  # Spacing between rows
-
-            # Set font for table data
-            c.setFont("Helvetica", 9)
-
-            for i, step in enumerate(route_log[:15]):  # Limit to fit in template
-                y_pos = start_y - (i * row_height)
-
-                # Stop if we're getting too close to the bottom signature area
-                if y_pos < 250:
-                    break
-
-                # Patient ID (column 1) - move 50 pixels right
-                c.drawString(65, y_pos, str(step["to_patient"]))  # 15 + 50 = 65
-
-                # Priority (column 2) - move 50 pixels right
-                c.drawString(165, y_pos, str(step["priority"]))  # 115 + 50 = 165
+        # Stamp each overlay page onto its own copy of the template page;
+        # add_page clones the page dictionary but shares the template content
+        overlay_reader = PdfReader(_build_overlay(route_log))
+        save_state = _add_stream(writer, b"q\n")
+        draw_overlay = _add_stream(writer, f"Q\nq {OVERLAY_NAME} Do Q\n".encode())
+        for overlay_page in overlay_reader.pages:
+            page = writer.add_page(template_page)
+            _stamp_overlay(writer, page, overlay_page, save_state, draw_overlay)
 
-                # Service time (column 3) - move 50 pixels right
-                service_time = f"{step['time_needed']:.1f}min"
-                c.drawString(300, y_pos, service_time)  # 250 + 50 = 300
+        # Write final PDF
+        with open(output_path, "wb") as output_file:
+            writer.write(output_file)
 
-                # Hospital arrival time (column 4) - move 50 pixels right
-                cumulative_time = sum(s["time_needed"] for s in route_log[: i + 1])
-                hours = int(cumulative_time // 60)
-                minutes = int(cumulative_time % 60)
-                arrival_time = f"{hours:02d}:{minutes:02d}"
-                c.drawString(495, y_pos, arrival_time)  # 445 + 50 = 495
+        print(f"PDF exported successfully with filled template to: {output_path}")
+        return True
 
-            # Add accumulated priority - position it in the red box at bottom
-            total_priority = sum(step["priority"] for step in route_log)
-            c.setFont("Helvetica-Bold", 14)
-            c.drawString(
-                210, 140, str(total_priority)
-            )
-
-            c.save()
+    except Exception as e:
+        print(f"Failed to fill template: {str(e)}")
+        return False
 
-            # Merge overlay with template
-            overlay_reader = PdfReader(overlay_path)
-            if len(overlay_reader.pages) > 0:
-                overlay_page = overlay_reader.pages[0]
-                template_page.merge_page(overlay_page)
 
-            writer.add_page(template_page)
+def _add_stream(writer: PdfWriter, data: bytes) -> IndirectObject:
+    stream = DecodedStreamObject()
+    stream.set_data(data)
+    return _add_object(writer, stream)
 
-            # Write final PDF
-            with open(output_path, "wb") as output_file:
-                writer.write(output_file)
 
-            print(f"PDF exported successfully with filled template to: {output_path}")
-            return True
+def _add_object(writer: PdfWriter, obj: Any) -> IndirectObject:
+    """Register obj in the writer (public add_object where the library has it)"""
+    add_object = getattr(writer, "add_object", None) or writer._add_object
+    return add_object(obj)
 
-        finally:
-            # Clean up overlay file
-            if os.path.exists(overlay_path):
-                os.unlink(overlay_path)
 
-    except Exception as e:
-        print(f"Failed to fill template: {str(e)}")
-        return False
+def _stamp_overlay(
+    writer: PdfWriter,
+    page: PageObject,
+    overlay_page: PageObject,
+    save_state: IndirectObject,
+    draw_overlay: IndirectObject,
+) -> None:
+    """
+    Draw overlay_page on top of page as a form XObject. Unlike merge_page
+    this never parses the template content stream: the page contents become
+    [q, template contents, Q + draw overlay].
+    """
+    form = DecodedStreamObject()
+    form.set_data(overlay_page.get_contents().get_data())
+    form.update(
+        {
+            NameObject("/Type"): NameObject("/XObject"),
+            NameObject("/Subtype"): NameObject("/Form"),
+            NameObject("/BBox"): ArrayObject(overlay_page.mediabox),
+            NameObject("/Resources"): overlay_page["/Resources"].get_object().clone(writer),
+        }
+    )
+
+    # Copy the (possibly shared) resource dictionaries before adding the form
+    resources = DictionaryObject(page["/Resources"].get_object())
+    xobjects = DictionaryObject(resources.get("/XObject", DictionaryObject()).get_object())
+    xobjects[NameObject(OVERLAY_NAME)] = _add_object(writer, form)
+    resources[NameObject("/XObject")] = xobjects
+    page[NameObject("/Resources")] = resources
+
+    contents = page.raw_get("/Contents")
+    template_contents = (
+        list(contents.get_object())
+        if isinstance(contents.get_object(), ArrayObject)
+        else [contents]
+    )
+    page[NameObject("/Contents")] = ArrayObject(
+        [save_state, *template_contents, draw_overlay]
+    )
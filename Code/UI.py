@@ -5,16 +5,50 @@ SciTech Ambulance Routing - UI with Configurable Functions
 EASY INTEGRATION: Just replace the placeholder functions below with your actual implementations!
 """
 
+import matplotlib
+
+# The only Tk front end: graph_view and the render worker draw with Agg
+matplotlib.use("TkAgg")
 import tkinter as tk
 from tkinter import ttk
 from tkinter import filedialog, messagebox
 import ttkthemes
-from .Data_Import import problem_data_dict_by_each_file, problem_data_dict_by_folder  # type: ignore
-from .alg import ambulance_routing_optimized  # type: ignore
+import numpy as np
+from .Data_Import import problem_data_dict_by_each_file  # type: ignore
+from .Data_Store import (  # type: ignore
+    is_store,
+    list_scenarios,
+    load_scenario,
+    problem_data_dict_by_scenario,
+)
+from .alg import (  # type: ignore
+    ambulance_routing_optimized,
+    CancellationToken,
+    greedy_order_matrices,
+    route_log_from_order,
+)
 from .PDF_Export import export_to_pdf as pdf_export  # type: ignore
+from .Data_Export import export_route_log  # type: ignore
 from .graph_view import create_canvas  # type: ignore
-from typing import Any, Dict, Optional, List, Tuple
+from .network_view import create_network_canvas  # type: ignore
+from .Folder_Watch import FolderWatcher, describe_changes, folder_signature  # type: ignore
+from .render_worker import RenderWorker  # type: ignore
+from .virtual_table import VirtualTable  # type: ignore
+from .batch_view import BatchWindow  # type: ignore
+from .what_if import WhatIfWindow, ensure_routing_matrices, warm_start_resolve  # type: ignore
+from .result_cache import (  # type: ignore
+    CACHE_ENTRIES,
+    DEFAULT_CACHE_DIR,
+    ResultCache,
+    instance_fingerprint,
+)
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, List, Tuple
+import os
+import queue
 import sys
+import threading
+import time
 import traceback
 from datetime import datetime
 
@@ -24,8 +58,18 @@ from datetime import datetime
 
 
 def load_data_from_folder(folder_path: str) -> Optional[Dict[str, Any]]:
-    """Replace with your folder loading function"""
-    return problem_data_dict_by_folder(folder_path)
+    """Replace with your folder loading function (also takes "<store>::<scenario>")"""
+    return load_scenario(folder_path)
+
+
+def load_data_from_store(store_path: str, scenario: str) -> Optional[Dict[str, Any]]:
+    """Load a scenario imported into a Data_Store database"""
+    return problem_data_dict_by_scenario(store_path, scenario)
+
+
+def load_and_prepare_folder(folder_path: str) -> Optional[Dict[str, Any]]:
+    """Load a folder and precompute its routing matrices (speculative loading)"""
+    return prepare_data(load_data_from_folder(folder_path))
 
 
 def load_data_from_files(
@@ -35,8 +79,23 @@ def load_data_from_files(
     return problem_data_dict_by_each_file(dados_file, pontos_file, ruas_file)
 
 
-def run_algorithm(data: Dict[str, Any]) -> List[Dict[str, Any]]:
-    """Replace with your algorithm execution function"""
+def prepare_data(data: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Precompute the routing matrices of loaded data (runs in the background)"""
+    if data and data["graph"].vcount() <= PRECOMPUTE_MAX_VERTICES:
+        ensure_routing_matrices(data)
+    return data
+
+
+def run_algorithm(
+    data: Dict[str, Any],
+    progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+    cancel: Optional[CancellationToken] = None,
+    key: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Replace with your algorithm execution function. key is the
+    instance_fingerprint of data, when the caller already has it.
+    """
     if not data:
         return []
     graph = data["graph"]
@@ -44,9 +103,27 @@ def run_algorithm(data: Dict[str, Any]) -> List[Dict[str, Any]]:
     initial_data = data["initial_data"]
     initial_point = initial_data.iloc[0]["ponto_inicial"]
     total_time = initial_data.iloc[0]["tempo_total"]
-    route_log = ambulance_routing_optimized(
-        graph, points_data, initial_point, total_time
-    )
+    if key is None:
+        key = instance_fingerprint(data)
+    cached = ROUTE_CACHE.get(key)
+    if cached is not None:
+        return cached["route_log"]
+
+    started = time.perf_counter()
+    matrices = data.get("routing_matrices")
+    if matrices is not None:
+        # Distances already precomputed while loading: only the greedy is left
+        order = greedy_order_matrices(
+            matrices, int(initial_point), float(total_time), progress=progress, cancel=cancel
+        )
+        route_log = route_log_from_order(matrices, int(initial_point), order)
+    else:
+        route_log = ambulance_routing_optimized(
+            graph, points_data, initial_point, total_time, progress=progress, cancel=cancel
+        )
+    if cancel is None or not cancel.cancelled:
+        # A cancelled run is only a partial route: never cache it
+        ROUTE_CACHE.put(key, route_log, solver="greedy", elapsed=time.perf_counter() - started)
     return route_log
 
 
@@ -65,6 +142,14 @@ def browse_folder() -> Optional[str]:
     return filedialog.askdirectory(title="Select Data Folder")
 
 
+def browse_store() -> Optional[str]:
+    """File dialog for Data_Store database selection"""
+    return filedialog.askopenfilename(
+        title="Select Scenario Store",
+        filetypes=[("SQLite databases", "*.sqlite3 *.db"), ("All files", "*.*")],
+    )
+
+
 def browse_file(
     title: str = "Select File", filetypes: Optional[List[Tuple[str, str]]] = None
 ) -> Optional[str]:
@@ -78,6 +163,18 @@ def browse_file(
 # CONFIGURATION VARIABLES - Modify these as needed
 # ============================================================================
 
+WATCH_INTERVAL_MS = 2000  # Folder polling interval while watch mode is on
+RENDER_POLL_MS = 50  # How often the UI checks for finished background renders
+RENDER_DPI = 100  # Resolution of the figures rasterized by the render worker
+SOLVER_POLL_MS = 100  # How often the UI drains solver progress messages
+LOAD_POLL_MS = 100  # How often the UI checks background loading
+PRECOMPUTE_MAX_VERTICES = 3000  # Larger graphs skip the dense distance matrices
+RESULT_CACHE_DIR: Optional[str] = DEFAULT_CACHE_DIR  # None keeps results in memory only
+GRAPH_VIEWER = "auto"  # "matplotlib", "canvas" (native Tk canvas) or "auto"
+NATIVE_VIEWER_EDGE_THRESHOLD = 20000  # "auto" uses the native canvas above this many streets
+
+ROUTE_CACHE = ResultCache(CACHE_ENTRIES, RESULT_CACHE_DIR)
+
 
 class SciTechApp(ttkthemes.ThemedTk):
     def __init__(self):
@@ -104,6 +201,19 @@ class SciTechApp(ttkthemes.ThemedTk):
         self.data = None
         self.route_log = None
         self.canvas = None
+        self.watcher = None
+        self._watch_job = None
+        self.render_worker = RenderWorker()
+        self._render_generation = 0
+        self._layout_key = None  # Layout of the drawn network (see graph_view.get_layout)
+        self.solver_thread = None
+        self.solver_cancel = None
+        self.solver_queue = queue.Queue()
+        self.load_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="loader")
+        self._load_future = None
+        self._precompute_future = None
+        self._speculative = None
+        self.what_if_window = None
         self._create_widgets()
         self.protocol("WM_DELETE_WINDOW", self._on_closing)
 
@@ -150,7 +260,14 @@ class SciTechApp(ttkthemes.ThemedTk):
             variable=self.input_mode,
             value="files",
             command=self._toggle_input_mode,
-        ).grid(row=1, column=0, sticky=tk.W, pady=(0, 10))
+        ).grid(row=1, column=0, sticky=tk.W, pady=(0, 5))
+        ttk.Radiobutton(
+            input_frame,
+            text="Load from Store",
+            variable=self.input_mode,
+            value="store",
+            command=self._toggle_input_mode,
+        ).grid(row=2, column=0, sticky=tk.W, pady=(0, 10))
 
         # Folder mode frame
         self.folder_frame = ttk.Frame(input_frame)
@@ -164,6 +281,8 @@ class SciTechApp(ttkthemes.ThemedTk):
 
         self.folder_entry = ttk.Entry(folder_input_frame)
         self.folder_entry.grid(row=0, column=0, sticky=tk.EW, padx=(0, 5))
+        self.folder_entry.bind("<FocusOut>", lambda e: self._start_speculative_load())
+        self.folder_entry.bind("<Return>", lambda e: self._start_speculative_load())
         ttk.Button(folder_input_frame, text="Browse", command=self._browse_folder).grid(
             row=0, column=1
         )
@@ -221,13 +340,45 @@ class SciTechApp(ttkthemes.ThemedTk):
             command=lambda: self._browse_file(self.ruas_entry, "Select Ruas File"),
         ).grid(row=0, column=1)
 
-        ttk.Button(input_frame, text="Load Data", command=self._load_data).grid(
-            row=3, column=0, sticky=tk.EW, pady=(8, 5)
+        # Store mode frame (a Data_Store database and one of its scenarios)
+        self.store_frame = ttk.Frame(input_frame)
+        self.store_frame.grid_columnconfigure(0, weight=1)
+        ttk.Label(self.store_frame, text="Store:").grid(
+            row=0, column=0, sticky=tk.W, pady=(0, 3)
+        )
+        store_input_frame = ttk.Frame(self.store_frame)
+        store_input_frame.grid(row=1, column=0, sticky=tk.EW, pady=(0, 8))
+        store_input_frame.grid_columnconfigure(0, weight=1)
+        self.store_entry = ttk.Entry(store_input_frame)
+        self.store_entry.grid(row=0, column=0, sticky=tk.EW, padx=(0, 5))
+        self.store_entry.bind("<FocusOut>", lambda e: self._refresh_store_scenarios())
+        self.store_entry.bind("<Return>", lambda e: self._refresh_store_scenarios())
+        ttk.Button(store_input_frame, text="Browse", command=self._browse_store).grid(
+            row=0, column=1
+        )
+        ttk.Label(self.store_frame, text="Scenario:").grid(
+            row=2, column=0, sticky=tk.W, pady=(0, 3)
         )
+        self.store_scenario = ttk.Combobox(self.store_frame, state="readonly")
+        self.store_scenario.grid(row=3, column=0, sticky=tk.EW, pady=(0, 8))
+
+        self.load_button = ttk.Button(input_frame, text="Load Data", command=self._load_data)
+        self.load_button.grid(row=4, column=0, sticky=tk.EW, pady=(8, 5))
         self.status_label = ttk.Label(
             input_frame, text="Status: Not loaded", foreground="gray"
         )
-        self.status_label.grid(row=4, column=0, sticky=tk.W, pady=(0, 3))
+        self.status_label.grid(row=5, column=0, sticky=tk.W, pady=(0, 3))
+
+        self.watch_enabled = tk.BooleanVar(value=False)
+        ttk.Checkbutton(
+            input_frame,
+            text="Watch folder for changes",
+            variable=self.watch_enabled,
+            command=self._toggle_watch,
+        ).grid(row=6, column=0, sticky=tk.W)
+        self.load_progress = ttk.Progressbar(input_frame, mode="indeterminate")
+        self.load_progress.grid(row=7, column=0, sticky=tk.EW, pady=(5, 0))
+        self.load_progress.grid_remove()
 
         # Initially show folder frame
         self._toggle_input_mode()
@@ -236,13 +387,30 @@ class SciTechApp(ttkthemes.ThemedTk):
         run_frame = ttk.LabelFrame(self.sidebar, text="Run Algorithm", padding=10)
         run_frame.grid(row=1, column=0, sticky=tk.EW, pady=(0, 10))
         run_frame.grid_columnconfigure(0, weight=1)
-        ttk.Button(run_frame, text="Run Algorithm", command=self._run_algorithm).grid(
-            row=0, column=0, sticky=tk.EW, pady=(0, 8)
+        run_buttons = ttk.Frame(run_frame)
+        run_buttons.grid(row=0, column=0, sticky=tk.EW, pady=(0, 8))
+        run_buttons.grid_columnconfigure(0, weight=1)
+        self.run_button = ttk.Button(
+            run_buttons, text="Run Algorithm", command=self._run_algorithm
+        )
+        self.run_button.grid(row=0, column=0, sticky=tk.EW, padx=(0, 5))
+        self.cancel_button = ttk.Button(
+            run_buttons, text="Cancel", command=self._cancel_algorithm, state=tk.DISABLED
+        )
+        self.cancel_button.grid(row=0, column=1)
+        ttk.Button(run_frame, text="Play Route", command=self._play_route).grid(
+            row=1, column=0, sticky=tk.EW, pady=(0, 8)
+        )
+        ttk.Button(run_frame, text="Batch Compare...", command=self._open_batch).grid(
+            row=2, column=0, sticky=tk.EW, pady=(0, 8)
+        )
+        ttk.Button(run_frame, text="What-If...", command=self._open_what_if).grid(
+            row=3, column=0, sticky=tk.EW, pady=(0, 8)
         )
         self.run_status_label = ttk.Label(
             run_frame, text="Status: Ready", foreground="gray"
         )
-        self.run_status_label.grid(row=1, column=0, sticky=tk.W)
+        self.run_status_label.grid(row=4, column=0, sticky=tk.W)
 
         # Results Section
         results_frame = ttk.LabelFrame(self.sidebar, text="Results", padding=10)
@@ -285,34 +453,21 @@ class SciTechApp(ttkthemes.ThemedTk):
         table_frame.grid_columnconfigure(0, weight=1)
         table_frame.grid_rowconfigure(0, weight=1)
 
-        # Create Treeview for results
-        columns = ("Step", "Patient", "Priority", "Time", "Acc. Priority")
-        self.results_tree = ttk.Treeview(
-            table_frame, columns=columns, show="headings", height=8
+        # Virtualized table for results (only the rows in view are Treeview items)
+        self.results_tree = VirtualTable(
+            table_frame,
+            columns=("Step", "Patient", "Priority", "Time", "Acc. Priority"),
+            widths={
+                "Step": 40,
+                "Patient": 60,
+                "Priority": 60,
+                "Time": 50,
+                "Acc. Priority": 80,
+            },
+            formatters={"Time": lambda t: f"{t:.1f}"},
+            height=8,
         )
-
-        # Configure columns
-        self.results_tree.heading("Step", text="Step")
-        self.results_tree.heading("Patient", text="Patient")
-        self.results_tree.heading("Priority", text="Priority")
-        self.results_tree.heading("Time", text="Time")
-        self.results_tree.heading("Acc. Priority", text="Acc. Priority")
-
-        # Set column widths
-        self.results_tree.column("Step", width=40, anchor="center")
-        self.results_tree.column("Patient", width=60, anchor="center")
-        self.results_tree.column("Priority", width=60, anchor="center")
-        self.results_tree.column("Time", width=50, anchor="center")
-        self.results_tree.column("Acc. Priority", width=80, anchor="center")
-
-        # Add scrollbar to treeview
-        tree_scrollbar = ttk.Scrollbar(
-            table_frame, orient=tk.VERTICAL, command=self.results_tree.yview
-        )
-        self.results_tree.configure(yscrollcommand=tree_scrollbar.set)
-
         self.results_tree.grid(row=0, column=0, sticky=tk.NSEW)
-        tree_scrollbar.grid(row=0, column=1, sticky=tk.NS)
 
         # Export Section
         export_frame = ttk.LabelFrame(self.sidebar, text="Export", padding=10)
@@ -321,6 +476,9 @@ class SciTechApp(ttkthemes.ThemedTk):
         ttk.Button(export_frame, text="Export PDF", command=self._export_pdf).grid(
             row=0, column=0, sticky=tk.EW
         )
+        ttk.Button(export_frame, text="Export Data", command=self._export_data).grid(
+            row=1, column=0, sticky=tk.EW, pady=(5, 0)
+        )
 
         # Right main area - expandable with 3 columns: node list, spacer, visualization
         main_area = ttk.Frame(self.main_frame)
@@ -344,30 +502,15 @@ class SciTechApp(ttkthemes.ThemedTk):
         nodes_tree_frame.grid_columnconfigure(0, weight=1)
         nodes_tree_frame.grid_rowconfigure(0, weight=1)
 
-        # Node TreeView
-        node_columns = ("ID", "Type", "Priority")
-        self.nodes_tree = ttk.Treeview(
-            nodes_tree_frame, columns=node_columns, show="headings", height=15
-        )
-
-        # Configure node columns
-        self.nodes_tree.heading("ID", text="ID")
-        self.nodes_tree.heading("Type", text="Type")
-        self.nodes_tree.heading("Priority", text="Priority")
-
-        # Set node column widths
-        self.nodes_tree.column("ID", width=30, anchor="center")
-        self.nodes_tree.column("Type", width=80, anchor="center")
-        self.nodes_tree.column("Priority", width=60, anchor="center")
-
-        # Add scrollbar to nodes treeview
-        nodes_scrollbar = ttk.Scrollbar(
-            nodes_tree_frame, orient=tk.VERTICAL, command=self.nodes_tree.yview
+        # Virtualized node table
+        self.nodes_tree = VirtualTable(
+            nodes_tree_frame,
+            columns=("ID", "Type", "Priority"),
+            widths={"ID": 30, "Type": 80, "Priority": 60},
+            formatters={"Priority": lambda p: "-" if np.isnan(p) else f"{p:g}"},
+            height=15,
         )
-        self.nodes_tree.configure(yscrollcommand=nodes_scrollbar.set)
-
         self.nodes_tree.grid(row=0, column=0, sticky=tk.NSEW)
-        nodes_scrollbar.grid(row=0, column=1, sticky=tk.NS)
 
         # Visualization Section (reduced width by 10%)
         viz_frame = ttk.LabelFrame(main_area, text="Visualization", padding=15)
@@ -393,97 +536,156 @@ class SciTechApp(ttkthemes.ThemedTk):
         self.viz_placeholder.grid(row=0, column=0, sticky=tk.NSEW)
 
     def _toggle_input_mode(self):
-        if self.input_mode.get() == "folder":
-            self.files_frame.grid_forget()
-            self.folder_frame.grid(row=2, column=0, sticky=tk.EW, pady=(0, 8))
-            # Clear files entries
+        frames = {"folder": self.folder_frame, "files": self.files_frame, "store": self.store_frame}
+        for mode, frame in frames.items():
+            if mode == self.input_mode.get():
+                frame.grid(row=3, column=0, sticky=tk.EW, pady=(0, 8))
+            else:
+                frame.grid_forget()
+        # Clear the entries of the other modes
+        if self.input_mode.get() != "files":
             self.dados_entry.delete(0, tk.END)
             self.pontos_entry.delete(0, tk.END)
             self.ruas_entry.delete(0, tk.END)
-        else:
-            self.folder_frame.grid_forget()
-            self.files_frame.grid(row=2, column=0, sticky=tk.EW, pady=(0, 8))
-            # Clear folder entry
+        if self.input_mode.get() != "folder":
             self.folder_entry.delete(0, tk.END)
 
     def _on_closing(self):
         """Handle window close event"""
+        if self.solver_cancel is not None:
+            self.solver_cancel.cancel()
+        self.render_worker.shutdown()
+        self.load_executor.shutdown(wait=False, cancel_futures=True)
         self.quit()
         sys.exit(0)
 
     def _populate_nodes_tree(self):
-        """Populate the nodes TreeView with data in numerical order"""
+        """Populate the nodes table with data in numerical order"""
         try:
-            # Clear existing items
-            for item in self.nodes_tree.get_children():
-                self.nodes_tree.delete(item)
-
             if self.data and "points_data" in self.data:
                 df_pontos = self.data["points_data"]
-
-                # Sort by index (numerical order)
-                for i in range(len(df_pontos)):
-                    row = df_pontos.iloc[i]
-                    node_type = row["tipo"]
-
-                    if node_type != "hospital":
-                        priority = row["prioridade"]
-                        self.nodes_tree.insert(
-                            "", "end", values=(i, "Patient", priority)
-                        )
-                    else:
-                        self.nodes_tree.insert("", "end", values=(i, "Hospital", "-"))
+                is_patient = (df_pontos["tipo"] != "hospital").to_numpy()
+                self.nodes_tree.set_data(
+                    {
+                        "ID": np.arange(len(df_pontos)),
+                        "Type": np.where(is_patient, "Patient", "Hospital"),
+                        "Priority": np.where(
+                            is_patient, df_pontos["prioridade"].to_numpy(float), np.nan
+                        ),
+                    }
+                )
+            else:
+                self.nodes_tree.clear()
         except Exception as e:
             print(f"Error populating nodes tree: {e}")
             traceback.print_exc()
 
-    def _create_graph_viz(self):
-        """Create the graph visualization canvas"""
+    def _create_graph_viz(self, edited=False):
+        """
+        Render the graph visualization in the background render worker.
+        edited: the data is an edit of the drawn network, whose layout is then
+        the starting point of the new one.
+        """
         try:
             if self.data and "points_data" in self.data and "ruas_data" in self.data:
-                # Remove placeholder
-                self.viz_placeholder.grid_forget()
-                # Create canvas
-                self.canvas = create_canvas(
-                    self.viz_container, self.data["points_data"], self.data["ruas_data"]
-                )
-                self.canvas.get_tk_widget().grid(row=0, column=0, sticky=tk.NSEW)
-                self.canvas.draw()
                 # Populate nodes tree
                 self._populate_nodes_tree()
+                # Layout and drawing run off the Tk thread; older jobs are ignored
+                self._render_generation += 1
+                layout_base = self._layout_key if edited else None
+                if self._use_native_viewer():
+                    # The native canvas only needs the layout coordinates
+                    future = self.render_worker.submit_layout(
+                        self.data["points_data"], self.data["ruas_data"], layout_base
+                    )
+                else:
+                    # At the widget size, so the worker's pixels can be shown as is
+                    width = self.viz_container.winfo_width()
+                    height = self.viz_container.winfo_height()
+                    sizing = (
+                        {"figsize": (width / RENDER_DPI, height / RENDER_DPI), "dpi": RENDER_DPI}
+                        if width > 1 and height > 1
+                        else {}
+                    )
+                    future = self.render_worker.submit_figure(
+                        self.data["points_data"],
+                        self.data["ruas_data"],
+                        layout_base=layout_base,
+                        **sizing,
+                    )
+                if self.canvas is None:
+                    self.viz_placeholder.configure(text="Rendering graph...")
+                self.after(
+                    RENDER_POLL_MS, self._poll_render, future, self._render_generation
+                )
             else:
                 print("Data not complete for visualization")
         except Exception as e:
             print(f"Error creating graph viz: {e}")
             traceback.print_exc()
 
+    def _use_native_viewer(self) -> bool:
+        """Whether to draw the network on the native Tk canvas (see GRAPH_VIEWER)"""
+        if GRAPH_VIEWER == "auto":
+            return len(self.data["ruas_data"]) > NATIVE_VIEWER_EDGE_THRESHOLD
+        return GRAPH_VIEWER == "canvas"
+
+    def _poll_render(self, future, generation):
+        """Embed the figure produced by the render worker once it is ready"""
+        if generation != self._render_generation:
+            return
+        if not future.done():
+            self.after(RENDER_POLL_MS, self._poll_render, future, generation)
+            return
+        try:
+            result = future.result()
+            # Remove placeholder and any previous canvas
+            self.viz_placeholder.grid_forget()
+            if self.canvas is not None:
+                self.canvas.get_tk_widget().destroy()
+            # Create canvas (layout coordinates mean the native viewer)
+            if isinstance(result, tuple):
+                coords, self._layout_key = result
+                self.canvas = create_network_canvas(
+                    self.viz_container,
+                    self.data["points_data"],
+                    self.data["ruas_data"],
+                    route_log=self.route_log,
+                    coords=coords,
+                )
+            else:
+                self._layout_key = result.scitech_layout_key
+                self.canvas = create_canvas(
+                    self.viz_container,
+                    self.data["points_data"],
+                    self.data["ruas_data"],
+                    route_log=self.route_log,
+                    fig=result,
+                )
+            # No draw(): the figure is already rasterized, <Configure> shows it
+            self.canvas.get_tk_widget().grid(row=0, column=0, sticky=tk.NSEW)
+        except Exception as e:
+            print(f"Error creating graph viz: {e}")
+            traceback.print_exc()
+
     def _update_nodes_tree_with_route(self):
-        """Update nodes tree to highlight visited nodes"""
+        """Update nodes table to highlight visited nodes"""
         try:
-            if not self.route_log:
+            if not self.route_log or len(self.nodes_tree) == 0:
                 return
 
             # Get visited patients
-            visited_patients = {step["to_patient"] for step in self.route_log}
-
-            # Update tree items to highlight visited nodes
-            for item in self.nodes_tree.get_children():
-                values = self.nodes_tree.item(item)["values"]
-                node_id = int(values[0])
-                node_type = values[1]
-
-                if node_type == "Patient" and f"P{node_id:03d}" in visited_patients:
-                    # Highlight visited patients (you can customize the highlighting)
-                    self.nodes_tree.set(item, "Type", "Patient ✓")
-                else:
-                    # Reset highlighting for non-visited
-                    if node_type == "Patient ✓":
-                        self.nodes_tree.set(item, "Type", "Patient")
+            visited_patients = [int(step["to_patient"]) for step in self.route_log]
+            node_types = self.nodes_tree.data["Type"]
+            is_patient = node_types != "Hospital"
+            visited = np.isin(self.nodes_tree.data["ID"], visited_patients)
+            self.nodes_tree.set_column(
+                "Type",
+                np.where(is_patient, np.where(visited, "Patient ✓", "Patient"), "Hospital"),
+            )
 
         except Exception as e:
             print(f"Error updating nodes tree with route: {e}")
-            
-
             traceback.print_exc()
 
     # ========================================================================
@@ -496,6 +698,23 @@ class SciTechApp(ttkthemes.ThemedTk):
         if folder:
             self.folder_entry.delete(0, tk.END)
             self.folder_entry.insert(0, folder)
+            self._start_speculative_load()
+
+    def _browse_store(self):
+        """Browse for a store database and list its scenarios"""
+        store = browse_store()
+        if store:
+            self.store_entry.delete(0, tk.END)
+            self.store_entry.insert(0, store)
+            self._refresh_store_scenarios()
+
+    def _refresh_store_scenarios(self):
+        """Fill the scenario choice with the scenarios of the selected store"""
+        store = self.store_entry.get().strip()
+        names = list_scenarios(store)["name"].tolist() if is_store(store) else []
+        self.store_scenario.configure(values=names)
+        if self.store_scenario.get() not in names:
+            self.store_scenario.set(names[0] if names else "")
 
     def _browse_file(self, entry_widget, title):
         """Browse for file and update entry widget"""
@@ -505,60 +724,409 @@ class SciTechApp(ttkthemes.ThemedTk):
             entry_widget.insert(0, file_path)
 
     def _load_data(self):
-        """Load data using the appropriate method"""
-        try:
-            if self.input_mode.get() == "folder":
-                folder_path = self.folder_entry.get().strip()
-                if not folder_path:
-                    messagebox.showerror("Error", "Please select a folder path")
-                    return
-                self.data = load_data_from_folder(folder_path)
-            else:
-                dados_file = self.dados_entry.get().strip()
-                pontos_file = self.pontos_entry.get().strip()
-                ruas_file = self.ruas_entry.get().strip()
-
-                if not all([dados_file, pontos_file, ruas_file]):
-                    messagebox.showerror("Error", "Please select all required files")
-                    return
-                self.data = load_data_from_files(dados_file, pontos_file, ruas_file)
-
-            if self.data:
-                self.status_label.configure(text="Status: Loaded", foreground="green")
-                # Create graph visualization
-                self._create_graph_viz()
-            else:
-                self.status_label.configure(
-                    text="Status: Load failed", foreground="red"
-                )
+        """Load data in the background loader thread"""
+        if self._load_future is not None:
+            return
+        if self.input_mode.get() == "folder":
+            folder_path = self.folder_entry.get().strip()
+            if not folder_path:
+                messagebox.showerror("Error", "Please select a folder path")
+                return
+            future = self._take_speculative(folder_path)
+            if future is None:
+                future = self.load_executor.submit(load_data_from_folder, folder_path)
+        elif self.input_mode.get() == "store":
+            store_path = self.store_entry.get().strip()
+            scenario = self.store_scenario.get()
+            if not is_store(store_path) or not scenario:
+                messagebox.showerror("Error", "Please select a store and a scenario")
+                return
+            future = self.load_executor.submit(load_data_from_store, store_path, scenario)
+        else:
+            dados_file = self.dados_entry.get().strip()
+            pontos_file = self.pontos_entry.get().strip()
+            ruas_file = self.ruas_entry.get().strip()
 
+            if not all([dados_file, pontos_file, ruas_file]):
+                messagebox.showerror("Error", "Please select all required files")
+                return
+            future = self.load_executor.submit(
+                load_data_from_files, dados_file, pontos_file, ruas_file
+            )
+
+        # The editor works on the loaded data: it does not survive a new load
+        self._close_what_if()
+        self._load_future = future
+        self._load_started = time.perf_counter()
+        self.load_button.configure(state=tk.DISABLED)
+        self.load_progress.grid()
+        self.load_progress.start(10)
+        self.status_label.configure(text="Status: Loading...", foreground="orange")
+        self.after(LOAD_POLL_MS, self._poll_load)
+
+    def _start_speculative_load(self):
+        """Start loading the chosen folder (and its distances) before Load is clicked"""
+        folder_path = self.folder_entry.get().strip()
+        if not folder_path or not os.path.isdir(folder_path):
+            return
+        signature = folder_signature(folder_path)
+        if self._speculative is not None:
+            path, old_signature, future = self._speculative
+            if path == folder_path and old_signature == signature:
+                return
+            future.cancel()
+        self._speculative = (
+            folder_path,
+            signature,
+            self.load_executor.submit(load_and_prepare_folder, folder_path),
+        )
+
+    def _take_speculative(self, folder_path: str) -> Optional[Future]:
+        """The speculative load of folder_path, if its files have not changed since"""
+        if self._speculative is None:
+            return None
+        path, signature, future = self._speculative
+        self._speculative = None
+        if path != folder_path or signature != folder_signature(path):
+            future.cancel()
+            return None
+        return future
+
+    def _poll_load(self):
+        """Show loading progress and publish the data once it is ready"""
+        future = self._load_future
+        elapsed = time.perf_counter() - self._load_started
+        if not future.done():
+            self.status_label.configure(
+                text=f"Status: Loading... ({elapsed:.1f}s)", foreground="orange"
+            )
+            self.after(LOAD_POLL_MS, self._poll_load)
+            return
+
+        self._load_future = None
+        self.load_progress.stop()
+        self.load_progress.grid_remove()
+        self.load_button.configure(state=tk.NORMAL)
+        try:
+            data = future.result()
         except Exception as e:
             messagebox.showerror("Error", f"Failed to load data: {str(e)}")
             self.status_label.configure(text="Status: Load failed", foreground="red")
+            return
+        if not data:
+            self.status_label.configure(text="Status: Load failed", foreground="red")
+            return
+
+        self.data = data
+        self.route_log = None
+        self._clear_results()
+        self.status_label.configure(
+            text=f"Status: Loaded ({elapsed:.1f}s)", foreground="green"
+        )
+        if "routing_matrices" not in data:
+            # Distances are precomputed in the background; Run waits for them
+            self._precompute_future = self.load_executor.submit(prepare_data, data)
+        # Create graph visualization
+        self._create_graph_viz()
+        self._toggle_watch()
+
+    def _precompute_running(self) -> bool:
+        return self._precompute_future is not None and not self._precompute_future.done()
+
+    def _toggle_watch(self):
+        """Start or stop polling the loaded folder for changes"""
+        if self._watch_job is not None:
+            self.after_cancel(self._watch_job)
+            self._watch_job = None
+        self.watcher = None
+
+        folder_path = self.folder_entry.get().strip()
+        if (
+            self.watch_enabled.get()
+            and self.data
+            and self.input_mode.get() == "folder"
+            and os.path.isdir(folder_path)
+        ):
+            self.watcher = FolderWatcher(folder_path, self.data)
+            self._watch_job = self.after(WATCH_INTERVAL_MS, self._poll_watch)
+
+    def _poll_watch(self):
+        """Apply folder changes to the loaded data and refresh the views"""
+        self._watch_job = None
+        if self.watcher is None:
+            return
+        if self.solver_thread is not None or self._precompute_running():
+            # The graph is patched in place: never under a running solver
+            self._watch_job = self.after(WATCH_INTERVAL_MS, self._poll_watch)
+            return
+        try:
+            summary = self.watcher.poll()
+            if summary is not None:
+                if summary["full_reload"]:
+                    self._close_what_if()
+                self.data = self.watcher.data
+                stamp = datetime.now().strftime("%H:%M:%S")
+                self.status_label.configure(
+                    text=f"Status: Updated {stamp} ({describe_changes(summary)})",
+                    foreground="green",
+                )
+                # Results no longer match the data
+                self.route_log = None
+                self._clear_results()
+                self.run_status_label.configure(
+                    text="Status: Data changed", foreground="orange"
+                )
+                self._create_graph_viz(edited=not summary["full_reload"])
+        except Exception as e:
+            print(f"Error polling watched folder: {e}")
+            traceback.print_exc()
+        self._watch_job = self.after(WATCH_INTERVAL_MS, self._poll_watch)
 
     def _run_algorithm(self):
-        """Run the algorithm"""
+        """Run the algorithm in a worker thread"""
         try:
             if not self.data:
                 messagebox.showerror("Error", "Please load data first")
                 return
+            if self.solver_thread is not None:
+                return
 
             self.run_status_label.configure(text="Status: Running", foreground="orange")
             self._clear_results()
-            self.update()  # Update UI
-
-            self.route_log = run_algorithm(self.data)
-
-            self.run_status_label.configure(text="Status: Finished", foreground="green")
-            self._display_results()
-            # Update nodes tree to highlight visited nodes (without updating graph)
-            self._update_nodes_tree_with_route()
+            self.route_log = None
+
+            self.solver_cancel = CancellationToken()
+            self.solver_queue = queue.Queue()
+            self.solver_thread = threading.Thread(
+                target=self._solver_worker,
+                args=(
+                    self.data,
+                    self.solver_cancel,
+                    self.solver_queue,
+                    self._precompute_future,
+                ),
+                daemon=True,
+            )
+            self._solver_started = time.perf_counter()
+            self._solver_progress = None
+            self.run_button.configure(state=tk.DISABLED)
+            self.cancel_button.configure(state=tk.NORMAL)
+            self._solver_label = "Running"
+            self.solver_thread.start()
+            self.after(SOLVER_POLL_MS, self._poll_solver)
 
         except Exception as e:
             self.run_status_label.configure(text="Status: Error", foreground="red")
             messagebox.showerror("Error", f"Algorithm failed: {str(e)}")
             self._clear_results()
 
+    @staticmethod
+    def _solver_worker(data, cancel, messages, precompute=None):
+        """Worker thread body: only talks to the UI through the queue"""
+        try:
+            # Hashing the frames is not free: fingerprint once per run
+            key = instance_fingerprint(data)
+            if precompute is not None and ROUTE_CACHE.get(key) is None:
+                # Reuse the background precomputation instead of starting over
+                try:
+                    precompute.result()
+                except Exception:
+                    traceback.print_exc()
+            route_log = run_algorithm(
+                data,
+                progress=lambda info: messages.put(("progress", info)),
+                cancel=cancel,
+                key=key,
+            )
+            messages.put(("done", route_log))
+        except Exception as e:
+            traceback.print_exc()
+            messages.put(("error", str(e)))
+
+    def _cancel_algorithm(self):
+        """Ask the running solver to stop and keep its best result so far"""
+        if self.solver_cancel is not None:
+            self.solver_cancel.cancel()
+            self.cancel_button.configure(state=tk.DISABLED)
+            self.run_status_label.configure(
+                text="Status: Cancelling...", foreground="orange"
+            )
+
+    def _poll_solver(self):
+        """Drain solver messages and update the run status"""
+        finished = None
+        while True:
+            try:
+                kind, payload = self.solver_queue.get_nowait()
+            except queue.Empty:
+                break
+            if kind == "progress":
+                self._solver_progress = payload
+            else:
+                finished = (kind, payload)
+
+        elapsed = time.perf_counter() - self._solver_started
+        if finished is None:
+            if not self.solver_cancel.cancelled:
+                text = f"Status: {self._solver_label} ({elapsed:.1f}s)"
+                if self._solver_progress:
+                    text = (
+                        f"Status: {self._solver_label} - {self._solver_progress['steps']} steps, "
+                        f"priority {self._solver_progress['best_priority']} ({elapsed:.1f}s)"
+                    )
+                self.run_status_label.configure(text=text, foreground="orange")
+            self.after(SOLVER_POLL_MS, self._poll_solver)
+            return
+
+        cancelled = self.solver_cancel.cancelled
+        self.solver_thread = None
+        self.solver_cancel = None
+        self.run_button.configure(state=tk.NORMAL)
+        self.cancel_button.configure(state=tk.DISABLED)
+
+        kind, payload = finished
+        if kind in ("what_if", "what_if_error"):
+            self._finish_what_if(kind, payload)
+            return
+        if kind == "error":
+            self.run_status_label.configure(text="Status: Error", foreground="red")
+            messagebox.showerror("Error", f"Algorithm failed: {payload}")
+            self._clear_results()
+            return
+
+        self.route_log = payload
+        if cancelled:
+            self.run_status_label.configure(
+                text=f"Status: Cancelled, best so far kept ({elapsed:.1f}s)",
+                foreground="orange",
+            )
+        else:
+            self.run_status_label.configure(
+                text=f"Status: Finished ({elapsed:.1f}s)", foreground="green"
+            )
+        self._display_results()
+        # Highlight visited nodes in the tree and the route on the graph overlay
+        self._update_nodes_tree_with_route()
+        self._show_route_on_graph()
+
+    def _open_batch(self):
+        """Open the batch comparison window"""
+        if self.input_mode.get() == "store":
+            initial_dir = self.store_entry.get().strip() or None
+        else:
+            folder_path = self.folder_entry.get().strip()
+            initial_dir = os.path.dirname(folder_path) if folder_path else None
+        BatchWindow(self, initial_dir)
+
+    def _busy_reason(self) -> Optional[str]:
+        """Why the loaded data cannot be changed right now, or None"""
+        if self._load_future is not None:
+            return "Loading data..."
+        if self.solver_thread is not None:
+            return "Solver running"
+        if self._precompute_running():
+            return "Preparing distances..."
+        return None
+
+    def _open_what_if(self):
+        """Open the what-if editor on the loaded data"""
+        if not self.data:
+            messagebox.showerror("Error", "Please load data first")
+            return
+        if self.what_if_window is not None and self.what_if_window.winfo_exists():
+            self.what_if_window.lift()
+            return
+        self.what_if_window = WhatIfWindow(self, self._submit_what_if)
+
+    def _close_what_if(self):
+        if self.what_if_window is not None and self.what_if_window.winfo_exists():
+            self.what_if_window.destroy()
+        self.what_if_window = None
+
+    def _submit_what_if(self, edit, graph_changed):
+        """
+        Apply a what-if edit and re-solve on the solver thread. Edits are
+        refused while anything else reads or replaces the data.
+        """
+        refused = self._busy_reason()
+        if refused is not None:
+            return refused
+        if not self.data:
+            return "No data loaded"
+        self.solver_cancel = CancellationToken()
+        self.solver_queue = queue.Queue()
+        self.solver_thread = threading.Thread(
+            target=self._what_if_worker,
+            args=(self.data, self.route_log, edit, graph_changed, self.solver_queue),
+            daemon=True,
+        )
+        self._solver_started = time.perf_counter()
+        self._solver_progress = None
+        self._solver_label = "Re-solving what-if"
+        self.run_button.configure(state=tk.DISABLED)
+        self.solver_thread.start()
+        self.after(SOLVER_POLL_MS, self._poll_solver)
+        return None
+
+    @staticmethod
+    def _what_if_worker(data, route_log, edit, graph_changed, messages):
+        """Worker thread body of a what-if edit (the first one also precomputes the distances)"""
+        try:
+            edit(data)
+            route_log = warm_start_resolve(data, route_log)
+            messages.put(("what_if", (data, route_log, graph_changed)))
+        except ValueError as e:
+            messages.put(("what_if_error", str(e)))
+        except Exception as e:
+            traceback.print_exc()
+            messages.put(("what_if_error", str(e)))
+
+    def _finish_what_if(self, kind, payload):
+        """Show the outcome of a what-if job finished by the solver thread"""
+        elapsed = time.perf_counter() - self._solver_started
+        window = self.what_if_window
+        if window is not None and not window.winfo_exists():
+            window = None
+        if kind == "what_if_error":
+            self.run_status_label.configure(text="Status: What-if failed", foreground="red")
+            if window is not None:
+                window.show_status(payload, "red")
+            return
+        data, route_log, graph_changed = payload
+        if data is not self.data:
+            # Data replaced in the meantime: the route belongs to the old one
+            return
+        if window is not None:
+            window.show_status(f"Re-solved in {elapsed:.3f}s", "green")
+        self._on_what_if_result(route_log, graph_changed)
+
+    def _on_what_if_result(self, route_log, graph_changed):
+        """Show a warm-started re-solve from the what-if editor"""
+        self.route_log = route_log
+        self._clear_results()
+        self.run_status_label.configure(text="Status: What-if result", foreground="green")
+        self._display_results()
+        if graph_changed:
+            # Street times are drawn on the edges: redraw the base network
+            self._create_graph_viz(edited=True)
+        else:
+            self._populate_nodes_tree()
+            self._show_route_on_graph()
+        self._update_nodes_tree_with_route()
+
+    def _show_route_on_graph(self):
+        """Update the route overlay without redrawing the base network"""
+        if self.canvas is not None:
+            self.canvas.route_overlay.set_route(self.route_log)
+
+    def _play_route(self):
+        """Step-by-step playback of the current route on the graph"""
+        if not self.route_log or self.canvas is None:
+            messagebox.showerror("Error", "Please run the algorithm first")
+            return
+        self.canvas.route_overlay.set_route(self.route_log)
+        self.canvas.route_overlay.play()
+
     def _clear_results(self):
         """Clear all results displays"""
         # Clear summary cards
@@ -567,8 +1135,11 @@ class SciTechApp(ttkthemes.ThemedTk):
         self.time_value.configure(text="0.0")
 
         # Clear results table
-        for item in self.results_tree.get_children():
-            self.results_tree.delete(item)
+        self.results_tree.clear()
+
+        # Clear route overlay
+        if self.canvas is not None:
+            self.canvas.route_overlay.set_route(None)
 
     def _display_results(self):
         """Display algorithm results in structured format"""
@@ -584,37 +1155,19 @@ class SciTechApp(ttkthemes.ThemedTk):
         self.priority_value.configure(text=str(total_priority))
         self.time_value.configure(text=f"{total_time:.1f}")
 
-        # Populate results table
-        accumulated_priority = 0
-        for i, step in enumerate(self.route_log, 1):
-            accumulated_priority += step["priority"]
-
-            # Add row to treeview
-            self.results_tree.insert(
-                "",
-                "end",
-                values=(
-                    i,
-                    step["to_patient"],
-                    step["priority"],
-                    f"{step['time_needed']:.1f}",
-                    accumulated_priority,
+        # Populate results table (one bulk update of the table model)
+        priorities = np.array([step["priority"] for step in self.route_log])
+        self.results_tree.set_data(
+            {
+                "Step": np.arange(1, total_patients + 1),
+                "Patient": np.array([step["to_patient"] for step in self.route_log]),
+                "Priority": priorities,
+                "Time": np.array(
+                    [step["time_needed"] for step in self.route_log], dtype=float
                 ),
-            )
-
-        # Color code rows based on priority
-        for item in self.results_tree.get_children():
-            values = self.results_tree.item(item)["values"]
-            priority = int(values[2])
-
-            if priority >= 80:
-                self.results_tree.set(item, "Priority", f"{priority}")  # High priority
-            elif priority >= 60:
-                self.results_tree.set(
-                    item, "Priority", f"{priority}"
-                )  # Medium priority
-            else:
-                self.results_tree.set(item, "Priority", f"{priority}")  # Low priority
+                "Acc. Priority": np.cumsum(priorities),
+            }
+        )
 
     def _export_pdf(self):
         """Export current state to PDF"""
@@ -647,6 +1200,38 @@ class SciTechApp(ttkthemes.ThemedTk):
         except Exception as e:
             messagebox.showerror("Error", f"Export failed: {str(e)}")
 
+    def _export_data(self):
+        """Export the route to JSON Lines, CSV or Parquet"""
+        try:
+            if not self.route_log:
+                messagebox.showerror("Error", "Please run the algorithm first")
+                return
+
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            file_path = filedialog.asksaveasfilename(
+                title="Save Route Data As",
+                defaultextension=".jsonl",
+                filetypes=[
+                    ("JSON Lines", "*.jsonl"),
+                    ("CSV files", "*.csv"),
+                    ("Parquet files", "*.parquet"),
+                ],
+                initialfile=f"ambulance_routing_{timestamp}.jsonl",
+            )
+            if not file_path:  # User cancelled the dialog
+                return
+
+            scenario = {
+                "folder": self.folder_entry.get().strip(),
+                "store": self.store_scenario.get(),
+            }.get(self.input_mode.get(), "")
+            if export_route_log(self.route_log, file_path, self.data, scenario=scenario):
+                messagebox.showinfo("Success", f"Route data exported to:\n{file_path}")
+            else:
+                messagebox.showerror("Error", "Failed to export route data")
+        except Exception as e:
+            messagebox.showerror("Error", f"Export failed: {str(e)}")
+
 
 if __name__ == "__main__":
     app = SciTechApp()
@@ -1,32 +1,323 @@
 # ambulance_routing.py
+import threading
+import time
+import numpy as np
 import pandas as pd
 import igraph  # type: ignore
-from typing import Dict, Any, List, Tuple, Optional
+from typing import Dict, Any, List, Mapping, Tuple, Optional, Union, Callable
 from .Data_Import import pd_to_igraph, add_points_data_to_graph  # type: ignore  # Usa o teu código original
+from . import kernels  # type: ignore
+from .csr_graph import CSRGraph, LazyDistances, LazyPaths, shortest_path_matrices, reconstruct_path  # type: ignore
+
+CANDIDATE_LIST_SIZE = 16  # Pacientes guardados por (terminal, classe de prioridade)
+
+
+class CancellationToken:
+    """
+    Sinal de cancelamento partilhado entre quem pede a solução (ex.: a UI) e o solver.
+    """
+
+    def __init__(self) -> None:
+        self._event = threading.Event()
+
+    def cancel(self) -> None:
+        self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+
+def _is_cancelled(cancel: Optional[CancellationToken]) -> bool:
+    return cancel is not None and cancel.cancelled
 
 
 def precompute_all_pairs_shortest_paths(
-    graph: igraph.Graph,
-) -> Tuple[Dict[Tuple[int, int], float], Dict[Tuple[int, int], List[int]]]:
+    graph: Union[igraph.Graph, CSRGraph],
+    cancel: Optional[CancellationToken] = None,
+) -> Tuple[
+    Mapping[Tuple[int, int], float], Mapping[Tuple[int, int], List[int]], Optional[np.ndarray]
+]:
     """
     Pré-calcula distâncias e caminhos mais curtos entre todos os pares de nós.
+    Aceita um igraph.Graph ou um CSRGraph (kernel NumPy/scipy).
+    As distâncias são uma vista (LazyDistances) sobre a matriz, sem criar um
+    dicionário de V² pares; os caminhos só guardam a matriz de predecessores e
+    são reconstruídos a pedido (LazyPaths, com cache LRU).
+    Devolve também a matriz densa de distâncias (V x V), já calculada pelo
+    caminho, ou None se cancel disparou a meio (resultados incompletos: as
+    origens por calcular ficam a inf).
     """
-    distances: Dict[Tuple[int, int], float] = {}
-    paths: Dict[Tuple[int, int], List[int]] = {}
+    if isinstance(graph, CSRGraph):
+        dist_matrix, pred_matrix = shortest_path_matrices(graph)
+        return LazyDistances(dist_matrix), LazyPaths(pred_matrix), dist_matrix
 
-    for v in range(len(graph.vs)):
-        spaths = graph.get_shortest_paths(v, to=None, weights="weight", output="vpath")
-        for u, path in enumerate(spaths):
-            if path:
-                dist = sum(
-                    graph.es[graph.get_eid(path[i], path[i + 1])]["weight"]
-                    for i in range(len(path) - 1)
-                )
-            else:
-                dist = float("inf")
-            distances[(v, u)] = dist
-            paths[(v, u)] = path
-    return distances, paths
+    n = len(graph.vs)
+    pred = np.full((n, n), -1, dtype=np.int32)
+    dist_matrix = np.full((n, n), np.inf)
+    weights = np.asarray(graph.es["weight"] if graph.ecount() else [], dtype=float)
+    ends = np.asarray(graph.get_edgelist(), dtype=np.int64).reshape(-1, 2)
+    targets = np.arange(n)
+    for v in range(n):
+        if _is_cancelled(cancel):
+            return LazyDistances(dist_matrix), LazyPaths(pred), None
+        # Um só Dijkstra por origem: os caminhos em arestas formam uma árvore e
+        # dão o predecessor (e a rua usada entre ruas paralelas) de cada nó
+        epaths = graph.get_shortest_paths(v, to=None, weights="weight", output="epath")
+        lengths = np.fromiter(map(len, epaths), np.int64, n)
+        last = np.fromiter((path[-1] if path else -1 for path in epaths), np.int64, n)
+        reached = lengths > 0
+        last_ends = ends[last[reached]]
+        pred[v, reached] = np.where(
+            last_ends[:, 1] == targets[reached], last_ends[:, 0], last_ends[:, 1]
+        )
+        # Distâncias ao longo da árvore, nível a nível: a soma segue a ordem do
+        # caminho, como no Dijkstra
+        row = dist_matrix[v]
+        row[v] = 0.0
+        for level in range(1, int(lengths.max(initial=0)) + 1):
+            at_level = np.flatnonzero(lengths == level)
+            row[at_level] = row[pred[v, at_level]] + weights[last[at_level]]
+    return LazyDistances(dist_matrix), LazyPaths(pred), dist_matrix
+
+
+def precompute_routing_matrices(
+    graph: Union[igraph.Graph, CSRGraph], points_data: pd.DataFrame
+) -> Dict[str, Any]:
+    """
+    Versão matricial do pré-cálculo: matrizes de distâncias e predecessores
+    (V x V) mais os arrays dos pacientes, usada pela edição what-if e pelos
+    solvers vetorizados.
+    """
+    csr = graph if isinstance(graph, CSRGraph) else CSRGraph.from_igraph(graph)
+    dist, pred = shortest_path_matrices(csr)
+    matrices: Dict[str, Any] = {"csr": csr, "dist": dist, "pred": pred}
+    set_patient_arrays(matrices, points_data)
+    return matrices
+
+
+def set_patient_arrays(matrices: Dict[str, Any], points_data: pd.DataFrame) -> None:
+    """
+    (Re)preenche os arrays dos pacientes e hospitais, pela ordem das linhas de
+    points_data, e o hospital mais próximo de cada paciente.
+    """
+    tipo = points_data["tipo"].str.lower()
+    patients = points_data[tipo == "paciente"]
+    matrices["hospital_ids"] = points_data.loc[tipo == "hospital", "id"].to_numpy(np.int64)
+    matrices["patient_ids"] = patients["id"].to_numpy(np.int64)
+    matrices["priorities"] = patients["prioridade"].to_numpy()
+    matrices["care_times"] = patients["tempo_cuidados_minimos"].to_numpy(np.float64)
+    refresh_nearest_hospitals(matrices)
+
+
+def refresh_nearest_hospitals(matrices: Dict[str, Any]) -> None:
+    """Hospital mais próximo (o primeiro, em caso de empate) de cada paciente"""
+    dist = matrices["dist"]
+    patient_ids = matrices["patient_ids"]
+    hospital_ids = matrices["hospital_ids"]
+    n_patients = len(patient_ids)
+    valid = patient_ids < len(dist)
+
+    nearest = np.full(n_patients, -1, dtype=np.int64)
+    hospital_dist = np.full(n_patients, np.inf)
+    if len(hospital_ids) and valid.any():
+        block = dist[np.ix_(patient_ids[valid], hospital_ids)]
+        best = np.argmin(block, axis=1)
+        nearest[valid] = hospital_ids[best]
+        hospital_dist[valid] = block[np.arange(len(best)), best]
+    matrices["nearest_hospital"] = nearest
+    matrices["hospital_dist"] = hospital_dist
+
+
+def _patient_need(matrices: Dict[str, Any], current_node: int) -> np.ndarray:
+    """Tempo total (ida + cuidados + hospital) de cada paciente a partir de current_node"""
+    dist = matrices["dist"]
+    patient_ids = matrices["patient_ids"]
+    to_patient = np.full(len(patient_ids), np.inf)
+    if 0 <= current_node < len(dist):
+        valid = patient_ids < len(dist)
+        to_patient[valid] = dist[current_node, patient_ids[valid]]
+    return to_patient + matrices["care_times"] + matrices["hospital_dist"]
+
+
+class PatientCandidates:
+    """
+    Listas de candidatos do critério guloso. A partir de um terminal (ponto
+    inicial ou hospital) o tempo total de cada paciente é fixo, por isso, em
+    cada classe de prioridade, só o paciente disponível de menor tempo (o
+    primeiro índice, em caso de empate) pode ser escolhido: os restantes são
+    dominados. Cada par (terminal, classe) guarda os size pacientes mais
+    próximos (argpartition), ordenados por (tempo, índice); quando a lista se
+    esgota é refeita com os pacientes ainda disponíveis.
+    select devolve sempre o mesmo paciente que a pesquisa completa.
+    """
+
+    def __init__(
+        self,
+        matrices: Dict[str, Any],
+        available: Optional[np.ndarray] = None,
+        size: int = CANDIDATE_LIST_SIZE,
+    ) -> None:
+        self.matrices = matrices
+        self.size = size
+        priorities = matrices["priorities"]
+        n_patients = len(priorities)
+        self.available = (
+            np.ones(n_patients, dtype=bool) if available is None else available.copy()
+        )
+        # Classes por prioridade decrescente, cada uma com os seus índices
+        classes = np.unique(priorities[~pd.isna(priorities)])[::-1]
+        self.classes = [np.flatnonzero(priorities == p) for p in classes]
+        # terminal -> por classe, [índices, tempos, posição, lista completa]
+        self._lists: Dict[int, List[List[Any]]] = {}
+
+    def _fill(self, need: np.ndarray, members: np.ndarray) -> List[Any]:
+        """Os size melhores (tempo, índice) dos membros disponíveis e alcançáveis"""
+        members = members[self.available[members] & np.isfinite(need[members])]
+        values = need[members]
+        if len(members) > self.size:
+            # Nos empates com o último ficam os de menor índice
+            cut = values[np.argpartition(values, self.size - 1)[: self.size]].max()
+            below = np.flatnonzero(values < cut)
+            ties = np.flatnonzero(values == cut)[: self.size - len(below)]
+            chosen = np.concatenate([below, ties])
+            members, values = members[chosen], values[chosen]
+            complete = False
+        else:
+            complete = True
+        order = np.lexsort((members, values))
+        return [members[order], values[order], 0, complete]
+
+    def _terminal(self, current_node: int) -> List[List[Any]]:
+        lists = self._lists.get(current_node)
+        if lists is None:
+            need = _patient_need(self.matrices, current_node)
+            lists = [self._fill(need, members) for members in self.classes]
+            self._lists[current_node] = lists
+        return lists
+
+    def select(self, current_node: int, time_left: float) -> Optional[int]:
+        """Índice do próximo paciente (ou None), como greedy_order_matrices"""
+        lists = self._terminal(int(current_node))
+        for c, entry in enumerate(lists):
+            items, values, position, complete = entry
+            while position < len(items) and not self.available[items[position]]:
+                position += 1
+            if position == len(items) and not complete:
+                need = _patient_need(self.matrices, int(current_node))
+                entry[:] = self._fill(need, self.classes[c])
+                items, values, position, complete = entry
+            entry[2] = position
+            if position < len(items) and values[position] <= time_left:
+                return int(items[position])
+        return None
+
+    def need(self, current_node: int, k: int) -> float:
+        """Tempo total do paciente k a partir de current_node"""
+        dist = self.matrices["dist"]
+        patient_id = self.matrices["patient_ids"][k]
+        to_patient = (
+            dist[current_node, patient_id]
+            if 0 <= current_node < len(dist) and patient_id < len(dist)
+            else np.inf
+        )
+        return float(
+            to_patient + self.matrices["care_times"][k] + self.matrices["hospital_dist"][k]
+        )
+
+    def remove(self, k: int) -> None:
+        self.available[k] = False
+
+    def remove_id(self, patient_id: int) -> None:
+        """Retira todos os pacientes com este id"""
+        self.available[self.matrices["patient_ids"] == patient_id] = False
+
+
+def greedy_order_matrices(
+    matrices: Dict[str, Any],
+    current_node: int,
+    time_left: float,
+    visited: Optional[np.ndarray] = None,
+    progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+    cancel: Optional[CancellationToken] = None,
+) -> List[int]:
+    """
+    Mesmo critério guloso de select_next_patient_optimized (prioridade
+    decrescente, depois menor tempo) sobre as matrizes. Devolve os índices dos
+    pacientes (nos arrays de matrices) pela ordem de visita.
+    progress e cancel funcionam como em ambulance_routing_optimized; sem eles,
+    usa o kernel compilado (Numba) quando disponível.
+    """
+    start_time = time.perf_counter()
+    total_time = time_left
+    priorities = matrices["priorities"]
+    available = np.ones(len(priorities), dtype=bool)
+    if visited is not None:
+        available &= ~visited
+    if kernels.USE_NUMBA and progress is None and cancel is None:
+        return kernels.greedy_order(
+            matrices["dist"],
+            matrices["patient_ids"],
+            matrices["care_times"],
+            matrices["hospital_dist"],
+            priorities.astype(np.float64),
+            matrices["nearest_hospital"],
+            int(current_node),
+            float(time_left),
+            available,
+        ).tolist()
+    order: List[int] = []
+    accumulated_priority = 0
+
+    candidates = PatientCandidates(matrices, available)
+
+    while time_left > 0:
+        if _is_cancelled(cancel):
+            break
+        k = candidates.select(current_node, time_left)
+        if k is None:
+            break
+
+        order.append(k)
+        time_left -= candidates.need(current_node, k)
+        current_node = int(matrices["nearest_hospital"][k])
+        candidates.remove(k)
+
+        if progress is not None:
+            accumulated_priority += priorities[k]
+            progress(
+                {
+                    "steps": len(order),
+                    "best_priority": accumulated_priority,
+                    "time_used": total_time - time_left,
+                    "elapsed": time.perf_counter() - start_time,
+                }
+            )
+    return order
+
+
+def route_log_from_order(
+    matrices: Dict[str, Any], initial_point: int, order: List[int]
+) -> List[Dict[str, Any]]:
+    """Constrói o route_log (mesmo formato de ambulance_routing_optimized) de uma ordem de visita"""
+    pred = matrices["pred"]
+    route_log: List[Dict[str, Any]] = []
+    current_node = int(initial_point)
+    for k in order:
+        patient_id = int(matrices["patient_ids"][k])
+        hospital_id = int(matrices["nearest_hospital"][k])
+        route_log.append(
+            {
+                "from": current_node,
+                "to_patient": patient_id,
+                "path_to_patient": reconstruct_path(pred[current_node], current_node, patient_id),
+                "path_to_hospital": reconstruct_path(pred[patient_id], patient_id, hospital_id),
+                "time_needed": float(_patient_need(matrices, current_node)[k]),
+                "priority": matrices["priorities"][k],
+            }
+        )
+        current_node = hospital_id
+    return route_log
 
 
 def select_next_patient_optimized(
@@ -34,12 +325,29 @@ def select_next_patient_optimized(
     patients: pd.DataFrame,
     time_left: float,
     hospitals: List[int],
-    distances: Dict[Tuple[int, int], float],
-    paths: Dict[Tuple[int, int], List[int]],
+    distances: Mapping[Tuple[int, int], float],
+    paths: Mapping[Tuple[int, int], List[int]],
+    candidate_lists: Optional[PatientCandidates] = None,
 ) -> Optional[Tuple[int, List[int], List[int], float]]:
     """
     Seleciona o próximo paciente a socorrer usando a matriz pré-calculada.
+    Só os caminhos do paciente escolhido são pedidos a paths.
+    Com candidate_lists (cujos disponíveis devem corresponder a patients) só
+    avalia as listas de candidatos, com o mesmo resultado.
     """
+    if candidate_lists is not None:
+        k = candidate_lists.select(current_node, time_left)
+        if k is None:
+            return None
+        patient_id = int(candidate_lists.matrices["patient_ids"][k])
+        hospital_id = int(candidate_lists.matrices["nearest_hospital"][k])
+        return (
+            patient_id,
+            paths[(current_node, patient_id)],
+            paths.get((patient_id, hospital_id), []),
+            candidate_lists.need(current_node, k),
+        )
+
     candidates = []
 
     for _, patient in patients.iterrows():
@@ -51,45 +359,51 @@ def select_next_patient_optimized(
 
         # Hospital mais próximo
         min_return_dist = float("inf")
-        best_path_to_hospital = []
+        best_hospital = None
         for hospital_id in hospitals:
             dist_back = distances.get((patient_id, hospital_id), float("inf"))
             if dist_back < min_return_dist:
                 min_return_dist = dist_back
-                best_path_to_hospital = paths.get((patient_id, hospital_id), [])
+                best_hospital = hospital_id
 
         total_time_needed = (
             dist_to_patient + patient["tempo_cuidados_minimos"] + min_return_dist
         )
         if total_time_needed <= time_left:
             candidates.append(
-                (
-                    patient_id,
-                    paths[(current_node, patient_id)],
-                    best_path_to_hospital,
-                    total_time_needed,
-                    patient["prioridade"],
-                )
+                (patient_id, best_hospital, total_time_needed, patient["prioridade"])
             )
 
     if not candidates:
         return None
 
     # Prioridade decrescente e menor tempo total
-    candidates.sort(key=lambda x: (-x[4], x[3]))
-    selected = candidates[0]
-    return selected[0], selected[1], selected[2], selected[3]
+    candidates.sort(key=lambda x: (-x[3], x[2]))
+    patient_id, hospital_id, total_time_needed, _ = candidates[0]
+    return (
+        patient_id,
+        paths[(current_node, patient_id)],
+        paths.get((patient_id, hospital_id), []),
+        total_time_needed,
+    )
 
 
 def ambulance_routing_optimized(
-    graph: igraph.Graph,
+    graph: Union[igraph.Graph, CSRGraph],
     points_data: pd.DataFrame,
     initial_point: int,
     total_time: float,
+    progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+    cancel: Optional[CancellationToken] = None,
+    on_step: Optional[Callable[[Dict[str, Any]], None]] = None,
 ) -> List[Dict[str, Any]]:
     """
     Simula a operação da ambulância, retornando uma lista de trajetos realizados.
+    progress recebe {"steps", "best_priority", "time_used", "elapsed"} após cada passo;
+    se cancel disparar, devolve os trajetos já decididos (sempre viáveis).
+    on_step recebe cada trajeto assim que é decidido (ex.: exportação em streaming).
     """
+    start_time = time.perf_counter()
     hospitals = points_data[points_data["tipo"].str.lower() == "hospital"][
         "id"
     ].tolist()
@@ -98,11 +412,21 @@ def ambulance_routing_optimized(
     time_left = total_time
     route_log: List[Dict[str, Any]] = []
 
-    distances, paths = precompute_all_pairs_shortest_paths(graph)
+    distances, paths, dist_matrix = precompute_all_pairs_shortest_paths(graph, cancel)
+    accumulated_priority = 0
+
+    # Listas de candidatos sobre a matriz densa (só sem cancelamento a meio)
+    candidate_lists = None
+    if dist_matrix is not None:
+        matrices: Dict[str, Any] = {"dist": dist_matrix}
+        set_patient_arrays(matrices, points_data)
+        candidate_lists = PatientCandidates(matrices)
 
     while time_left > 0 and not patients.empty:
+        if _is_cancelled(cancel):
+            break
         next_task = select_next_patient_optimized(
-            current_node, patients, time_left, hospitals, distances, paths
+            current_node, patients, time_left, hospitals, distances, paths, candidate_lists
         )
         if not next_task:
             break
@@ -122,24 +446,265 @@ def ambulance_routing_optimized(
             }
         )
 
+        if on_step is not None:
+            on_step(route_log[-1])
+
         # Atualiza estado
         time_left -= total_time_needed
         current_node = path_to_hospital[-1]
         patients = patients[patients["id"] != patient_id]
+        if candidate_lists is not None:
+            candidate_lists.remove_id(patient_id)
+
+        if progress is not None:
+            accumulated_priority += route_log[-1]["priority"]
+            progress(
+                {
+                    "steps": len(route_log),
+                    "best_priority": accumulated_priority,
+                    "time_used": total_time - time_left,
+                    "elapsed": time.perf_counter() - start_time,
+                }
+            )
 
     return route_log
 
 
-def run_from_csv_optimized(input_folder: str) -> List[Dict[str, Any]]:
+def _transition_costs(
+    matrices: Dict[str, Any], initial_point: int
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Custos de uma ordem de visita decompostos por transição:
+    start[b] = ida do ponto inicial ao paciente b,
+    trans[a, b] = ida do hospital de a ao paciente b,
+    base[b] = cuidados de b + ida de b ao seu hospital.
+    """
+    dist = matrices["dist"]
+    patient_ids = matrices["patient_ids"]
+    nearest = matrices["nearest_hospital"]
+    n = len(dist)
+    valid = patient_ids < n
+    start = np.full(len(patient_ids), np.inf)
+    trans = np.full((len(patient_ids), len(patient_ids)), np.inf)
+    if 0 <= initial_point < n:
+        start[valid] = dist[initial_point, patient_ids[valid]]
+    rows = np.flatnonzero(valid & (nearest >= 0))
+    trans[np.ix_(rows, np.flatnonzero(valid))] = dist[
+        np.ix_(nearest[rows], patient_ids[valid])
+    ]
+    base = matrices["care_times"] + matrices["hospital_dist"]
+    return start, trans, base
+
+
+class _AnytimeSearch:
+    """
+    Pesquisa local iterada sobre ordens de visita (listas de índices de
+    pacientes): inserções, realocações e ruin & recreate, sempre viáveis.
+    """
+
+    def __init__(
+        self,
+        costs: Tuple[np.ndarray, np.ndarray, np.ndarray],
+        priorities: np.ndarray,
+        total_time: float,
+        deadline: float,
+        cancel: Optional[CancellationToken],
+        seed: int,
+    ) -> None:
+        self.start, self.trans, self.base = costs
+        self.priorities = np.asarray(priorities, dtype=np.float64)
+        self.total_time = total_time
+        self.deadline = deadline
+        self.cancel = cancel
+        self.rng = np.random.default_rng(seed)
+
+    def stopped(self) -> bool:
+        return time.perf_counter() >= self.deadline or _is_cancelled(self.cancel)
+
+    def cost(self, order: List[int]) -> float:
+        if not order:
+            return 0.0
+        if kernels.USE_NUMBA:
+            return kernels.route_cost(
+                self.start, self.trans, self.base, np.asarray(order, dtype=np.int64)
+            )
+        idx = np.asarray(order)
+        return float(
+            self.start[idx[0]] + self.trans[idx[:-1], idx[1:]].sum() + self.base[idx].sum()
+        )
+
+    def score(self, order: List[int]) -> Tuple[float, float]:
+        """(prioridade total, -tempo usado): maior é melhor"""
+        return float(self.priorities[order].sum()), -self.cost(order)
+
+    def insertion_deltas(self, order: List[int], candidates: np.ndarray) -> np.ndarray:
+        """Aumento de tempo ao inserir cada candidato em cada posição (|candidatos| x n+1)"""
+        idx = np.asarray(order, dtype=np.int64)
+        if kernels.USE_NUMBA:
+            return kernels.insertion_deltas(
+                self.start, self.trans, self.base, idx, np.asarray(candidates, dtype=np.int64)
+            )
+        into = np.vstack([self.start[None, :], self.trans[idx, :]])  # prev -> x
+        out = np.zeros((len(candidates), len(idx) + 1))
+        out[:, : len(idx)] = self.trans[np.ix_(candidates, idx)]  # x -> next
+        old = np.zeros(len(idx) + 1)
+        old[: len(idx)] = into[np.arange(len(idx)), idx]  # prev -> next
+        return into[:, candidates].T + out - old + self.base[candidates][:, None]
+
+    def fill(self, order: List[int]) -> List[int]:
+        """Insere pacientes (maior prioridade, depois menor aumento de tempo) enquanto couberem"""
+        order = list(order)
+        while not self.stopped():
+            free = np.ones(len(self.priorities), dtype=bool)
+            free[order] = False
+            candidates = np.flatnonzero(free)
+            if not len(candidates):
+                break
+            deltas = self.insertion_deltas(order, candidates)
+            slack = self.total_time - self.cost(order)
+            feasible = deltas <= slack + 1e-9
+            if not feasible.any():
+                break
+            best_delta = np.where(feasible, deltas, np.inf).min(axis=1)
+            fits = np.isfinite(best_delta)
+            best_priority = self.priorities[candidates[fits]].max()
+            pick = fits & (self.priorities[candidates] == best_priority)
+            row = int(np.flatnonzero(pick)[np.argmin(best_delta[pick])])
+            position = int(np.argmin(np.where(feasible[row], deltas[row], np.inf)))
+            order.insert(position, int(candidates[row]))
+        return order
+
+    def relocate(self, order: List[int]) -> List[int]:
+        """Move pacientes para a posição que mais reduz o tempo total"""
+        order = list(order)
+        improved = True
+        while improved and not self.stopped():
+            improved = False
+            if kernels.USE_NUMBA:
+                i, position = kernels.best_relocation(
+                    self.start, self.trans, self.base, np.asarray(order, dtype=np.int64), 1e-9
+                )
+                if i >= 0:
+                    rest = order[:i] + order[i + 1 :]
+                    rest.insert(position, order[i])
+                    order = rest
+                    improved = True
+                continue
+            current_cost = self.cost(order)
+            for i in range(len(order)):
+                rest = order[:i] + order[i + 1 :]
+                moved = np.array([order[i]])
+                deltas = self.insertion_deltas(rest, moved)[0]
+                position = int(np.argmin(deltas))
+                if self.cost(rest) + deltas[position] < current_cost - 1e-9:
+                    rest.insert(position, order[i])
+                    order = rest
+                    improved = True
+                    break
+        return order
+
+    def improve(self, order: List[int]) -> List[int]:
+        while not self.stopped():
+            before = self.score(order)
+            order = self.fill(self.relocate(order))
+            if self.score(order) <= before:
+                break
+        return order
+
+    def ruin_recreate(self, order: List[int]) -> List[int]:
+        """Retira 1 a 3 pacientes ao acaso e volta a preencher"""
+        if not order:
+            return self.fill(order)
+        k = int(self.rng.integers(1, min(3, len(order)) + 1))
+        removed = set(self.rng.choice(len(order), size=k, replace=False).tolist())
+        return self.fill([p for i, p in enumerate(order) if i not in removed])
+
+
+def ambulance_routing_anytime(
+    graph: Union[igraph.Graph, CSRGraph],
+    points_data: pd.DataFrame,
+    initial_point: int,
+    total_time: float,
+    time_limit: float = 0.2,
+    cancel: Optional[CancellationToken] = None,
+    matrices: Optional[Dict[str, Any]] = None,
+    seed: int = 0,
+    on_improvement: Optional[Callable[[Dict[str, Any]], None]] = None,
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Modo anytime: devolve logo a solução gulosa e continua a melhorá-la
+    (pesquisa local iterada) até time_limit segundos ou até cancel disparar.
+    Devolve (route_log da melhor solução, melhorias), em que cada melhoria é
+    {"elapsed", "priority", "time_used", "method"}; a primeira é a gulosa.
+    matrices (de precompute_routing_matrices) evita o pré-cálculo dentro do prazo.
+    """
+    start_time = time.perf_counter()
+    deadline = start_time + time_limit
+    initial_point = int(initial_point)
+    total_time = float(total_time)
+    if matrices is None:
+        matrices = precompute_routing_matrices(graph, points_data)
+
+    search = _AnytimeSearch(
+        _transition_costs(matrices, initial_point),
+        matrices["priorities"],
+        total_time,
+        deadline,
+        cancel,
+        seed,
+    )
+    improvements: List[Dict[str, Any]] = []
+
+    def record(order: List[int], method: str) -> None:
+        priority, negative_time = search.score(order)
+        improvements.append(
+            {
+                "elapsed": time.perf_counter() - start_time,
+                "priority": priority,
+                "time_used": -negative_time,
+                "method": method,
+            }
+        )
+        if on_improvement is not None:
+            on_improvement(improvements[-1])
+
+    best = greedy_order_matrices(matrices, initial_point, total_time)
+    best_score = search.score(best)
+    record(best, "greedy")
+
+    current = search.improve(best)
+    while True:
+        current_score = search.score(current)
+        if current_score[0] > best_score[0] or (
+            current_score[0] == best_score[0] and current_score[1] > best_score[1] + 1e-9
+        ):
+            best, best_score = current, current_score
+            record(best, "local_search")
+        if search.stopped():
+            break
+        candidate = search.improve(search.ruin_recreate(current))
+        # Aceita movimentos laterais para sair de ótimos locais
+        current = candidate if search.score(candidate) >= current_score else best
+
+    return route_log_from_order(matrices, initial_point, best), improvements
+
+
+def run_from_csv_optimized(
+    input_folder: str, backend: str = "igraph"
+) -> List[Dict[str, Any]]:
     """
     Função principal para rodar o algoritmo diretamente dos CSVs.
+    backend="csr" usa o grafo CSR em vez do igraph.
     """
     dados_iniciais = pd.read_csv(f"{input_folder}/dados_iniciais.csv")
     pontos_data = pd.read_csv(f"{input_folder}/pontos.csv")
     ruas_data = pd.read_csv(f"{input_folder}/ruas.csv")
 
-    graph = pd_to_igraph(ruas_data)
-    add_points_data_to_graph(graph, pontos_data)
+    if backend == "csr":
+        graph = CSRGraph.from_dataframe(ruas_data)
+    else:
+        graph = pd_to_igraph(ruas_data)
+        add_points_data_to_graph(graph, pontos_data)
 
     initial_point = dados_iniciais.iloc[0]["ponto_inicial"]
     total_time = dados_iniciais.iloc[0]["tempo_total"]
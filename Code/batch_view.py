@@ -0,0 +1,212 @@
+"""
+SciTech Ambulance Routing - Batch Comparison View
+=================================================
+
+Window that solves every scenario below a parent directory (or every scenario
+of a Data_Store database) in a process pool and fills a sortable summary table
+as results arrive, without blocking the Tk main loop.
+"""
+
+import multiprocessing
+import os
+import time
+import tkinter as tk
+from concurrent.futures import Future, ProcessPoolExecutor
+from tkinter import filedialog, ttk
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from .Data_Store import find_scenarios, load_scenario  # type: ignore
+from .alg import ambulance_routing_optimized  # type: ignore
+from .result_cache import DEFAULT_CACHE_DIR, ResultCache, instance_fingerprint  # type: ignore
+from .virtual_table import VirtualTable  # type: ignore
+
+BATCH_POLL_MS = 100  # How often the window collects finished scenarios
+
+BATCH_COLUMNS = ("Scenario", "Patients", "Priority", "Time Used", "Solve (s)")
+
+
+def solve_scenario_folder(
+    folder: str, cache_folder: Optional[str] = DEFAULT_CACHE_DIR
+) -> Dict[str, Any]:
+    """
+    Load and solve one scenario folder or stored scenario (any source of
+    Data_Store.load_scenario; runs inside a pool worker). Results are shared
+    with other workers and later batches through the on-disk cache.
+    """
+    started = time.perf_counter()
+    data = load_scenario(folder)
+    initial_data = data["initial_data"]
+    cache = ResultCache(folder=cache_folder)
+    key = instance_fingerprint(data)
+    cached = cache.get(key)
+    if cached is not None:
+        route_log = cached["route_log"]
+    else:
+        route_log = ambulance_routing_optimized(
+            data["graph"],
+            data["points_data"],
+            initial_data.iloc[0]["ponto_inicial"],
+            initial_data.iloc[0]["tempo_total"],
+        )
+        cache.put(key, route_log, solver="greedy", elapsed=time.perf_counter() - started)
+    return {
+        "patients": len(route_log),
+        "priority": float(sum(step["priority"] for step in route_log)),
+        "time_used": float(sum(step["time_needed"] for step in route_log)),
+        "solve_time": time.perf_counter() - started,
+    }
+
+
+class BatchWindow(tk.Toplevel):
+    """Batch comparison window opened from SciTechApp"""
+
+    def __init__(self, parent: tk.Misc, initial_dir: Optional[str] = None):
+        super().__init__(parent)
+        self.title("Batch Comparison")
+        self.geometry("640x480")
+        self.grid_rowconfigure(1, weight=1)
+        self.grid_columnconfigure(0, weight=1)
+
+        self.executor: Optional[ProcessPoolExecutor] = None
+        self.pending: Dict[Future, str] = {}
+        self.rows: List[Dict[str, Any]] = []
+        self.failed = 0
+        self.started = 0.0
+        self.closed = False
+
+        controls = ttk.Frame(self, padding=10)
+        controls.grid(row=0, column=0, sticky=tk.EW)
+        controls.grid_columnconfigure(1, weight=1)
+        ttk.Label(controls, text="Scenarios folder or store:").grid(
+            row=0, column=0, padx=(0, 5)
+        )
+        self.folder_entry = ttk.Entry(controls)
+        self.folder_entry.grid(row=0, column=1, sticky=tk.EW, padx=(0, 5))
+        if initial_dir:
+            self.folder_entry.insert(0, initial_dir)
+        ttk.Button(controls, text="Browse", command=self._browse).grid(row=0, column=2)
+        ttk.Button(controls, text="Store", command=self._browse_store).grid(
+            row=0, column=3, padx=(5, 0)
+        )
+        self.run_button = ttk.Button(controls, text="Run Batch", command=self._run)
+        self.run_button.grid(row=0, column=4, padx=(5, 0))
+        self.cancel_button = ttk.Button(
+            controls, text="Cancel", command=self._cancel, state=tk.DISABLED
+        )
+        self.cancel_button.grid(row=0, column=5, padx=(5, 0))
+        self.status_label = ttk.Label(controls, text="Status: Ready", foreground="gray")
+        self.status_label.grid(row=1, column=0, columnspan=6, sticky=tk.W, pady=(5, 0))
+
+        self.table = VirtualTable(
+            self,
+            columns=BATCH_COLUMNS,
+            widths={"Scenario": 200, "Patients": 70, "Priority": 80},
+            formatters={
+                "Priority": lambda p: f"{p:g}",
+                "Time Used": lambda t: f"{t:.1f}",
+                "Solve (s)": lambda t: f"{t:.3f}",
+            },
+            height=18,
+        )
+        self.table.grid(row=1, column=0, sticky=tk.NSEW, padx=10, pady=(0, 10))
+
+        self.protocol("WM_DELETE_WINDOW", self._on_close)
+
+    def _browse(self):
+        folder = filedialog.askdirectory(title="Select Scenarios Folder", parent=self)
+        if folder:
+            self.folder_entry.delete(0, tk.END)
+            self.folder_entry.insert(0, folder)
+
+    def _browse_store(self):
+        store = filedialog.askopenfilename(
+            title="Select Scenario Store",
+            filetypes=[("SQLite databases", "*.sqlite3 *.db"), ("All files", "*.*")],
+            parent=self,
+        )
+        if store:
+            self.folder_entry.delete(0, tk.END)
+            self.folder_entry.insert(0, store)
+
+    def _run(self):
+        root = self.folder_entry.get().strip()
+        scenarios = find_scenarios(root) if root else []
+        if not scenarios:
+            self.status_label.configure(text="Status: No scenarios found", foreground="red")
+            return
+
+        self.rows = []
+        self.failed = 0
+        self.table.clear()
+        self.started = time.perf_counter()
+        # spawn: never fork a process that owns a Tk interpreter and threads
+        self.executor = ProcessPoolExecutor(
+            max_workers=os.cpu_count(), mp_context=multiprocessing.get_context("spawn")
+        )
+        self.pending = {
+            self.executor.submit(solve_scenario_folder, source): name
+            for name, source in scenarios
+        }
+        self.run_button.configure(state=tk.DISABLED)
+        self.cancel_button.configure(state=tk.NORMAL)
+        self.after(BATCH_POLL_MS, self._poll)
+
+    def _poll(self):
+        """Collect finished scenarios and refresh the table"""
+        if self.closed:
+            return
+        done = [future for future in self.pending if future.done()]
+        for future in done:
+            name = self.pending.pop(future)
+            if future.cancelled():
+                continue
+            try:
+                self.rows.append(dict(future.result(), scenario=name))
+            except Exception as e:
+                self.failed += 1
+                print(f"Scenario {name} failed: {e}")
+
+        if done:
+            self.table.set_data(
+                {
+                    "Scenario": np.array([r["scenario"] for r in self.rows], dtype=str),
+                    "Patients": np.array([r["patients"] for r in self.rows]),
+                    "Priority": np.array([r["priority"] for r in self.rows]),
+                    "Time Used": np.array([r["time_used"] for r in self.rows]),
+                    "Solve (s)": np.array([r["solve_time"] for r in self.rows]),
+                }
+            )
+
+        elapsed = time.perf_counter() - self.started
+        text = f"Status: {len(self.rows)} solved, {len(self.pending)} pending"
+        if self.failed:
+            text += f", {self.failed} failed"
+        self.status_label.configure(
+            text=f"{text} ({elapsed:.1f}s)",
+            foreground="orange" if self.pending else "green",
+        )
+
+        if self.pending:
+            self.after(BATCH_POLL_MS, self._poll)
+        else:
+            self._finish()
+
+    def _finish(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+        self.run_button.configure(state=tk.NORMAL)
+        self.cancel_button.configure(state=tk.DISABLED)
+
+    def _cancel(self):
+        for future in self.pending:
+            future.cancel()
+        self.pending = {f: n for f, n in self.pending.items() if not f.cancelled()}
+
+    def _on_close(self):
+        self.closed = True
+        self._cancel()
+        self._finish()
+        self.destroy()
@@ -0,0 +1,244 @@
+"""
+SciTech Ambulance Routing - Benchmarks
+======================================
+
+Throughput measurements for the slow paths of the application, runnable from
+the command line:
+
+    python -m Code.benchmarks pdf [reports] [steps] [workers]
+    python -m Code.benchmarks kernels [repeats]
+    python -m Code.benchmarks routes [routes] [length]
+"""
+
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from . import PDF_Export, kernels  # type: ignore
+from .alg import (  # type: ignore
+    _AnytimeSearch,
+    _transition_costs,
+    greedy_order_matrices,
+    precompute_routing_matrices,
+)
+from .csr_graph import CSRGraph  # type: ignore
+from .route_eval import RouteEvaluator  # type: ignore
+
+DATASETS_ROOT = str(Path(__file__).parent.parent / "Dataset de Test" / "datasets")
+SAMPLE_CHUNK_CELLS = 1 << 20  # Random keys drawn per pass when sampling orders (bounds memory)
+
+
+def synthetic_route_log(steps: int) -> List[Dict[str, Any]]:
+    """Route log with the report columns filled, for export benchmarks"""
+    return [
+        {
+            "from": i,
+            "to_patient": i + 1,
+            "path_to_patient": [i, i + 1],
+            "path_to_hospital": [i + 1, 0],
+            "time_needed": 5.0 + i % 7,
+            "priority": 1 + i % 5,
+        }
+        for i in range(steps)
+    ]
+
+
+def _timed(function: Callable[[], Any]) -> float:
+    started = time.perf_counter()
+    function()
+    return time.perf_counter() - started
+
+
+def benchmark_pdf_export(
+    reports: int = 200, steps: int = 30, workers: Optional[int] = None
+) -> Dict[str, float]:
+    """
+    Reports per second of serial export_to_pdf calls (template parsed every
+    time, as before the cache), serial calls with the cached template, and
+    export_batch over a process pool.
+    """
+    route_log = synthetic_route_log(steps)
+    with tempfile.TemporaryDirectory() as folder:
+        paths = [os.path.join(folder, f"report_{i}.pdf") for i in range(reports)]
+
+        def uncached() -> None:
+            for path in paths:
+                PDF_Export._read_template.cache_clear()
+                PDF_Export.export_to_pdf({}, route_log, path)
+
+        def cached() -> None:
+            for path in paths:
+                PDF_Export.export_to_pdf({}, route_log, path)
+
+        def batch() -> None:
+            PDF_Export.export_batch([(route_log, path) for path in paths], workers)
+
+        results = {
+            "uncached_serial": reports / _timed(uncached),
+            "cached_serial": reports / _timed(cached),
+            "batch_pool": reports / _timed(batch),
+        }
+    return results
+
+
+def synthetic_instance(
+    vertices: int = 2000,
+    streets: int = 6000,
+    patients: int = 400,
+    hospitals: int = 8,
+    seed: int = 0,
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Random connected road network (ruas, pontos) for solver benchmarks"""
+    rng = np.random.default_rng(seed)
+    # A random tree keeps every vertex reachable, extra streets add cycles
+    origins = np.concatenate([np.arange(1, vertices), rng.integers(0, vertices, streets)])
+    dests = np.concatenate(
+        [rng.integers(0, np.arange(1, vertices)), rng.integers(0, vertices, streets)]
+    )
+    ruas = pd.DataFrame(
+        {
+            "ponto_origem": origins,
+            "ponto_destino": dests,
+            "tempo_transporte": rng.integers(1, 15, len(origins)),
+        }
+    )
+    ids = rng.permutation(vertices)[: hospitals + patients]
+    pontos = pd.DataFrame(
+        {
+            "id": ids,
+            "tipo": ["hospital"] * hospitals + ["paciente"] * patients,
+            "nome": [f"Point {i}" for i in ids],
+            "prioridade": np.concatenate([np.zeros(hospitals, int), rng.integers(1, 6, patients)]),
+            "tempo_cuidados_minimos": np.concatenate(
+                [np.zeros(hospitals, int), rng.integers(1, 20, patients)]
+            ),
+        }
+    )
+    return ruas, pontos
+
+
+def _kernel_instances() -> List[Tuple[str, Dict[str, Any], int, float]]:
+    """(name, routing matrices, initial point, total time) of the benchmark problems"""
+    from .Data_Import import problem_data_dict_by_folder  # type: ignore
+    from .Data_Store import find_scenario_folders  # type: ignore
+
+    instances = []
+    for folder in find_scenario_folders(DATASETS_ROOT):
+        data = problem_data_dict_by_folder(folder)
+        initial = data["initial_data"].iloc[0]
+        instances.append(
+            (
+                os.path.relpath(folder, DATASETS_ROOT),
+                precompute_routing_matrices(data["graph"], data["points_data"]),
+                int(initial["ponto_inicial"]),
+                float(initial["tempo_total"]),
+            )
+        )
+    for patients in (100, 400):
+        ruas, pontos = synthetic_instance(patients=patients)
+        matrices = precompute_routing_matrices(CSRGraph.from_dataframe(ruas), pontos)
+        # Budget for long routes: tens of patients
+        instances.append(
+            (f"synthetic/{patients}", matrices, int(pontos["id"].iloc[0]), 4.0 * patients)
+        )
+    return instances
+
+
+def benchmark_kernels(repeats: int = 5) -> Dict[str, Dict[str, float]]:
+    """
+    Microseconds per greedy run and per local search pass (fill from empty,
+    then improve), with the NumPy code and with the Numba kernels, for every
+    bundled scenario and two synthetic ones. Compilation is done beforehand.
+    """
+    results: Dict[str, Dict[str, float]] = {}
+    for name, matrices, initial_point, total_time in _kernel_instances():
+        costs = _transition_costs(matrices, initial_point)
+
+        def greedy() -> None:
+            greedy_order_matrices(matrices, initial_point, total_time)
+
+        def search() -> None:
+            searcher = _AnytimeSearch(
+                costs, matrices["priorities"], total_time, time.perf_counter() + 3600, None, 0
+            )
+            searcher.improve(searcher.fill([]))
+
+        row: Dict[str, float] = {}
+        for label, use_numba in (("numpy", False), ("numba", True)):
+            if use_numba and not kernels.HAS_NUMBA:
+                continue
+            kernels.USE_NUMBA = use_numba
+            greedy()
+            search()  # Warm up (and compile) before timing
+            row[f"greedy_{label}"] = min(_timed(greedy) for _ in range(repeats)) * 1e6
+            row[f"search_{label}"] = min(_timed(search) for _ in range(repeats)) * 1e6
+        kernels.USE_NUMBA = kernels.HAS_NUMBA
+        results[name] = row
+    return results
+
+
+def _random_orders(
+    rng: np.random.Generator, routes: int, n_patients: int, length: int
+) -> np.ndarray:
+    """
+    routes x min(length, n_patients) orders of distinct patients. The random
+    sort keys are drawn a chunk of rows at a time, so memory stays
+    O(routes * length) instead of O(routes * n_patients).
+    """
+    width = min(length, n_patients)
+    sequences = np.empty((routes, width), dtype=np.int64)
+    rows = max(1, SAMPLE_CHUNK_CELLS // max(n_patients, 1))
+    for first in range(0, routes, rows):
+        keys = rng.random((min(rows, routes - first), n_patients))
+        sequences[first : first + len(keys)] = np.argsort(keys, axis=1)[:, :width]
+    return sequences
+
+
+def benchmark_route_evaluation(
+    routes: int = 200000, length: int = 20, seed: int = 0
+) -> Dict[str, float]:
+    """
+    Routes per second of RouteEvaluator for random orders of up to length
+    distinct patients, for every bundled scenario and two synthetic ones
+    """
+    rng = np.random.default_rng(seed)
+    results: Dict[str, float] = {}
+    for name, matrices, initial_point, total_time in _kernel_instances():
+        sequences = _random_orders(rng, routes, len(matrices["priorities"]), length)
+        evaluator = RouteEvaluator(matrices, initial_point, total_time)
+        results[name] = routes / _timed(lambda: evaluator.evaluate(sequences))
+    return results
+
+
+def _print_results(title: str, results: Dict[str, float], unit: str) -> None:
+    print(title)
+    for name, value in results.items():
+        print(f"  {name:<20} {value:10.1f} {unit}")
+
+
+if __name__ == "__main__":
+    # Usage: python -m Code.benchmarks pdf [reports] [steps] [workers]
+    arguments = sys.argv[1:] or ["pdf"]
+    if arguments[0] == "pdf":
+        numbers = [int(a) for a in arguments[1:]]
+        pdf_results = benchmark_pdf_export(*numbers)
+        _print_results("PDF export throughput", pdf_results, "reports/s")
+    elif arguments[0] == "kernels":
+        if not kernels.HAS_NUMBA:
+            print("Numba is not installed: only the NumPy code is timed")
+        numbers = [int(a) for a in arguments[1:]]
+        for dataset, timings in benchmark_kernels(*numbers).items():
+            _print_results(dataset, timings, "us")
+    elif arguments[0] == "routes":
+        numbers = [int(a) for a in arguments[1:]]
+        route_results = benchmark_route_evaluation(*numbers)
+        _print_results("Route evaluation throughput", route_results, "routes/s")
+    else:
+        print(f"Unknown benchmark: {arguments[0]}")
+        sys.exit(1)
@@ -0,0 +1,313 @@
+"""
+SciTech Ambulance Routing - CSR Graph Backend
+=============================================
+
+Compact alternative to the igraph Graph built by Data_Import.pd_to_igraph:
+the road network is stored as compressed sparse row arrays (indptr, indices,
+float32 weights), the input of the NumPy/scipy shortest path kernels. The
+matrices built from it are what worker processes share (see routing_service).
+"""
+
+import heapq
+from collections import OrderedDict
+from typing import Iterator, List, Mapping, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import igraph  # type: ignore
+
+try:
+    from scipy.sparse import csr_matrix  # type: ignore
+    from scipy.sparse.csgraph import dijkstra as _scipy_dijkstra  # type: ignore
+
+    HAS_SCIPY = True
+except ImportError:  # pragma: no cover - scipy is optional
+    HAS_SCIPY = False
+
+PATH_CACHE_SIZE = 4096  # Paths kept by LazyPaths once rebuilt
+
+
+class CSRGraph:
+    """
+    Weighted road network in CSR form. Undirected streets are stored in both
+    directions; parallel streets keep only the fastest one.
+    """
+
+    def __init__(self, indptr: np.ndarray, indices: np.ndarray, weights: np.ndarray):
+        self.indptr = indptr
+        self.indices = indices
+        self.weights = weights
+
+    @property
+    def n_vertices(self) -> int:
+        return len(self.indptr) - 1
+
+    def vcount(self) -> int:
+        """Same name as igraph.Graph.vcount so callers can stay backend agnostic"""
+        return self.n_vertices
+
+    def ecount(self) -> int:
+        return len(self.indices)
+
+    def neighbors(self, v: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Neighbour ids and edge weights of vertex v"""
+        start, end = self.indptr[v], self.indptr[v + 1]
+        return self.indices[start:end], self.weights[start:end]
+
+    @classmethod
+    def from_edges(
+        cls,
+        origins: np.ndarray,
+        dests: np.ndarray,
+        weights: np.ndarray,
+        n_vertices: Optional[int] = None,
+        directed: bool = False,
+    ) -> "CSRGraph":
+        """Build the CSR arrays from an edge list"""
+        origins = np.asarray(origins, dtype=np.int64)
+        dests = np.asarray(dests, dtype=np.int64)
+        weights = np.asarray(weights, dtype=np.float32)
+        if not directed:
+            origins, dests = (
+                np.concatenate([origins, dests]),
+                np.concatenate([dests, origins]),
+            )
+            weights = np.concatenate([weights, weights])
+        if n_vertices is None:
+            n_vertices = int(max(origins.max(), dests.max())) + 1 if len(origins) else 0
+
+        # Sort by (origin, dest, weight) and keep the fastest of parallel edges
+        order = np.lexsort((weights, dests, origins))
+        origins, dests, weights = origins[order], dests[order], weights[order]
+        keep = np.ones(len(origins), dtype=bool)
+        keep[1:] = (origins[1:] != origins[:-1]) | (dests[1:] != dests[:-1])
+        origins, dests, weights = origins[keep], dests[keep], weights[keep]
+
+        indptr = np.zeros(n_vertices + 1, dtype=np.int64)
+        np.cumsum(np.bincount(origins, minlength=n_vertices), out=indptr[1:])
+        return cls(indptr, dests.astype(np.int32), weights)
+
+    @classmethod
+    def from_dataframe(cls, data: pd.DataFrame) -> "CSRGraph":
+        """Build from a ruas DataFrame (ponto_origem, ponto_destino, tempo_transporte)"""
+        return cls.from_edges(
+            data["ponto_origem"].to_numpy(),
+            data["ponto_destino"].to_numpy(),
+            data["tempo_transporte"].to_numpy(),
+        )
+
+    @classmethod
+    def from_igraph(cls, graph: igraph.Graph) -> "CSRGraph":
+        """Build from an igraph Graph with a "weight" edge attribute"""
+        edges = np.array(graph.get_edgelist(), dtype=np.int64).reshape(-1, 2)
+        return cls.from_edges(
+            edges[:, 0],
+            edges[:, 1],
+            np.array(graph.es["weight"] if graph.ecount() else [], dtype=np.float32),
+            n_vertices=graph.vcount(),
+            directed=graph.is_directed(),
+        )
+
+
+def dijkstra(graph: CSRGraph, source: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Heap-based single source Dijkstra over the CSR arrays.
+    Returns (distances, predecessors); unreachable vertices have inf / -1.
+    """
+    n = graph.n_vertices
+    dist = np.full(n, np.inf)
+    pred = np.full(n, -1, dtype=np.int32)
+    indptr = graph.indptr
+    indices = graph.indices
+    weights = graph.weights
+
+    dist[source] = 0.0
+    done = np.zeros(n, dtype=bool)
+    heap = [(0.0, source)]
+    while heap:
+        d, v = heapq.heappop(heap)
+        if done[v]:
+            continue
+        done[v] = True
+        for k in range(indptr[v], indptr[v + 1]):
+            u = indices[k]
+            nd = d + float(weights[k])
+            if nd < dist[u]:
+                dist[u] = nd
+                pred[u] = v
+                heapq.heappush(heap, (nd, u))
+    return dist, pred
+
+
+def shortest_path_matrices(
+    graph: CSRGraph, sources: Optional[List[int]] = None
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Distance and predecessor matrices (one row per source, all sources by
+    default), using scipy.sparse.csgraph when available.
+    """
+    if sources is None:
+        sources = list(range(graph.n_vertices))
+    n = graph.n_vertices
+
+    if HAS_SCIPY:
+        matrix = csr_matrix(
+            (graph.weights, graph.indices, graph.indptr), shape=(n, n)
+        )
+        dist, pred = _scipy_dijkstra(
+            matrix, directed=True, indices=sources, return_predecessors=True
+        )
+        pred = pred.astype(np.int32)
+        pred[pred < 0] = -1
+        return dist, pred
+
+    dist = np.empty((len(sources), n))
+    pred = np.empty((len(sources), n), dtype=np.int32)
+    for row, source in enumerate(sources):
+        dist[row], pred[row] = dijkstra(graph, source)
+    return dist, pred
+
+
+def reconstruct_path(pred: np.ndarray, source: int, target: int) -> List[int]:
+    """Vertex path source -> target from a predecessor row of source; [] if unreachable"""
+    if source == target:
+        return [source]
+    if pred[target] < 0:
+        return []
+    path = [target]
+    v = target
+    while v != source:
+        v = int(pred[v])
+        path.append(v)
+    path.reverse()
+    return path
+
+
+class LazyDistances(Mapping[Tuple[int, int], float]):
+    """
+    Read-only (source, target) -> distance mapping over a distance matrix,
+    for callers written against a dict of pairs (no V^2 Python dict is built)
+    """
+
+    def __init__(self, dist: np.ndarray):
+        self.dist = dist
+
+    def __getitem__(self, key: Tuple[int, int]) -> float:
+        source, target = key
+        if not (0 <= source < len(self.dist) and 0 <= target < len(self.dist)):
+            raise KeyError(key)
+        return float(self.dist[source, target])
+
+    def __len__(self) -> int:
+        return len(self.dist) ** 2
+
+    def __iter__(self) -> Iterator[Tuple[int, int]]:
+        n = len(self.dist)
+        return ((source, target) for source in range(n) for target in range(n))
+
+
+class LazyPaths(Mapping[Tuple[int, int], List[int]]):
+    """
+    Read-only (source, target) -> vertex path mapping over a predecessor
+    matrix (one row per source). Paths are rebuilt on demand and the most
+    recently used ones are kept in a bounded LRU cache, so memory stays
+    O(V^2) instead of holding every path.
+    """
+
+    def __init__(self, pred: np.ndarray, max_cached: int = PATH_CACHE_SIZE):
+        self.pred = pred
+        self.max_cached = max_cached
+        self._cache: "OrderedDict[Tuple[int, int], List[int]]" = OrderedDict()
+
+    def __getitem__(self, key: Tuple[int, int]) -> List[int]:
+        path = self._cache.get(key)
+        if path is not None:
+            self._cache.move_to_end(key)
+            return path
+        source, target = key
+        if not (0 <= source < len(self.pred) and 0 <= target < len(self.pred)):
+            raise KeyError(key)
+        path = reconstruct_path(self.pred[source], int(source), int(target))
+        self._cache[key] = path
+        if len(self._cache) > self.max_cached:
+            self._cache.popitem(last=False)
+        return path
+
+    def __len__(self) -> int:
+        return len(self.pred) ** 2
+
+    def __iter__(self) -> Iterator[Tuple[int, int]]:
+        n = len(self.pred)
+        return ((source, target) for source in range(n) for target in range(n))
+
+
+def edge_weight(graph: CSRGraph, u: int, v: int) -> float:
+    """Weight of the u -> v edge, inf if there is none"""
+    start, end = graph.indptr[u], graph.indptr[u + 1]
+    hits = np.flatnonzero(graph.indices[start:end] == v)
+    return float(graph.weights[start + hits[0]]) if len(hits) else np.inf
+
+
+def _set_edge_weight(graph: CSRGraph, u: int, v: int, weight: float) -> None:
+    start, end = graph.indptr[u], graph.indptr[u + 1]
+    hits = np.flatnonzero(graph.indices[start:end] == v)
+    graph.weights[start + hits] = weight
+
+
+def update_shortest_paths(
+    dist: np.ndarray,
+    pred: np.ndarray,
+    old_graph: CSRGraph,
+    new_graph: CSRGraph,
+    pairs: List[Tuple[int, int]],
+) -> List[int]:
+    """
+    Patch all-pairs distance/predecessor matrices in place after the undirected
+    streets in pairs changed weight (or were added/removed) between old_graph
+    and new_graph. Changes are applied one street at a time:
+    - cheaper street: every pair is relaxed through it in one vectorized pass;
+    - slower street: only the sources whose shortest path tree used it are
+      recomputed with Dijkstra.
+    Returns the source rows that were recomputed.
+    """
+    pairs = [(int(u), int(v)) for u, v in pairs]
+    # Working graph: structure of new_graph plus every changed pair, at the old weights
+    origins = np.repeat(np.arange(new_graph.n_vertices), np.diff(new_graph.indptr))
+    extra = np.array(pairs, dtype=np.int64).reshape(-1, 2)
+    working = CSRGraph.from_edges(
+        np.concatenate([origins, extra[:, 0], extra[:, 1]]),
+        np.concatenate([new_graph.indices, extra[:, 1], extra[:, 0]]),
+        np.concatenate([new_graph.weights, np.full(2 * len(extra), np.inf)]),
+        n_vertices=new_graph.n_vertices,
+        directed=True,
+    )
+    for u, v in pairs:
+        old_weight = edge_weight(old_graph, u, v)
+        _set_edge_weight(working, u, v, old_weight)
+        _set_edge_weight(working, v, u, old_weight)
+
+    recomputed: List[int] = []
+    for u, v in pairs:
+        old_weight = edge_weight(working, u, v)
+        new_weight = edge_weight(new_graph, u, v)
+        _set_edge_weight(working, u, v, new_weight)
+        _set_edge_weight(working, v, u, new_weight)
+
+        if new_weight < old_weight:
+            via_uv = dist[:, u][:, None] + new_weight + dist[v, :][None, :]
+            via_vu = dist[:, v][:, None] + new_weight + dist[u, :][None, :]
+            pred_via_uv = pred[v].copy()
+            pred_via_uv[v] = u
+            pred_via_vu = pred[u].copy()
+            pred_via_vu[u] = v
+            better_uv = (via_uv < dist) & (via_uv <= via_vu)
+            better_vu = (via_vu < dist) & ~better_uv
+            np.minimum(dist, np.minimum(via_uv, via_vu), out=dist)
+            pred[better_uv] = np.broadcast_to(pred_via_uv, pred.shape)[better_uv]
+            pred[better_vu] = np.broadcast_to(pred_via_vu, pred.shape)[better_vu]
+        elif new_weight > old_weight:
+            rows = np.flatnonzero((pred[:, v] == u) | (pred[:, u] == v)).tolist()
+            if rows:
+                dist[rows], pred[rows] = shortest_path_matrices(working, rows)
+                recomputed.extend(rows)
+    return recomputed
@@ -1,14 +1,269 @@
-import matplotlib
-matplotlib.use("TkAgg")
 import igraph as ig  # type: ignore
-import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
 import matplotlib as mpl
 from matplotlib.figure import Figure
+from matplotlib.collections import LineCollection
+from matplotlib.backends.backend_agg import FigureCanvasAgg
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from matplotlib.backend_bases import DrawEvent
 import tkinter as tk
-from typing import Optional, List, Any
+import hashlib
+import os
+from pathlib import Path
+from typing import Optional, List, Any, Dict, Tuple
+
+from .result_cache import user_cache_dir  # type: ignore
+
+# Layout cache: in memory plus .npz files (edges and coordinates) in the
+# per-user cache folder, keyed by the edge-list hash (and by the key of the
+# layout it was started from)
+LAYOUT_CACHE_DIR = Path(user_cache_dir("layout_cache"))
+LAYOUT_SEED = 42  # Fixed seed so the same network always gets the same picture
+INCREMENTAL_NITER = 100  # Iterations when starting from previous coordinates
+_layout_cache: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+
+# Level of detail for the batched renderer
+FAST_RENDER_EDGE_THRESHOLD = 2000  # plot_graph switches to the batched renderer above this
+LABEL_VERTEX_THRESHOLD = 150  # Vertex labels only when at most this many vertices are in view
+LABEL_EDGE_THRESHOLD = 150  # Edge labels only when at most this many edges are in view
+MAX_DRAWN_EDGES = 20000  # Edges in view above this are decimated (shortest dropped first)
+ZOOM_STEP = 1.25  # Scroll wheel zoom factor
+
+
+def _layout_key(
+    n_vertices: int, edges: List[Tuple[int, int]], base_key: Optional[str] = None
+) -> str:
+    """Hash of the vertex count, (undirected) edge list and starting layout"""
+    edge_array = np.sort(np.asarray(edges, dtype=np.int64).reshape(-1, 2), axis=1)
+    digest = hashlib.sha1(np.int64(n_vertices).tobytes())
+    digest.update(edge_array.tobytes())
+    if base_key is not None:
+        digest.update(base_key.encode())
+    return digest.hexdigest()
+
+
+def _cached_layout(key: str) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+    """(edges, coordinates) stored under key, from memory or the cache folder"""
+    if key not in _layout_cache:
+        try:
+            with np.load(LAYOUT_CACHE_DIR / f"{key}.npz") as stored:
+                _layout_cache[key] = (stored["edges"], stored["coords"])
+        except (OSError, ValueError, KeyError):
+            return None
+    return _layout_cache[key]
+
+
+def _incremental_seed(
+    n_vertices: int, edges: List[Tuple[int, int]], base_key: Optional[str]
+) -> Tuple[np.ndarray, bool]:
+    """
+    Starting coordinates for the layout: the coordinates of the base layout for
+    vertices that already existed, neighbour centroids (or random points) for
+    new ones. Returns (seed, incremental).
+    """
+    rng = np.random.default_rng(LAYOUT_SEED)
+    # Spread like a finished layout so the grid variant of the algorithm stays fast
+    extent = max(1.0, float(np.sqrt(n_vertices)))
+    seed = rng.uniform(-extent, extent, size=(n_vertices, 2))
+    base = _cached_layout(base_key) if base_key is not None else None
+    if base is None:
+        return seed, False
+
+    # Only reuse coordinates of an edited version of the same network
+    previous_edges, previous = base
+    previous_set = {tuple(sorted(e)) for e in previous_edges.tolist()}
+    shared = sum(tuple(sorted(e)) in previous_set for e in edges)
+    if not edges or shared < 0.5 * len(edges):
+        return seed, False
+
+    kept = min(len(previous), n_vertices)
+    seed[:kept] = previous[:kept]
+    if kept < n_vertices:
+        placed = np.zeros(n_vertices, dtype=bool)
+        placed[:kept] = True
+        for origin, dest in edges:
+            for new, old in ((origin, dest), (dest, origin)):
+                if not placed[new] and placed[old]:
+                    seed[new] = previous[old] + rng.normal(scale=0.1, size=2)
+    return seed, kept > 0
+
+
+def get_layout(
+    g: ig.Graph, edges: List[Tuple[int, int]], base_key: Optional[str] = None
+) -> Tuple[ig.Layout, str]:
+    """
+    Fruchterman-Reingold layout of g, cached by edge-list hash. base_key is the
+    key of a layout computed earlier (e.g. the network before an edit): an
+    edited network starts from its coordinates. The same graph and base_key
+    always give the same coordinates. Returns (layout, key of the layout).
+    """
+    seed, incremental = _incremental_seed(g.vcount(), edges, base_key)
+    # Without a usable base the layout is the same as a fresh one, share it
+    key = _layout_key(g.vcount(), edges, base_key if incremental else None)
+    cached = _cached_layout(key)
+
+    if cached is not None:
+        coords = cached[1]
+    else:
+        # Seeded starting positions instead of reseeding igraph's process-wide
+        # generator (it only adds jitter); the cache keeps the result stable
+        layout = g.layout_fruchterman_reingold(
+            seed=seed.tolist(),
+            niter=INCREMENTAL_NITER if incremental else 500,
+            # igraph does not pick the grid variant itself once a seed is given
+            grid="grid" if g.vcount() > 1000 else "nogrid",
+        )
+        coords = np.asarray(layout.coords, dtype=float).reshape(-1, 2)
+        edge_array = np.asarray(edges, dtype=np.int64).reshape(-1, 2)
+        try:
+            LAYOUT_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+            cache_file = LAYOUT_CACHE_DIR / f"{key}.npz"
+            tmp_file = cache_file.with_suffix(".tmp.npz")
+            np.savez(tmp_file, edges=edge_array, coords=coords)
+            os.replace(tmp_file, cache_file)
+        except OSError as e:
+            print(f"Could not persist graph layout: {e}")
+        _layout_cache[key] = (edge_array, coords)
+
+    return ig.Layout(coords.tolist()), key
+
+
+def layout_with_key(
+    df_pontos: pd.DataFrame, df_ruas: pd.DataFrame, base_key: Optional[str] = None
+) -> Tuple[np.ndarray, str]:
+    """
+    Cached layout (one x, y row per point) of the network drawn by plot_graph,
+    and its key (pass it as base_key when drawing an edited version)
+    """
+    edges = list(zip(df_ruas["ponto_origem"].tolist(), df_ruas["ponto_destino"].tolist()))
+    g = ig.Graph()
+    g.add_vertices(len(df_pontos))
+    g.add_edges(edges)
+    layout, key = get_layout(g, edges, base_key)
+    return np.asarray(layout.coords, dtype=float).reshape(-1, 2), key
+
+
+def layout_coordinates(
+    df_pontos: pd.DataFrame, df_ruas: pd.DataFrame, base_key: Optional[str] = None
+) -> np.ndarray:
+    """Cached layout (one x, y row per point) of the network drawn by plot_graph"""
+    return layout_with_key(df_pontos, df_ruas, base_key)[0]
+
+
+class LevelOfDetail:
+    """
+    Batched renderer for large graphs: all edges are one LineCollection and all
+    vertices one scatter. Labels and decimated edges are only added back for the
+    part of the graph in view, and are refreshed whenever the view limits change
+    (scroll wheel zoom or toolbar pan/zoom).
+    """
+
+    def __init__(
+        self,
+        ax: Any,
+        coords: np.ndarray,
+        edges: List[Tuple[int, int]],
+        edge_widths: List[float],
+        vertex_colors: List[Any],
+        vertex_labels: List[str],
+        edge_labels: List[str],
+    ):
+        self.ax = ax
+        self.coords = coords
+        self.edges = np.asarray(edges, dtype=np.int64).reshape(-1, 2)
+        self.segments = coords[self.edges]
+        self.edge_widths = np.asarray(edge_widths, dtype=float)
+        self.vertex_labels = vertex_labels
+        self.edge_labels = edge_labels
+        # Longest edges first, they carry the structure when decimating
+        lengths = np.linalg.norm(self.segments[:, 1] - self.segments[:, 0], axis=1)
+        self.edge_rank = np.argsort(-lengths, kind="stable")
+        self.texts: List[Any] = []
+        self._limits: Optional[Tuple[float, ...]] = None
+
+        self.edge_collection = LineCollection(
+            [], colors="gray", linewidths=[], zorder=1
+        )
+        ax.add_collection(self.edge_collection)
+        self.vertex_scatter = ax.scatter(
+            coords[:, 0], coords[:, 1], s=60, c=vertex_colors, zorder=2
+        )
+        ax.autoscale_view()
+        for spine in ax.spines.values():
+            spine.set_visible(False)
+
+        ax.callbacks.connect("xlim_changed", self._on_limits_changed)
+        ax.callbacks.connect("ylim_changed", self._on_limits_changed)
+        ax.figure.canvas.mpl_connect("scroll_event", self._on_scroll)
+        self.update()
+
+    def _on_limits_changed(self, _ax: Any) -> None:
+        self.update()
+
+    def _on_scroll(self, event: Any) -> None:
+        if event.inaxes is not self.ax or event.xdata is None:
+            return
+        scale = 1 / ZOOM_STEP if event.button == "up" else ZOOM_STEP
+        x0, x1 = self.ax.get_xlim()
+        y0, y1 = self.ax.get_ylim()
+        self.ax.set_xlim(
+            event.xdata - (event.xdata - x0) * scale,
+            event.xdata + (x1 - event.xdata) * scale,
+        )
+        self.ax.set_ylim(
+            event.ydata - (event.ydata - y0) * scale,
+            event.ydata + (y1 - event.ydata) * scale,
+        )
+        self.ax.figure.canvas.draw_idle()
+
+    def update(self) -> None:
+        """Rebuild the edge subset and labels for the current view"""
+        x0, x1 = sorted(self.ax.get_xlim())
+        y0, y1 = sorted(self.ax.get_ylim())
+        limits = (x0, x1, y0, y1)
+        if limits == self._limits:
+            return
+        self._limits = limits
+
+        x, y = self.coords[:, 0], self.coords[:, 1]
+        visible_vertices = (x >= x0) & (x <= x1) & (y >= y0) & (y <= y1)
+        visible_edges = visible_vertices[self.edges].any(axis=1)
+
+        ranked = self.edge_rank[visible_edges[self.edge_rank]]
+        drawn = np.sort(ranked[:MAX_DRAWN_EDGES])
+        self.edge_collection.set_segments(self.segments[drawn])
+        self.edge_collection.set_linewidths(self.edge_widths[drawn])
+
+        for text in self.texts:
+            text.remove()
+        self.texts = []
+
+        vertex_ids = np.flatnonzero(visible_vertices)
+        if len(vertex_ids) <= LABEL_VERTEX_THRESHOLD:
+            for i in vertex_ids:
+                self.texts.append(
+                    self.ax.annotate(
+                        self.vertex_labels[i],
+                        self.coords[i],
+                        xytext=(6, -6),
+                        textcoords="offset points",
+                        fontsize=10,
+                        zorder=3,
+                    )
+                )
+        if len(drawn) <= LABEL_EDGE_THRESHOLD:
+            for k in drawn:
+                start, end = self.segments[k]
+                self.texts.append(
+                    self.ax.text(
+                        *(start + (end - start) * 0.25),
+                        self.edge_labels[k],
+                        fontsize=8,
+                        color="black",
+                        zorder=3,
+                    )
+                )
 
 
 def plot_graph(
@@ -16,12 +271,17 @@ def plot_graph(
     df_ruas: pd.DataFrame,
     fig: Optional[Figure] = None,
     route_log: Optional[List[Any]] = None,
+    renderer: str = "auto",
+    layout_base: Optional[str] = None,
 ) -> Figure:
     """
     Plots the graph using matplotlib and returns the figure.
+    renderer: "igraph", "fast" (batched, level of detail) or "auto", which
+    picks "fast" above FAST_RENDER_EDGE_THRESHOLD edges.
+    layout_base: key of the layout to start from (see get_layout).
     """
     if fig is None:
-        fig = plt.figure(figsize=(10, 10))
+        fig = Figure(figsize=(10, 10))
 
     ax = fig.add_subplot(111)
 
@@ -57,8 +317,9 @@ def plot_graph(
     larguras_visuais = [t / max_tempo * 8 for t in tempo_transporte]
 
     # Vertex colors based on priority and route
-    cmap = plt.get_cmap("viridis")
+    cmap = mpl.colormaps["viridis"]
     norm = mpl.colors.Normalize(vmin=min(prioridades), vmax=max(prioridades))
+    cores_por_prioridade = cmap(norm(np.asarray(prioridades, dtype=float)))
     cores_dos_vertices = []
 
     # Create set of visited patients for highlighting
@@ -71,56 +332,247 @@ def plot_graph(
             if route_log and f"P{i:03d}" in visited_patients:
                 cores_dos_vertices.append("orange")  # Highlight visited patients
             else:
-                cores_dos_vertices.append(cmap(norm(prioridade)))
+                cores_dos_vertices.append(tuple(cores_por_prioridade[i]))
         else:
             cores_dos_vertices.append("red")
 
-    # Layout
-    layout = g.layout("fr")
+    # Layout (cached, seeded from the layout_base network when edited)
+    layout, fig.scitech_layout_key = get_layout(g, pares_partida_chegada, layout_base)
+
+    # Kept on the figure for overlays drawn later on top of the base network
+    fig.scitech_layout = np.asarray(layout.coords, dtype=float).reshape(-1, 2)
+
+    if renderer == "auto":
+        renderer = "fast" if len(df_ruas) > FAST_RENDER_EDGE_THRESHOLD else "igraph"
 
     # Plot
-    ig.plot(
-        g,
-        target=ax,
-        layout=layout,
-        vertex_size=15,
-        vertex_color=cores_dos_vertices,
-        vertex_label=labels_vertices,
-        vertex_label_dist=2.5,
-        vertex_label_degree=-np.pi / 4,
-        vertex_label_size=10,
-        edge_width=larguras_visuais,
-        edge_color="gray",
-        edge_label=labels_das_arestas,
-        edge_font_size=8,
-        edge_curved=False,
-        edge_label_position=0.25,
-        edge_label_color="black",
-    )
+    if renderer == "fast":
+        # Kept on the figure so the view callbacks stay alive
+        fig.scitech_lod = LevelOfDetail(
+            ax,
+            fig.scitech_layout,
+            pares_partida_chegada,
+            larguras_visuais,
+            cores_dos_vertices,
+            labels_vertices,
+            labels_das_arestas,
+        )
+    else:
+        ig.plot(
+            g,
+            target=ax,
+            layout=layout,
+            vertex_size=15,
+            vertex_color=cores_dos_vertices,
+            vertex_label=labels_vertices,
+            vertex_label_dist=2.5,
+            vertex_label_degree=-np.pi / 4,
+            vertex_label_size=10,
+            edge_width=larguras_visuais,
+            edge_color="gray",
+            edge_label=labels_das_arestas,
+            edge_font_size=8,
+            edge_curved=False,
+            edge_label_position=0.25,
+            edge_label_color="black",
+        )
 
     ax.set_title("Grafo", fontsize=16)
     ax.set_xticks([])
     ax.set_yticks([])
 
     # Colorbar
-    sm = plt.cm.ScalarMappable(cmap=cmap, norm=norm)
+    sm = mpl.cm.ScalarMappable(cmap=cmap, norm=norm)
     sm.set_array([])
     cbar = fig.colorbar(sm, ax=ax, orientation='vertical', label='Prioridade')
 
     return fig
 
 
+class RouteOverlay:
+    """
+    Route highlighting on top of an existing graph canvas. The base network is
+    drawn once and cached as a background on every full draw; route changes and
+    playback steps only restore that background and blit the route artists.
+    With animated=False the route is drawn as ordinary artists (image export).
+    """
+
+    def __init__(
+        self, canvas: Any, ax: Any, coords: np.ndarray, animated: bool = True
+    ):
+        self.canvas = canvas
+        self.ax = ax
+        self.coords = coords
+        self.route_log: List[Any] = []
+        self.steps = 0
+        self.background = None
+        self._timer = None
+        figure_stale = ax.figure.stale
+
+        self.patient_lines = LineCollection(
+            [], colors="orange", linewidths=4, zorder=4, animated=animated
+        )
+        self.hospital_lines = LineCollection(
+            [], colors="crimson", linewidths=2.5, linestyles="dashed", zorder=4,
+            animated=animated,
+        )
+        ax.add_collection(self.patient_lines)
+        ax.add_collection(self.hospital_lines)
+        self.visited = ax.scatter(
+            np.empty(0), np.empty(0), s=120, c="orange", edgecolors="black",
+            zorder=5, animated=animated,
+        )
+        self.artists = [self.patient_lines, self.hospital_lines, self.visited]
+        if animated:
+            # Full draws skip animated artists: adding them changes no pixels
+            ax.figure.stale = figure_stale
+            canvas.mpl_connect("draw_event", self._on_draw)
+
+    def _on_draw(self, _event: Any) -> None:
+        # Animated artists are skipped by full draws: cache the bare network
+        self.background = self.canvas.copy_from_bbox(self.ax.bbox)
+        self._draw_artists()
+
+    def _draw_artists(self) -> None:
+        for artist in self.artists:
+            self.ax.draw_artist(artist)
+
+    def _segments(self, paths: List[List[int]]) -> List[np.ndarray]:
+        segments = []
+        for path in paths:
+            if len(path) > 1:
+                points = self.coords[np.asarray(path, dtype=np.int64)]
+                segments.extend(np.stack([points[:-1], points[1:]], axis=1))
+        return segments
+
+    def _update_artists(self) -> None:
+        shown = self.route_log[: self.steps]
+        self.patient_lines.set_segments(
+            self._segments([step["path_to_patient"] for step in shown])
+        )
+        self.hospital_lines.set_segments(
+            self._segments([step["path_to_hospital"] for step in shown])
+        )
+        visited = np.asarray([step["to_patient"] for step in shown], dtype=np.int64)
+        self.visited.set_offsets(self.coords[visited].reshape(-1, 2))
+
+    def blit(self) -> None:
+        """Redraw only the route artists over the cached background"""
+        if self.background is None:
+            self.canvas.draw_idle()
+            return
+        self.canvas.restore_region(self.background)
+        self._draw_artists()
+        self.canvas.blit(self.ax.bbox)
+
+    def set_route(self, route_log: Optional[List[Any]], steps: Optional[int] = None) -> None:
+        """Show route_log (its first steps only when given)"""
+        self.stop()
+        self.route_log = list(route_log or [])
+        self.show_steps(len(self.route_log) if steps is None else steps)
+
+    def show_steps(self, steps: int) -> None:
+        self.steps = max(0, min(steps, len(self.route_log)))
+        self._update_artists()
+        self.blit()
+
+    def play(self, interval_ms: int = 600) -> None:
+        """Step-by-step playback of the current route"""
+        self.stop()
+        self.show_steps(0)
+        self._timer = self.canvas.new_timer(interval=interval_ms)
+        self._timer.add_callback(self._next_step)
+        self._timer.start()
+
+    def _next_step(self) -> None:
+        self.show_steps(self.steps + 1)
+        if self.steps >= len(self.route_log):
+            self.stop()
+
+    def stop(self) -> None:
+        if self._timer is not None:
+            self._timer.stop()
+            self._timer = None
+
+
+class PrerenderedMixin:
+    """
+    For Agg canvases showing a figure the render worker has already rasterized
+    (on its FigureCanvasAgg): draw() restores a copy of those pixels instead of
+    drawing the figure again, until it goes stale (zoom) or the canvas size no
+    longer matches. Only public canvas API is used: copy_from_bbox /
+    restore_region and a regular "draw_event".
+    """
+
+    def __init__(self, figure: Figure, *args: Any, **kwargs: Any):
+        drawn = figure.canvas
+        prerendered = isinstance(drawn, FigureCanvasAgg) and not figure.stale
+        super().__init__(figure, *args, **kwargs)
+        self._pristine = None
+        self._pristine_size: Optional[Tuple[int, int, float]] = None
+        if prerendered:
+            # Clean copy of the network: route overlays draw into the buffer
+            self._pristine = drawn.copy_from_bbox(figure.bbox)
+            self._pristine_size = drawn.get_width_height(physical=True) + (figure.dpi,)
+            figure.stale = False
+
+    def _prerendered_size(self) -> bool:
+        return self.get_width_height(physical=True) + (self.figure.dpi,) == self._pristine_size
+
+    def _prerendered(self) -> bool:
+        return self._pristine is not None and not self.figure.stale and self._prerendered_size()
+
+    def draw(self) -> None:
+        if not self._prerendered():
+            self._pristine = None
+            super().draw()
+            return
+        self.restore_region(self._pristine)
+        # Same event as a full draw, so RouteOverlay caches its background
+        self.callbacks.process("draw_event", DrawEvent("draw_event", self, self.get_renderer()))
+        self.blit()
+
+
+class PrerenderedCanvas(PrerenderedMixin, FigureCanvasTkAgg):
+    """
+    FigureCanvasTkAgg for a figure the render worker has already rasterized:
+    embedding (and the <Configure> events that keep the size) only blit the
+    finished pixels. The figure is drawn again only once it goes stale (zoom)
+    or the widget changes size.
+    """
+
+    def __init__(self, figure: Figure, master: Optional[tk.Widget] = None):
+        super().__init__(figure, master=master)
+
+    def resize(self, event: Any) -> None:
+        # set_size_inches marks the figure stale even when the size is kept
+        was_stale = self.figure.stale
+        super().resize(event)
+        if self._pristine is not None and not was_stale and self._prerendered_size():
+            self.figure.stale = False
+
+
 def create_canvas(
     parent: tk.Widget,
     df_pontos: pd.DataFrame,
     df_ruas: pd.DataFrame,
     route_log: Optional[List[Any]] = None,
+    fig: Optional[Figure] = None,
 ) -> FigureCanvasTkAgg:
     """
-    Creates a matplotlib canvas embedded in tkinter.
+    Creates a matplotlib canvas embedded in tkinter, with a RouteOverlay
+    available as canvas.route_overlay for fast route updates.
+    fig can be a figure already built by plot_graph (e.g. by the render worker);
+    when it has been drawn, its pixels are reused (PrerenderedCanvas).
     """
-    fig = plot_graph(df_pontos, df_ruas, route_log=route_log)
-    canvas = FigureCanvasTkAgg(fig, master=parent)
+    if fig is None:
+        fig = plot_graph(df_pontos, df_ruas)
+        canvas = FigureCanvasTkAgg(fig, master=parent)
+    else:
+        canvas = PrerenderedCanvas(fig, master=parent)
+    canvas.route_overlay = RouteOverlay(canvas, fig.axes[0], fig.scitech_layout)
+    if route_log:
+        canvas.route_overlay.set_route(route_log)
     return canvas
 
 
@@ -133,5 +585,7 @@ if __name__ == "__main__":
     df_ruas = pd.read_csv(
         "/home/pedrom/Documentos/SciTech/SciTech/Docs/Dataset de Test/datasets/hard/10/ruas.csv"
     )
-    fig = plot_graph(df_pontos, df_ruas)
+    import matplotlib.pyplot as plt
+
+    plot_graph(df_pontos, df_ruas, fig=plt.figure(figsize=(10, 10)))
     plt.show()
@@ -0,0 +1,124 @@
+"""
+SciTech Ambulance Routing - Compiled Kernels
+============================================
+
+Numba versions of the sequential inner loops that NumPy cannot vectorize:
+the greedy step loop, route cost simulation and the move evaluation of the
+local search. Numba is optional: without it HAS_NUMBA is False and the
+callers in alg keep their NumPy code. USE_NUMBA switches the kernels off at
+run time (benchmarks compare both paths this way).
+"""
+
+import numpy as np
+
+try:
+    import numba  # type: ignore
+
+    HAS_NUMBA = True
+    _jit = numba.njit(cache=True, nogil=True)
+except ImportError:  # pragma: no cover - numba is optional
+    HAS_NUMBA = False
+
+    def _jit(function):  # type: ignore
+        return function
+
+
+USE_NUMBA = HAS_NUMBA
+
+
+@_jit
+def greedy_order(
+    dist, patient_ids, care_times, hospital_dist, priorities, nearest_hospital,
+    current_node, time_left, available,
+):
+    """
+    Same selection as greedy_order_matrices (highest priority, then smallest
+    need, then lowest index). available is updated in place. Returns the
+    patient indices in visiting order.
+    """
+    n_vertices = dist.shape[0]
+    n_patients = len(patient_ids)
+    order = np.empty(n_patients, dtype=np.int64)
+    count = 0
+    while time_left > 0:
+        best = -1
+        best_priority = 0.0
+        best_need = 0.0
+        for k in range(n_patients):
+            if not available[k] or patient_ids[k] >= n_vertices:
+                continue
+            if current_node < 0 or current_node >= n_vertices:
+                continue
+            need = dist[current_node, patient_ids[k]] + care_times[k] + hospital_dist[k]
+            if need > time_left:
+                continue
+            if (
+                best < 0
+                or priorities[k] > best_priority
+                or (priorities[k] == best_priority and need < best_need)
+            ):
+                best, best_priority, best_need = k, priorities[k], need
+        if best < 0:
+            break
+        order[count] = best
+        count += 1
+        time_left -= best_need
+        current_node = nearest_hospital[best]
+        available[best] = False
+    return order[:count]
+
+
+@_jit
+def route_cost(start, trans, base, order):
+    """Time used by a visiting order (see alg._transition_costs)"""
+    if len(order) == 0:
+        return 0.0
+    total = start[order[0]] + base[order[0]]
+    for i in range(1, len(order)):
+        total += trans[order[i - 1], order[i]] + base[order[i]]
+    return total
+
+
+@_jit
+def insertion_deltas(start, trans, base, order, candidates):
+    """Extra time of inserting each candidate at each position (|candidates| x n+1)"""
+    n = len(order)
+    deltas = np.empty((len(candidates), n + 1))
+    for c in range(len(candidates)):
+        x = candidates[c]
+        for position in range(n + 1):
+            into = start[x] if position == 0 else trans[order[position - 1], x]
+            if position < n:
+                nxt = order[position]
+                old = start[nxt] if position == 0 else trans[order[position - 1], nxt]
+                out = trans[x, nxt]
+            else:
+                old = 0.0
+                out = 0.0
+            deltas[c, position] = into + out - old + base[x]
+    return deltas
+
+
+@_jit
+def best_relocation(start, trans, base, order, tolerance):
+    """
+    First patient (in order) whose best reinsertion position cuts the route
+    time by more than tolerance. Returns (i, position in the order without i),
+    or (-1, -1) when no relocation improves.
+    """
+    n = len(order)
+    current = route_cost(start, trans, base, order)
+    rest = np.empty(max(n - 1, 0), dtype=np.int64)
+    moved = np.empty(1, dtype=np.int64)
+    for i in range(n):
+        m = 0
+        for j in range(n):
+            if j != i:
+                rest[m] = order[j]
+                m += 1
+        moved[0] = order[i]
+        deltas = insertion_deltas(start, trans, base, rest, moved)[0]
+        position = int(np.argmin(deltas))
+        if route_cost(start, trans, base, rest) + deltas[position] < current - tolerance:
+            return i, position
+    return -1, -1
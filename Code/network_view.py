@@ -0,0 +1,537 @@
+"""
+SciTech Ambulance Routing - Native Network Viewer
+=================================================
+
+Alternative to the matplotlib canvas of graph_view for very large networks:
+the network is drawn directly on a tk.Canvas from the cached layout
+coordinates. A uniform grid index finds the vertices and streets in view and
+under the mouse. Pan and zoom move the existing items at once; once the view
+settles, only the items entering or leaving the view are created or deleted.
+Clicking a point or street shows its details.
+"""
+
+import tkinter as tk
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import matplotlib as mpl
+import numpy as np
+import pandas as pd
+
+from .graph_view import (  # type: ignore
+    LABEL_EDGE_THRESHOLD,
+    LABEL_VERTEX_THRESHOLD,
+    MAX_DRAWN_EDGES,
+    ZOOM_STEP,
+    layout_coordinates,
+)
+
+GRID_ITEMS_PER_CELL = 8  # Average vertices + edges per grid cell
+LONG_EDGE_CELLS = 64  # Edges overlapping more cells are tested on every query instead
+MAX_DRAWN_VERTICES = 20000  # Vertices in view above this are decimated
+VIEW_MARGIN = 0.25  # Items this fraction of the view beyond the edges are kept drawn
+REDRAW_DELAY_MS = 80  # Redraw the view this long after the last pan/zoom event
+PICK_RADIUS_PX = 6  # Click distance for picking a vertex or street
+DRAG_THRESHOLD_PX = 3  # Pointer movement that turns a click into a pan
+VERTEX_RADIUS_PX = 4
+FIT_PADDING_PX = 20
+
+
+class GridIndex:
+    """
+    Uniform grid over the layout: each cell lists the vertices inside it and
+    the edges whose bounding box overlaps it (CSR arrays, built with NumPy).
+    The few edges spanning a large part of the layout are kept apart.
+    """
+
+    def __init__(
+        self,
+        coords: np.ndarray,
+        edges: np.ndarray,
+        items_per_cell: int = GRID_ITEMS_PER_CELL,
+    ):
+        self.coords = coords
+        self.edges = edges
+        low = coords.min(axis=0) if len(coords) else np.zeros(2)
+        high = coords.max(axis=0) if len(coords) else np.ones(2)
+        cells_per_side = max(1, int(np.sqrt((len(coords) + len(edges)) / items_per_cell)))
+        self.origin = low
+        self.cell_size = max(float((high - low).max()) / cells_per_side, 1e-9)
+        self.shape = (np.floor((high - low) / self.cell_size).astype(np.int64) + 1).tolist()
+
+        cx, cy = self._cells(coords)
+        self.vertex_starts, self.vertex_items = self._bucket(
+            cx * self.shape[1] + cy, np.arange(len(coords))
+        )
+
+        ends = coords[edges] if len(edges) else np.zeros((0, 2, 2))
+        self.edge_low = ends.min(axis=1)
+        self.edge_high = ends.max(axis=1)
+        cx0, cy0 = self._cells(self.edge_low)
+        cx1, cy1 = self._cells(self.edge_high)
+        widths, heights = cx1 - cx0 + 1, cy1 - cy0 + 1
+        counts = widths * heights
+        long_edges = counts > LONG_EDGE_CELLS
+        self.long_edges = np.flatnonzero(long_edges)
+        counts[long_edges] = 0
+        # One entry per (edge, overlapped cell)
+        owner = np.repeat(np.arange(len(edges)), counts)
+        local = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        column = np.repeat(cx0, counts) + local // np.repeat(heights, counts)
+        row = np.repeat(cy0, counts) + local % np.repeat(heights, counts)
+        self.edge_starts, self.edge_items = self._bucket(column * self.shape[1] + row, owner)
+
+    def _cells(self, points: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        cells = np.floor((points - self.origin) / self.cell_size).astype(np.int64)
+        cells = np.clip(cells, 0, np.array(self.shape) - 1)
+        return cells[:, 0], cells[:, 1]
+
+    def _bucket(self, cell_ids: np.ndarray, items: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        order = np.argsort(cell_ids, kind="stable")
+        starts = np.searchsorted(cell_ids[order], np.arange(self.shape[0] * self.shape[1] + 1))
+        return starts, items[order]
+
+    def _candidates(
+        self, starts: np.ndarray, items: np.ndarray, low: np.ndarray, high: np.ndarray
+    ) -> np.ndarray:
+        """Items of every cell overlapping the world rectangle low-high"""
+        if (high < self.origin).any() or (
+            low > self.origin + np.array(self.shape) * self.cell_size
+        ).any():
+            return np.empty(0, dtype=np.int64)
+        cx0, cy0 = (int(v[0]) for v in self._cells(low[None, :]))
+        cx1, cy1 = (int(v[0]) for v in self._cells(high[None, :]))
+        # Cells of one grid column are contiguous: one slice per column
+        chunks = [
+            items[starts[cx * self.shape[1] + cy0] : starts[cx * self.shape[1] + cy1 + 1]]
+            for cx in range(cx0, cx1 + 1)
+        ]
+        return np.concatenate(chunks) if chunks else np.empty(0, dtype=np.int64)
+
+    def vertices_in(self, low: np.ndarray, high: np.ndarray) -> np.ndarray:
+        """Sorted ids of the vertices inside the rectangle"""
+        ids = self._candidates(self.vertex_starts, self.vertex_items, low, high)
+        points = self.coords[ids]
+        inside = ((points >= low) & (points <= high)).all(axis=1)
+        return np.sort(ids[inside])
+
+    def edges_in(self, low: np.ndarray, high: np.ndarray) -> np.ndarray:
+        """Sorted ids of the edges whose bounding box overlaps the rectangle"""
+        ids = np.unique(
+            np.concatenate(
+                [self._candidates(self.edge_starts, self.edge_items, low, high), self.long_edges]
+            )
+        )
+        overlaps = ((self.edge_low[ids] <= high) & (self.edge_high[ids] >= low)).all(axis=1)
+        return ids[overlaps]
+
+    def nearest_vertex(self, point: np.ndarray, radius: float) -> Optional[int]:
+        ids = self.vertices_in(point - radius, point + radius)
+        if not len(ids):
+            return None
+        distances = np.linalg.norm(self.coords[ids] - point, axis=1)
+        best = int(np.argmin(distances))
+        return int(ids[best]) if distances[best] <= radius else None
+
+    def nearest_edge(self, point: np.ndarray, radius: float) -> Optional[int]:
+        ids = self.edges_in(point - radius, point + radius)
+        if not len(ids):
+            return None
+        start = self.coords[self.edges[ids, 0]]
+        direction = self.coords[self.edges[ids, 1]] - start
+        length2 = np.maximum((direction ** 2).sum(axis=1), 1e-18)
+        t = np.clip(((point - start) * direction).sum(axis=1) / length2, 0.0, 1.0)
+        distances = np.linalg.norm(start + direction * t[:, None] - point, axis=1)
+        best = int(np.argmin(distances))
+        return int(ids[best]) if distances[best] <= radius else None
+
+
+class NetworkCanvas(tk.Canvas):
+    """
+    tk.Canvas network viewer. Drag to pan, scroll to zoom, click to inspect.
+    Offers the parts of the FigureCanvasTkAgg interface the UI uses
+    (get_tk_widget, draw, route_overlay) so both viewers are interchangeable.
+    """
+
+    def __init__(
+        self,
+        parent: tk.Misc,
+        coords: np.ndarray,
+        edges: np.ndarray,
+        edge_widths: np.ndarray,
+        vertex_colors: List[str],
+        vertex_labels: List[str],
+        edge_labels: List[str],
+        vertex_info: List[str],
+        edge_info: List[str],
+        on_pick: Optional[Callable[[str, int], None]] = None,
+        **kwargs: Any,
+    ):
+        kwargs.setdefault("background", "white")
+        kwargs.setdefault("highlightthickness", 0)
+        super().__init__(parent, **kwargs)
+        self.layout = coords
+        self.edges = edges
+        self.edge_widths = edge_widths
+        self.vertex_colors = vertex_colors
+        self.vertex_labels = vertex_labels
+        self.edge_labels = edge_labels
+        self.vertex_info = vertex_info
+        self.edge_info = edge_info
+        self.on_pick = on_pick
+        self.index = GridIndex(coords, edges)
+
+        # Longest edges first when decimating (as LevelOfDetail), hospitals and
+        # high priorities first among vertices
+        lengths = np.linalg.norm(coords[edges[:, 1]] - coords[edges[:, 0]], axis=1)
+        self.edge_rank = np.empty(len(edges), dtype=np.int64)
+        self.edge_rank[np.argsort(-lengths, kind="stable")] = np.arange(len(edges))
+        self.vertex_rank = np.arange(len(coords))
+
+        # Screen = world * zoom + offset, with y pointing down
+        self.zoom = 1.0
+        self.offset = np.zeros(2)
+        self._fitted = False
+        self._drawn_vertices: Dict[int, int] = {}
+        self._drawn_edges: Dict[int, int] = {}
+        self._drawn_zoom = 1.0
+        self._redraw_job: Optional[str] = None
+        self._press: Optional[Tuple[int, int]] = None
+        self._last: Tuple[int, int] = (0, 0)
+        self._dragged = False
+        self.picked: Optional[Tuple[str, int]] = None
+
+        # Route overlay state (same interface as graph_view.RouteOverlay)
+        self.route_log: List[Any] = []
+        self.steps = 0
+        self._play_job: Optional[str] = None
+
+        self.bind("<Configure>", self._on_configure)
+        self.bind("<ButtonPress-1>", self._on_press)
+        self.bind("<B1-Motion>", self._on_drag)
+        self.bind("<ButtonRelease-1>", self._on_release)
+        self.bind("<MouseWheel>", self._on_wheel)
+        self.bind("<Button-4>", lambda event: self._zoom_at(event.x, event.y, ZOOM_STEP))
+        self.bind("<Button-5>", lambda event: self._zoom_at(event.x, event.y, 1 / ZOOM_STEP))
+
+    # -- FigureCanvasTkAgg compatibility ------------------------------------
+
+    def get_tk_widget(self) -> "NetworkCanvas":
+        return self
+
+    def draw(self) -> None:
+        self.redraw()
+
+    @property
+    def route_overlay(self) -> "NetworkCanvas":
+        return self
+
+    # -- View transform -----------------------------------------------------
+
+    def to_screen(self, points: np.ndarray) -> np.ndarray:
+        screen = points * self.zoom + self.offset
+        screen[..., 1] = self.offset[1] - points[..., 1] * self.zoom
+        return screen
+
+    def to_world(self, x: float, y: float) -> np.ndarray:
+        return np.array([(x - self.offset[0]) / self.zoom, (self.offset[1] - y) / self.zoom])
+
+    def fit(self) -> None:
+        """Zoom and center so the whole network fits the canvas"""
+        width, height = max(self.winfo_width(), 1), max(self.winfo_height(), 1)
+        low, high = self.index.origin, self.layout.max(axis=0) if len(self.layout) else np.ones(2)
+        span = np.maximum(high - low, 1e-9)
+        self.zoom = float(
+            min((width - 2 * FIT_PADDING_PX) / span[0], (height - 2 * FIT_PADDING_PX) / span[1])
+        )
+        self.zoom = max(self.zoom, 1e-9)
+        center = (low + high) / 2
+        self.offset = np.array(
+            [width / 2 - center[0] * self.zoom, height / 2 + center[1] * self.zoom]
+        )
+        self.delete("all")
+        self._drawn_vertices.clear()
+        self._drawn_edges.clear()
+        self._drawn_zoom = self.zoom
+        self.redraw()
+
+    def _view_rectangle(self) -> Tuple[np.ndarray, np.ndarray]:
+        width, height = self.winfo_width(), self.winfo_height()
+        margin_x, margin_y = width * VIEW_MARGIN, height * VIEW_MARGIN
+        corner_a = self.to_world(-margin_x, height + margin_y)
+        corner_b = self.to_world(width + margin_x, -margin_y)
+        return np.minimum(corner_a, corner_b), np.maximum(corner_a, corner_b)
+
+    # -- Drawing ------------------------------------------------------------
+
+    @staticmethod
+    def _decimate(ids: np.ndarray, rank: np.ndarray, limit: int) -> np.ndarray:
+        if len(ids) <= limit:
+            return ids
+        return np.sort(ids[np.argsort(rank[ids], kind="stable")[:limit]])
+
+    def _vertex_box(self, point: np.ndarray, radius: float = VERTEX_RADIUS_PX) -> List[float]:
+        return [point[0] - radius, point[1] - radius, point[0] + radius, point[1] + radius]
+
+    def redraw(self) -> None:
+        """Bring the drawn items in line with the current view"""
+        self._redraw_job = None
+        if not self._fitted:
+            return
+        low, high = self._view_rectangle()
+        visible_edges = self._decimate(self.index.edges_in(low, high), self.edge_rank, MAX_DRAWN_EDGES)
+        visible_vertices = self._decimate(
+            self.index.vertices_in(low, high), self.vertex_rank, MAX_DRAWN_VERTICES
+        )
+
+        edge_set = set(visible_edges.tolist())
+        for k in [k for k in self._drawn_edges if k not in edge_set]:
+            self.delete(self._drawn_edges.pop(k))
+        new_edges = [k for k in visible_edges.tolist() if k not in self._drawn_edges]
+        if new_edges:
+            segments = self.to_screen(self.layout[self.edges[new_edges]])
+            for k, segment in zip(new_edges, segments.tolist()):
+                self._drawn_edges[k] = self.create_line(
+                    *segment[0], *segment[1],
+                    fill="gray", width=max(1.0, float(self.edge_widths[k])), tags=("edge",),
+                )
+
+        vertex_set = set(visible_vertices.tolist())
+        for i in [i for i in self._drawn_vertices if i not in vertex_set]:
+            self.delete(self._drawn_vertices.pop(i))
+        screen = self.to_screen(self.layout[visible_vertices])
+        rescaled = self.zoom != self._drawn_zoom
+        for i, point in zip(visible_vertices.tolist(), screen):
+            item = self._drawn_vertices.get(i)
+            if item is None:
+                self._drawn_vertices[i] = self.create_oval(
+                    *self._vertex_box(point),
+                    fill=self.vertex_colors[i], outline="", tags=("vertex",),
+                )
+            elif rescaled:
+                # canvas.scale also grew the circles: restore their pixel size
+                self.coords(item, *self._vertex_box(point))
+        self._drawn_zoom = self.zoom
+
+        self.delete("label")
+        if len(visible_vertices) <= LABEL_VERTEX_THRESHOLD:
+            for i, point in zip(visible_vertices.tolist(), screen):
+                self.create_text(
+                    point[0] + 6, point[1] + 6, text=self.vertex_labels[i],
+                    anchor=tk.NW, font=("Arial", 10), tags=("label",),
+                )
+        if len(visible_edges) <= LABEL_EDGE_THRESHOLD:
+            segments = self.to_screen(self.layout[self.edges[visible_edges]])
+            for k, segment in zip(visible_edges.tolist(), segments):
+                x, y = segment[0] + (segment[1] - segment[0]) * 0.25
+                self.create_text(
+                    x, y, text=self.edge_labels[k], font=("Arial", 8), tags=("label",)
+                )
+
+        self._draw_route()
+        self._draw_pick()
+        self.tag_lower("edge")
+
+    def _schedule_redraw(self) -> None:
+        if self._redraw_job is not None:
+            self.after_cancel(self._redraw_job)
+        self._redraw_job = self.after(REDRAW_DELAY_MS, self.redraw)
+
+    # -- Interaction --------------------------------------------------------
+
+    def _on_configure(self, _event: Any) -> None:
+        if not self._fitted and self.winfo_width() > 1:
+            self._fitted = True
+            self.fit()
+        else:
+            self._schedule_redraw()
+
+    def _on_press(self, event: Any) -> None:
+        self._press = self._last = (event.x, event.y)
+        self._dragged = False
+
+    def _on_drag(self, event: Any) -> None:
+        if self._press is None:
+            return
+        if abs(event.x - self._press[0]) + abs(event.y - self._press[1]) > DRAG_THRESHOLD_PX:
+            self._dragged = True
+        dx, dy = event.x - self._last[0], event.y - self._last[1]
+        self._last = (event.x, event.y)
+        # Existing items follow at once; missing ones are added after the pan
+        self.move("all", dx, dy)
+        self.offset += (dx, dy)
+        self._schedule_redraw()
+
+    def _on_release(self, event: Any) -> None:
+        if self._press is not None and not self._dragged:
+            self.pick(event.x, event.y)
+        self._press = None
+
+    def _on_wheel(self, event: Any) -> None:
+        self._zoom_at(event.x, event.y, ZOOM_STEP if event.delta > 0 else 1 / ZOOM_STEP)
+
+    def _zoom_at(self, x: float, y: float, factor: float) -> None:
+        self.scale("all", x, y, factor, factor)
+        self.zoom *= factor
+        self.offset = (self.offset - (x, y)) * factor + (x, y)
+        self._schedule_redraw()
+
+    def pick(self, x: float, y: float) -> Optional[Tuple[str, int]]:
+        """Select the vertex (or else the street) under screen point x, y"""
+        point = self.to_world(x, y)
+        radius = PICK_RADIUS_PX / self.zoom
+        vertex = self.index.nearest_vertex(point, radius)
+        if vertex is not None:
+            self.picked = ("vertex", vertex)
+        else:
+            edge = self.index.nearest_edge(point, radius)
+            self.picked = ("edge", edge) if edge is not None else None
+        self._draw_pick()
+        if self.picked is not None and self.on_pick is not None:
+            self.on_pick(*self.picked)
+        return self.picked
+
+    def _draw_pick(self) -> None:
+        self.delete("pick")
+        if self.picked is None:
+            return
+        kind, index = self.picked
+        if kind == "vertex":
+            point = self.to_screen(self.layout[index])
+            self.create_oval(
+                *self._vertex_box(point, VERTEX_RADIUS_PX + 4),
+                outline="blue", width=2, tags=("pick",),
+            )
+            text = self.vertex_info[index]
+        else:
+            segment = self.to_screen(self.layout[self.edges[index]])
+            self.create_line(*segment.ravel(), fill="blue", width=3, tags=("pick",))
+            point = segment.mean(axis=0)
+            text = self.edge_info[index]
+        label = self.create_text(
+            point[0] + 10, point[1] - 10, text=text, anchor=tk.SW,
+            font=("Arial", 10), tags=("pick",),
+        )
+        box = self.bbox(label)
+        if box:
+            background = self.create_rectangle(
+                box[0] - 3, box[1] - 2, box[2] + 3, box[3] + 2,
+                fill="lightyellow", outline="gray", tags=("pick",),
+            )
+            self.tag_lower(background, label)
+
+    # -- Route overlay ------------------------------------------------------
+
+    def _draw_route(self) -> None:
+        self.delete("route")
+        shown = self.route_log[: self.steps]
+        for key, options in (
+            ("path_to_patient", {"fill": "orange", "width": 4}),
+            ("path_to_hospital", {"fill": "crimson", "width": 2.5, "dash": (6, 4)}),
+        ):
+            for step in shown:
+                if len(step[key]) > 1:
+                    points = self.to_screen(self.layout[np.asarray(step[key], dtype=np.int64)])
+                    self.create_line(*points.ravel(), tags=("route",), **options)
+        for step in shown:
+            point = self.to_screen(self.layout[int(step["to_patient"])])
+            self.create_oval(
+                *self._vertex_box(point, VERTEX_RADIUS_PX + 3),
+                fill="orange", outline="black", tags=("route",),
+            )
+        self.tag_raise("pick")
+
+    def set_route(self, route_log: Optional[List[Any]], steps: Optional[int] = None) -> None:
+        """Show route_log (its first steps only when given)"""
+        self.stop()
+        self.route_log = list(route_log or [])
+        self.show_steps(len(self.route_log) if steps is None else steps)
+
+    def show_steps(self, steps: int) -> None:
+        self.steps = max(0, min(steps, len(self.route_log)))
+        self._draw_route()
+
+    def play(self, interval_ms: int = 600) -> None:
+        """Step-by-step playback of the current route"""
+        self.stop()
+        self.show_steps(0)
+        self._play_job = self.after(interval_ms, self._next_step, interval_ms)
+
+    def _next_step(self, interval_ms: int) -> None:
+        self.show_steps(self.steps + 1)
+        self._play_job = (
+            self.after(interval_ms, self._next_step, interval_ms)
+            if self.steps < len(self.route_log)
+            else None
+        )
+
+    def stop(self) -> None:
+        if self._play_job is not None:
+            self.after_cancel(self._play_job)
+            self._play_job = None
+
+    def destroy(self) -> None:
+        """Cancel the pending redraw and playback before the widget goes away"""
+        self.stop()
+        if self._redraw_job is not None:
+            self.after_cancel(self._redraw_job)
+            self._redraw_job = None
+        super().destroy()
+
+
+def create_network_canvas(
+    parent: tk.Misc,
+    df_pontos: pd.DataFrame,
+    df_ruas: pd.DataFrame,
+    route_log: Optional[List[Any]] = None,
+    coords: Optional[np.ndarray] = None,
+    on_pick: Optional[Callable[[str, int], None]] = None,
+) -> NetworkCanvas:
+    """
+    Native counterpart of graph_view.create_canvas, with the same colors and
+    labels as plot_graph. coords can be precomputed by
+    RenderWorker.submit_layout (the layout is the slow part).
+    """
+    if coords is None:
+        coords = layout_coordinates(df_pontos, df_ruas)
+    edges = df_ruas[["ponto_origem", "ponto_destino"]].to_numpy(np.int64).reshape(-1, 2)
+    times = df_ruas["tempo_transporte"].to_numpy(float)
+    tipo = df_pontos["tipo"].to_numpy()
+    nomes = df_pontos["nome"].tolist()
+    prioridades = df_pontos["prioridade"].to_numpy(float)
+    cuidados = df_pontos["tempo_cuidados_minimos"].tolist()
+
+    cmap = mpl.colormaps["viridis"]
+    norm = mpl.colors.Normalize(vmin=prioridades.min(), vmax=prioridades.max())
+    colors = [mpl.colors.to_hex(c) for c in cmap(norm(prioridades))]
+    is_hospital = tipo == "hospital"
+    vertex_colors = ["red" if is_hospital[i] else colors[i] for i in range(len(tipo))]
+    vertex_labels = [
+        f"{i}" if is_hospital[i] else f"{i}-CM: {cuidados[i]}m" for i in range(len(tipo))
+    ]
+    vertex_info = [
+        f"Hospital {i}: {nomes[i]}"
+        if is_hospital[i]
+        else f"Patient {i}: {nomes[i]}\nPriority {prioridades[i]:g}, care {cuidados[i]}m"
+        for i in range(len(tipo))
+    ]
+    edge_labels = [f"{t:g}" for t in times]
+    edge_info = [f"Street {a}-{b}: {t:g} min" for (a, b), t in zip(edges.tolist(), times)]
+
+    canvas = NetworkCanvas(
+        parent,
+        coords,
+        edges,
+        times / (times.max() if len(times) else 1.0) * 8,
+        vertex_colors,
+        vertex_labels,
+        edge_labels,
+        vertex_info,
+        edge_info,
+        on_pick=on_pick,
+    )
+    # Hospitals, then higher priorities, stay visible longest when decimating
+    order = np.lexsort((-np.nan_to_num(prioridades), ~is_hospital))
+    canvas.vertex_rank[order] = np.arange(len(order))
+    if route_log:
+        canvas.set_route(route_log)
+    return canvas
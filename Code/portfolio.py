@@ -0,0 +1,419 @@
+"""
+SciTech Ambulance Routing - Solver Portfolio
+============================================
+
+Races several strategies (local search with different seeds, beam search and
+branch and bound) in a process pool until a time budget ends. The patient to
+patient cost arrays are written once as .npy files and memory-mapped by every
+worker, and the best priority found so far is shared so that beam search and
+branch and bound can prune against it.
+"""
+
+import multiprocessing
+import os
+import tempfile
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, wait
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+import igraph  # type: ignore
+
+from .alg import (  # type: ignore
+    CancellationToken,
+    _AnytimeSearch,
+    _is_cancelled,
+    _transition_costs,
+    greedy_order_matrices,
+    precompute_routing_matrices,
+    route_log_from_order,
+)
+from .csr_graph import CSRGraph  # type: ignore
+
+STRATEGIES = ("local_search", "exact", "beam")
+BEAM_WIDTHS = (32, 128, 512)
+PORTFOLIO_POLL_S = 0.005  # How often the coordinator checks finished strategies
+DOMINANCE_TABLE_SIZE = 200000  # States remembered by branch and bound
+# Memory-backed temp folder for the shared arrays when available
+SHARED_DIR = "/dev/shm" if os.path.isdir("/dev/shm") else None
+ARRAY_NAMES = ("start", "trans", "base", "priorities")
+
+_shared: Dict[str, Any] = {}  # Per worker process: shared incumbent and stop flag
+
+
+class _StopSearch(Exception):
+    pass
+
+
+class _SharedStop:
+    """Cancellation token view (like CancellationToken) of the shared stop flag"""
+
+    @property
+    def cancelled(self) -> bool:
+        return bool(_shared["stop"].value)
+
+
+def _init_worker(incumbent: Any, stop: Any) -> None:
+    _shared["incumbent"] = incumbent
+    _shared["stop"] = stop
+    _warm_up_kernels()
+
+
+def _warm_up_kernels() -> None:
+    """
+    Run greedy and local search once on a tiny problem, with arrays like the
+    real ones (the strategies get read-only memory maps), so the Numba
+    kernels are compiled or loaded now instead of inside a solve's budget.
+    """
+    ruas = pd.DataFrame(
+        {"ponto_origem": [0, 1, 2], "ponto_destino": [1, 2, 3], "tempo_transporte": [1.0, 1.0, 1.0]}
+    )
+    pontos = pd.DataFrame(
+        {
+            "id": [3, 1, 2, 0],
+            "tipo": ["hospital", "paciente", "paciente", "paciente"],
+            "prioridade": [np.nan, 1, 2, 3],
+            "tempo_cuidados_minimos": [0, 1, 1, 1],
+        }
+    )
+    matrices = precompute_routing_matrices(CSRGraph.from_dataframe(ruas), pontos)
+    greedy = greedy_order_matrices(matrices, 0, 8.0)
+    costs = _transition_costs(matrices, 0)
+    # As SolverPortfolio.solve scores the greedy baseline
+    _AnytimeSearch(costs, matrices["priorities"], 8.0, 0.0, None, 0).score(greedy)
+    arrays = [np.array(a) for a in costs] + [matrices["priorities"].astype(np.float64)]
+    for array in arrays:
+        array.flags.writeable = False
+    search = _AnytimeSearch(
+        (arrays[0], arrays[1], arrays[2]), arrays[3], 8.0, time.perf_counter() + 1.0, None, 0
+    )
+    search.improve(search.ruin_recreate(search.improve(greedy)))
+
+
+def _incumbent() -> float:
+    return _shared["incumbent"].value
+
+
+def _publish(priority: float) -> None:
+    incumbent = _shared["incumbent"]
+    with incumbent.get_lock():
+        if priority > incumbent.value:
+            incumbent.value = priority
+
+
+def _warm_up() -> int:
+    return os.getpid()
+
+
+class _Bound:
+    """
+    Optimistic priority bound: fractional knapsack of the remaining patients,
+    each weighted by its cheapest possible arrival plus care and return.
+    """
+
+    def __init__(self, search: _AnytimeSearch):
+        cheapest_arrival = np.minimum(search.start, search.trans.min(axis=0))
+        self.weights = np.maximum(cheapest_arrival + search.base, 1e-12)
+        self.priorities = search.priorities
+        self.by_ratio = np.argsort(-self.priorities / self.weights, kind="stable")
+
+    def __call__(self, visited: np.ndarray, slack: float, priority: float) -> float:
+        candidates = self.by_ratio[~visited[self.by_ratio]]
+        candidates = candidates[self.weights[candidates] <= slack + 1e-9]
+        cumulative = np.cumsum(self.weights[candidates])
+        full = int(np.searchsorted(cumulative, slack + 1e-9, side="right"))
+        value = priority + self.priorities[candidates[:full]].sum()
+        if full < len(candidates):
+            used = cumulative[full - 1] if full else 0.0
+            value += self.priorities[candidates[full]] * (slack - used) / self.weights[candidates[full]]
+        return float(value)
+
+
+def _better(a: Tuple[float, float], b: Tuple[float, float]) -> bool:
+    """Higher priority, then lower time (scores are (priority, -time))"""
+    return a[0] > b[0] or (a[0] == b[0] and a[1] > b[1] + 1e-9)
+
+
+def _local_search(search: _AnytimeSearch, greedy: List[int]) -> List[int]:
+    best = current = search.improve(greedy)
+    best_score = search.score(best)
+    _publish(best_score[0])
+    while not search.stopped():
+        candidate = search.improve(search.ruin_recreate(current))
+        score = search.score(candidate)
+        if _better(score, best_score):
+            best, best_score = candidate, score
+            _publish(score[0])
+        current = candidate if score >= search.score(current) else best
+    return best
+
+
+def _beam_search(search: _AnytimeSearch, width: int, greedy: List[int]) -> List[int]:
+    """
+    Layered beam search over visiting orders, pruned by the shared incumbent.
+    Each layer ranks all children by (priority, time) with NumPy and only
+    bounds the best ones until width survive. Never worse than greedy.
+    """
+    bound = _Bound(search)
+    n = len(search.priorities)
+    beam: List[Tuple[List[int], float, float]] = [([], 0.0, 0.0)]
+    greedy_priority, greedy_time = search.score(greedy)
+    best: Tuple[List[int], float, float] = (list(greedy), -greedy_time, greedy_priority)
+
+    while beam and not search.stopped():
+        incumbent = _incumbent()
+        parents, patients, costs, priorities = [], [], [], []
+        for i, (order, cost, priority) in enumerate(beam):
+            if search.stopped():
+                return best[0]
+            need = (search.trans[order[-1]] if order else search.start) + search.base
+            visited = np.zeros(n, dtype=bool)
+            visited[order] = True
+            feasible = np.flatnonzero(~visited & (need <= search.total_time - cost + 1e-9))
+            parents.append(np.full(len(feasible), i))
+            patients.append(feasible)
+            costs.append(cost + need[feasible])
+            priorities.append(priority + search.priorities[feasible])
+        parent, patient = np.concatenate(parents), np.concatenate(patients)
+        cost, priority = np.concatenate(costs), np.concatenate(priorities)
+
+        children: List[Tuple[List[int], float, float]] = []
+        seen = set()
+        for count, c in enumerate(np.lexsort((cost, -priority))):
+            if len(children) >= width or (count % 64 == 0 and search.stopped()):
+                break
+            order = beam[parent[c]][0]
+            visited = np.zeros(n, dtype=bool)
+            visited[order] = True
+            visited[patient[c]] = True
+            # Same patients, same last one: the first (cheapest) order only
+            key = (int(patient[c]), np.packbits(visited).tobytes())
+            if key in seen:
+                continue
+            seen.add(key)
+            if bound(visited, search.total_time - cost[c], priority[c]) > incumbent:
+                children.append((order + [int(patient[c])], float(cost[c]), float(priority[c])))
+        beam = children
+        if beam and _better((beam[0][2], -beam[0][1]), (best[2], -best[1])):
+            best = beam[0]
+            _publish(best[2])
+    return best[0]
+
+
+def _branch_and_bound(search: _AnytimeSearch, greedy: List[int]) -> Tuple[List[int], bool]:
+    """
+    Depth-first branch and bound on total priority. Returns (best order,
+    proven) where proven means no order beats the shared incumbent's priority.
+    """
+    bound = _Bound(search)
+    n = len(search.priorities)
+    visited = np.zeros(n, dtype=bool)
+    best = {"order": list(greedy), "score": search.score(greedy), "nodes": 0}
+    seen: Dict[Tuple[int, bytes], float] = {}
+
+    def visit(order: List[int], cost: float, priority: float) -> None:
+        best["nodes"] += 1
+        if best["nodes"] % 256 == 0 and search.stopped():
+            raise _StopSearch
+        if _better((priority, -cost), best["score"]):
+            best["order"], best["score"] = list(order), (priority, -cost)
+            _publish(priority)
+
+        slack = search.total_time - cost
+        if bound(visited, slack, priority) <= max(best["score"][0], _incumbent()) + 1e-9:
+            return
+        if order:
+            key = (order[-1], np.packbits(visited).tobytes())
+            if seen.get(key, np.inf) <= cost:
+                return
+            if len(seen) < DOMINANCE_TABLE_SIZE:
+                seen[key] = cost
+
+        need = (search.trans[order[-1]] if order else search.start) + search.base
+        children = np.flatnonzero(~visited & (need <= slack + 1e-9))
+        # Greedy order first, so good solutions (and pruning) come early
+        children = children[np.lexsort((need[children], -search.priorities[children]))]
+        for x in children:
+            visited[x] = True
+            order.append(int(x))
+            visit(order, cost + float(need[x]), priority + search.priorities[x])
+            order.pop()
+            visited[x] = False
+
+    try:
+        visit([], 0.0, 0.0)
+        return best["order"], True
+    except (_StopSearch, RecursionError):
+        return best["order"], False
+
+
+def _run_strategy(
+    strategy: str,
+    folder: str,
+    greedy: List[int],
+    total_time: float,
+    deadline: float,
+    seed: int,
+) -> Dict[str, Any]:
+    """Pool task: one strategy on the memory-mapped problem arrays"""
+    started = time.perf_counter()
+    arrays = [np.load(os.path.join(folder, f"{name}.npy"), mmap_mode="r") for name in ARRAY_NAMES]
+    # deadline is wall-clock time, comparable across processes
+    search = _AnytimeSearch(
+        (arrays[0], arrays[1], arrays[2]),
+        arrays[3],
+        total_time,
+        started + max(0.0, deadline - time.time()),
+        _SharedStop(),  # type: ignore[arg-type]
+        seed,
+    )
+
+    proven = False
+    if strategy == "local_search":
+        order = _local_search(search, greedy)
+    elif strategy == "beam":
+        order = _beam_search(search, BEAM_WIDTHS[seed % len(BEAM_WIDTHS)], greedy)
+    elif strategy == "exact":
+        order, proven = _branch_and_bound(search, greedy)
+    else:
+        raise ValueError(f"Unknown strategy: {strategy}")
+
+    priority, negative_time = search.score(order)
+    return {
+        "strategy": strategy,
+        "seed": seed,
+        "order": order,
+        "priority": priority,
+        "time_used": -negative_time,
+        "proven_optimal": proven,
+        "elapsed": time.perf_counter() - started,
+    }
+
+
+def default_strategies(workers: int) -> List[str]:
+    """One branch and bound and one beam search, local search on the other cores"""
+    base = ["exact", "local_search", "beam"]
+    return (base + ["local_search", "beam", "local_search"] * workers)[: max(1, workers)]
+
+
+class SolverPortfolio:
+    """
+    Process pool that races solver strategies. Keep one instance alive (and
+    call warm_up once) for latency-bound use: spawning workers takes longer
+    than a typical dispatch budget.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        context = multiprocessing.get_context("spawn")
+        self.incumbent = context.Value("d", -np.inf)
+        self.stop = context.Value("b", 0)
+        self.executor = ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=(self.incumbent, self.stop),
+        )
+
+    def __enter__(self) -> "SolverPortfolio":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.shutdown()
+
+    def warm_up(self) -> None:
+        """
+        Start every worker process (which warms its kernels up) and warm the
+        greedy kernel here, now instead of on the first solve
+        """
+        _warm_up_kernels()
+        futures = [self.executor.submit(_warm_up) for _ in range(self.max_workers)]
+        wait(futures)
+
+    def solve(
+        self,
+        matrices: Dict[str, Any],
+        initial_point: int,
+        total_time: float,
+        time_limit: float = 1.0,
+        strategies: Optional[Sequence[str]] = None,
+        cancel: Optional[CancellationToken] = None,
+    ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """
+        Race the strategies for up to time_limit seconds. Returns (best
+        route_log, one summary per strategy, the greedy baseline first).
+        Stops early when branch and bound proves the incumbent optimal.
+        """
+        started = time.perf_counter()
+        # The budget covers the whole solve, greedy baseline included
+        deadline = time.time() + time_limit
+        initial_point, total_time = int(initial_point), float(total_time)
+        costs = _transition_costs(matrices, initial_point)
+
+        greedy = greedy_order_matrices(matrices, initial_point, total_time)
+        priority, negative_time = _AnytimeSearch(
+            costs, matrices["priorities"], total_time, 0.0, None, 0
+        ).score(greedy)
+        results: List[Dict[str, Any]] = [
+            {
+                "strategy": "greedy",
+                "seed": 0,
+                "order": greedy,
+                "priority": priority,
+                "time_used": -negative_time,
+                "proven_optimal": False,
+                "elapsed": time.perf_counter() - started,
+            }
+        ]
+        self.incumbent.value = priority
+        self.stop.value = 0
+
+        with tempfile.TemporaryDirectory(dir=SHARED_DIR) as folder:
+            arrays = (*costs, matrices["priorities"].astype(np.float64))
+            for name, array in zip(ARRAY_NAMES, arrays):
+                np.save(os.path.join(folder, f"{name}.npy"), array)
+
+            futures: List[Future] = [
+                self.executor.submit(_run_strategy, name, folder, greedy, total_time, deadline, seed)
+                for seed, name in enumerate(strategies or default_strategies(self.max_workers))
+            ]
+            pending = set(futures)
+            while pending and time.time() < deadline and not _is_cancelled(cancel):
+                done, pending = wait(pending, timeout=PORTFOLIO_POLL_S)
+                if any(f.exception() is None and f.result()["proven_optimal"] for f in done):
+                    break
+            self.stop.value = 1
+            for future in futures:
+                try:
+                    results.append(future.result())
+                except Exception as e:
+                    print(f"Portfolio strategy failed: {e}")
+
+        best = results[0]
+        for result in results[1:]:
+            if _better(
+                (result["priority"], -result["time_used"]), (best["priority"], -best["time_used"])
+            ):
+                best = result
+        return route_log_from_order(matrices, initial_point, best["order"]), results
+
+    def shutdown(self) -> None:
+        self.executor.shutdown(wait=True, cancel_futures=True)
+
+
+def ambulance_routing_portfolio(
+    graph: Union[igraph.Graph, CSRGraph],
+    points_data: pd.DataFrame,
+    initial_point: int,
+    total_time: float,
+    time_limit: float = 1.0,
+    max_workers: Optional[int] = None,
+    matrices: Optional[Dict[str, Any]] = None,
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """One-shot portfolio solve (starts and stops its own pool)"""
+    if matrices is None:
+        matrices = precompute_routing_matrices(graph, points_data)
+    with SolverPortfolio(max_workers) as portfolio:
+        portfolio.warm_up()
+        return portfolio.solve(matrices, initial_point, total_time, time_limit)
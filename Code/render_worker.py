@@ -0,0 +1,159 @@
+"""
+SciTech Ambulance Routing - Render Worker
+=========================================
+
+Builds and rasterizes graph figures with the Agg backend away from the Tk main
+thread (in a worker thread or process), and exports PNG/SVG images headlessly
+for batch jobs without a display.
+"""
+
+import sys
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+from .graph_view import layout_with_key, plot_graph, RouteOverlay  # type: ignore
+
+
+def build_figure(
+    df_pontos: pd.DataFrame,
+    df_ruas: pd.DataFrame,
+    route_log: Optional[List[Dict[str, Any]]] = None,
+    figsize: Tuple[float, float] = (10, 10),
+    dpi: int = 100,
+    renderer: str = "auto",
+    layout_base: Optional[str] = None,
+) -> Figure:
+    """
+    Lay out and draw the graph on an Agg-backed Figure. The returned figure is
+    already rasterized: graph_view.PrerenderedCanvas shows its pixels as is.
+    layout_base: key of the layout to start from (see graph_view.get_layout).
+    """
+    fig = Figure(figsize=figsize, dpi=dpi)
+    canvas = FigureCanvasAgg(fig)
+    plot_graph(df_pontos, df_ruas, fig=fig, renderer=renderer, layout_base=layout_base)
+    if route_log:
+        overlay = RouteOverlay(canvas, fig.axes[0], fig.scitech_layout, animated=False)
+        overlay.set_route(route_log)
+    canvas.draw()
+    return fig
+
+
+def render_image(
+    df_pontos: pd.DataFrame,
+    df_ruas: pd.DataFrame,
+    route_log: Optional[List[Dict[str, Any]]] = None,
+    size: Tuple[int, int] = (1000, 1000),
+    dpi: int = 100,
+) -> Tuple[bytes, int, int]:
+    """Rasterize the graph and return (RGBA bytes, width, height)"""
+    fig = build_figure(
+        df_pontos, df_ruas, route_log, figsize=(size[0] / dpi, size[1] / dpi), dpi=dpi
+    )
+    buffer = fig.canvas.buffer_rgba()
+    width, height = fig.canvas.get_width_height()
+    return bytes(buffer), width, height
+
+
+def export_graph_image(
+    df_pontos: pd.DataFrame,
+    df_ruas: pd.DataFrame,
+    output_path: str,
+    route_log: Optional[List[Dict[str, Any]]] = None,
+    dpi: int = 150,
+) -> bool:
+    """Headless PNG/SVG (or any Agg supported format, from the extension) export"""
+    try:
+        fig = build_figure(df_pontos, df_ruas, route_log, dpi=dpi)
+        fig.savefig(output_path, dpi=dpi)
+        return True
+    except Exception as e:
+        print(f"Graph image export failed: {str(e)}")
+        return False
+
+
+class RenderWorker:
+    """
+    Runs rendering jobs in the background and returns Futures.
+
+    Thread mode can hand finished Figures to the UI; process mode (for batch
+    image export) also scales across cores but only returns buffers and files.
+    """
+
+    def __init__(self, use_processes: bool = False, max_workers: int = 1):
+        self.use_processes = use_processes
+        self.executor: Executor = (
+            ProcessPoolExecutor(max_workers=max_workers)
+            if use_processes
+            else ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="render")
+        )
+
+    def submit_figure(
+        self,
+        df_pontos: pd.DataFrame,
+        df_ruas: pd.DataFrame,
+        route_log: Optional[List[Dict[str, Any]]] = None,
+        **kwargs: Any,
+    ) -> "Future[Figure]":
+        if self.use_processes:
+            raise ValueError("Figures can only be returned by a thread worker")
+        return self.executor.submit(build_figure, df_pontos, df_ruas, route_log, **kwargs)
+
+    def submit_layout(
+        self,
+        df_pontos: pd.DataFrame,
+        df_ruas: pd.DataFrame,
+        layout_base: Optional[str] = None,
+    ) -> "Future[Tuple[np.ndarray, str]]":
+        """
+        Layout coordinates and their key only, for the native canvas viewer
+        (network_view)
+        """
+        return self.executor.submit(layout_with_key, df_pontos, df_ruas, layout_base)
+
+    def submit_image(
+        self,
+        df_pontos: pd.DataFrame,
+        df_ruas: pd.DataFrame,
+        route_log: Optional[List[Dict[str, Any]]] = None,
+        **kwargs: Any,
+    ) -> "Future[Tuple[bytes, int, int]]":
+        return self.executor.submit(render_image, df_pontos, df_ruas, route_log, **kwargs)
+
+    def submit_export(
+        self,
+        df_pontos: pd.DataFrame,
+        df_ruas: pd.DataFrame,
+        output_path: str,
+        route_log: Optional[List[Dict[str, Any]]] = None,
+        **kwargs: Any,
+    ) -> "Future[bool]":
+        return self.executor.submit(
+            export_graph_image, df_pontos, df_ruas, output_path, route_log, **kwargs
+        )
+
+    def shutdown(self, wait: bool = False) -> None:
+        self.executor.shutdown(wait=wait, cancel_futures=True)
+
+
+if __name__ == "__main__":
+    # Usage: python -m Code.render_worker <scenario folder> <output.png|output.svg>
+    from .Data_Import import problem_data_dict_by_folder  # type: ignore
+    from .alg import ambulance_routing_optimized  # type: ignore
+
+    scenario = problem_data_dict_by_folder(sys.argv[1])
+    initial = scenario["initial_data"]
+    solved_route = ambulance_routing_optimized(
+        scenario["graph"],
+        scenario["points_data"],
+        initial.iloc[0]["ponto_inicial"],
+        initial.iloc[0]["tempo_total"],
+    )
+    ok = export_graph_image(
+        scenario["points_data"], scenario["ruas_data"], sys.argv[2], solved_route
+    )
+    sys.exit(0 if ok else 1)
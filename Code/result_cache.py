@@ -0,0 +1,151 @@
+"""
+SciTech Ambulance Routing - Result Cache
+========================================
+
+Memoized routing results. An instance is identified by a fingerprint of its
+content (streets, points, starting point and total time, plus the solver), so
+re-running an unchanged instance returns the stored route_log at once and any
+edit of the inputs simply misses. Results live in an in-memory LRU and,
+optionally, as JSON files in a cache folder shared between sessions and
+batch workers.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+
+def user_cache_dir(name: str) -> str:
+    """Per-user cache folder called name (never inside the source tree)"""
+    base = (
+        os.environ.get("LOCALAPPDATA")
+        or os.environ.get("XDG_CACHE_HOME")
+        or str(Path.home() / ".cache")
+    )
+    return os.path.join(base, "scitech_routing", name)
+
+
+DEFAULT_CACHE_DIR = user_cache_dir("route_cache")
+CACHE_ENTRIES = 128  # Results kept in memory
+
+# Bump when a solver change alters its results, so stored entries stop matching
+SOLVER_VERSION = 1
+
+
+def _hash_frame(digest: Any, frame: pd.DataFrame) -> None:
+    digest.update(json.dumps([str(c) for c in frame.columns]).encode())
+    digest.update(pd.util.hash_pandas_object(frame, index=False).to_numpy().tobytes())
+
+
+def instance_fingerprint(data: Dict[str, Any], solver: str = "greedy") -> str:
+    """
+    Content hash of a problem data dictionary. Row order is part of the
+    fingerprint since it breaks ties between equally good patients.
+    """
+    initial = data["initial_data"].iloc[0]
+    digest = hashlib.sha256(f"{solver}/{SOLVER_VERSION}".encode())
+    _hash_frame(digest, data["ruas_data"])
+    _hash_frame(digest, data["points_data"])
+    digest.update(
+        repr((int(initial["ponto_inicial"]), float(initial["tempo_total"]))).encode()
+    )
+    return digest.hexdigest()
+
+
+def _json_value(value: Any) -> Any:
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError(f"Cannot store {type(value).__name__} in the result cache")
+
+
+class ResultCache:
+    """
+    Two-tier cache of route logs: an LRU of max_entries results in memory and,
+    when folder is given, one JSON file per fingerprint on disk. Thread safe.
+    """
+
+    def __init__(self, max_entries: int = CACHE_ENTRIES, folder: Optional[str] = None):
+        self.max_entries = max_entries
+        self.folder = folder
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _file(self, key: str) -> str:
+        return os.path.join(self.folder, f"{key}.json")
+
+    def _remember(self, key: str, entry: Dict[str, Any]) -> None:
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """{"route_log", "metadata"} stored under key, or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+        if entry is None and self.folder and os.path.exists(self._file(key)):
+            try:
+                with open(self._file(key)) as f:
+                    entry = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"Ignoring unreadable cache entry {key}: {e}")
+            if entry is not None:
+                with self._lock:
+                    self._remember(key, entry)
+
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        # Callers get their own copy, so editing a result never alters the cache
+        return {
+            "route_log": [
+                {k: list(v) if isinstance(v, list) else v for k, v in step.items()}
+                for step in entry["route_log"]
+            ],
+            "metadata": dict(entry["metadata"]),
+        }
+
+    def put(self, key: str, route_log: List[Dict[str, Any]], **metadata: Any) -> None:
+        """Store a route_log with solver metadata (elapsed time, solver name...)"""
+        metadata.setdefault("created_at", datetime.now().isoformat(timespec="seconds"))
+        # The JSON round trip turns NumPy values into plain ones in both tiers
+        text = json.dumps(
+            {"route_log": route_log, "metadata": metadata}, default=_json_value
+        )
+        with self._lock:
+            self._remember(key, json.loads(text))
+        if self.folder:
+            try:
+                os.makedirs(self.folder, exist_ok=True)
+                # Write then rename, so readers never see half a file
+                partial = f"{self._file(key)}.{os.getpid()}.{threading.get_ident()}.tmp"
+                with open(partial, "w") as f:
+                    f.write(text)
+                os.replace(partial, self._file(key))
+            except OSError as e:
+                print(f"Could not write cache entry {key}: {e}")
+
+    def clear(self, disk: bool = False) -> None:
+        """Forget the in-memory entries (and the cache files with disk=True)"""
+        with self._lock:
+            self._entries.clear()
+        if disk and self.folder and os.path.isdir(self.folder):
+            for name in os.listdir(self.folder):
+                if name.endswith(".json"):
+                    os.remove(os.path.join(self.folder, name))
@@ -0,0 +1,109 @@
+"""
+SciTech Ambulance Routing - Bulk Route Evaluation
+=================================================
+
+Scores many candidate visiting orders at once, without running a solver.
+Orders are rows of a padded 2-D array of patient indices (positions in the
+patient arrays of precompute_routing_matrices, PAD after the last patient).
+Every row is evaluated in the same NumPy pass: time of each step, whether
+the route fits the time budget, and the priority it collects. Each patient
+is taken to their nearest hospital, as in the solvers.
+"""
+
+from typing import Any, Dict, Sequence
+
+import numpy as np
+
+from .alg import _transition_costs  # type: ignore
+
+PAD = -1  # Fills the rows of shorter routes
+EVAL_CHUNK_ROWS = 65536  # Routes evaluated per NumPy pass (bounds temporary memory)
+
+
+def pad_routes(orders: Sequence[Sequence[int]], length: int = 0) -> np.ndarray:
+    """2-D array of visiting orders, padded with PAD to the longest (or length)"""
+    width = max([length] + [len(order) for order in orders])
+    sequences = np.full((len(orders), width), PAD, dtype=np.int64)
+    for row, order in zip(sequences, orders):
+        row[: len(order)] = order
+    return sequences
+
+
+class RouteEvaluator:
+    """
+    Evaluates visiting orders from initial_point within total_time. The
+    transition costs are computed once, so one evaluator can score any number
+    of batches for the same start and budget.
+    """
+
+    def __init__(self, matrices: Dict[str, Any], initial_point: int, total_time: float):
+        self.start, self.trans, self.base = _transition_costs(matrices, int(initial_point))
+        self.priorities = np.asarray(matrices["priorities"], dtype=np.float64)
+        self.total_time = float(total_time)
+        self.n_patients = len(self.priorities)
+
+    def evaluate(self, sequences: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        One entry per row of sequences:
+        "feasible" - the route fits the budget, every patient is reachable,
+        valid and visited once, and there is nothing after the padding;
+        "time_used" - total time (inf when a step is unreachable);
+        "priority" - accumulated priority;
+        "patients" - number of patients in the route.
+        Time and priority are reported for infeasible routes too.
+        """
+        sequences = np.asarray(sequences, dtype=np.int64)
+        if sequences.ndim == 1:
+            sequences = sequences[None, :]
+        chunks = [
+            self._evaluate_chunk(sequences[first : first + EVAL_CHUNK_ROWS])
+            for first in range(0, max(len(sequences), 1), EVAL_CHUNK_ROWS)
+        ]
+        return {key: np.concatenate([chunk[key] for chunk in chunks]) for key in chunks[0]}
+
+    def _evaluate_chunk(self, sequences: np.ndarray) -> Dict[str, np.ndarray]:
+        n_routes, width = sequences.shape
+        listed = sequences != PAD
+        # A route ends at its first PAD
+        in_route = np.logical_and.accumulate(listed, axis=1)
+        malformed = (listed & ~in_route).any(axis=1)
+        valid_index = (sequences >= 0) & (sequences < self.n_patients)
+        malformed |= (in_route & ~valid_index).any(axis=1)
+        index = np.where(in_route & valid_index, sequences, 0)
+
+        step_time = np.empty((n_routes, width))
+        if width:
+            step_time[:, 0] = self.start[index[:, 0]]
+            step_time[:, 1:] = self.trans[index[:, :-1], index[:, 1:]]
+            step_time += self.base[index]
+        step_time[~in_route] = 0.0
+        # Left to right, like the time_left bookkeeping of the solvers
+        time_used = (
+            np.cumsum(step_time, axis=1)[:, -1] if width else np.zeros(n_routes)
+        )
+        priority = np.where(in_route, self.priorities[index], 0.0).sum(axis=1)
+
+        # Repeated patients: sort each row, padding made distinct first
+        unique_pad = -1 - np.arange(width)
+        ordered = np.sort(np.where(in_route, sequences, unique_pad), axis=1)
+        repeated = (ordered[:, 1:] == ordered[:, :-1]).any(axis=1)
+
+        # isfinite: an unreachable step never fits, even in an unlimited budget
+        fits = np.isfinite(time_used) & (time_used <= self.total_time)
+        feasible = ~malformed & ~repeated & fits
+        return {
+            "feasible": feasible,
+            "time_used": time_used,
+            "priority": priority,
+            "patients": in_route.sum(axis=1),
+        }
+
+
+def evaluate_routes(
+    matrices: Dict[str, Any],
+    initial_point: int,
+    total_time: float,
+    sequences: np.ndarray,
+) -> Dict[str, np.ndarray]:
+    """One-off RouteEvaluator(matrices, initial_point, total_time).evaluate(sequences)"""
+    return RouteEvaluator(matrices, initial_point, total_time).evaluate(sequences)
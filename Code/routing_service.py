@@ -0,0 +1,396 @@
+"""
+SciTech Ambulance Routing - Local Routing Service
+=================================================
+
+Long-lived asyncio service answering routing requests over HTTP (or a Unix
+socket) with JSON bodies. Scenarios are loaded once: their routing matrices
+are written to memory-backed .npy files that the solver processes memory-map
+and keep open, so a request only pays for the solve itself. Identical
+concurrent requests share one solve, and finished results are cached.
+
+    python -m Code.routing_service <port | unix socket path> [scenario folder ...]
+
+Endpoints:
+    GET  /health
+    GET  /scenarios
+    POST /scenarios  {"folder": ..., "name": optional}
+    POST /route      {"scenario": ..., "initial_point", "total_time",
+                      "solver": "greedy" | "anytime", "time_limit": optional}
+"""
+
+import asyncio
+import hashlib
+import json
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+from .alg import (  # type: ignore
+    ambulance_routing_anytime,
+    greedy_order_matrices,
+    precompute_routing_matrices,
+    route_log_from_order,
+)
+from .result_cache import ResultCache, _json_value, instance_fingerprint  # type: ignore
+
+SOLVERS = ("greedy", "anytime")
+MATRIX_ARRAYS = (
+    "dist",
+    "pred",
+    "hospital_ids",
+    "patient_ids",
+    "priorities",
+    "care_times",
+    "nearest_hospital",
+    "hospital_dist",
+)
+# Memory-backed temp folder for the shared matrices when available
+SHARED_DIR = "/dev/shm" if os.path.isdir("/dev/shm") else None
+WORKER_SCENARIOS = 16  # Scenarios a solver process keeps memory-mapped
+MAX_BODY_BYTES = 1 << 20
+DEFAULT_TIME_LIMIT = 0.2  # Seconds for the anytime solver
+
+_worker_matrices: "OrderedDict[str, Dict[str, np.ndarray]]" = OrderedDict()
+
+
+def _load_scenario(folder: str, array_folder: str) -> Dict[str, Any]:
+    """Pool task: load a scenario folder and write its routing matrices as .npy files"""
+    from .Data_Import import problem_data_dict_by_folder  # type: ignore
+
+    data = problem_data_dict_by_folder(folder)
+    if not data:
+        raise ValueError(f"Could not load scenario folder {folder}")
+    matrices = precompute_routing_matrices(data["graph"], data["points_data"])
+    for name in MATRIX_ARRAYS:
+        np.save(os.path.join(array_folder, f"{name}.npy"), matrices[name])
+    initial = data["initial_data"].iloc[0]
+    return {
+        "fingerprint": instance_fingerprint(data, solver="scenario"),
+        "vertices": int(data["graph"].vcount()),
+        "patients": int(len(matrices["patient_ids"])),
+        "hospitals": int(len(matrices["hospital_ids"])),
+        "initial_point": int(initial["ponto_inicial"]),
+        "total_time": float(initial["tempo_total"]),
+    }
+
+
+def _open_matrices(array_folder: str, live: Sequence[str] = ()) -> Dict[str, np.ndarray]:
+    """
+    Memory-mapped matrices of a scenario, kept open between requests. Folders
+    not in live (replaced scenarios) are unmapped first.
+    """
+    if live:
+        for folder in [f for f in _worker_matrices if f not in live]:
+            del _worker_matrices[folder]
+    matrices = _worker_matrices.get(array_folder)
+    if matrices is None:
+        matrices = {
+            name: np.load(os.path.join(array_folder, f"{name}.npy"), mmap_mode="r")
+            for name in MATRIX_ARRAYS
+        }
+        _worker_matrices[array_folder] = matrices
+        while len(_worker_matrices) > WORKER_SCENARIOS:
+            _worker_matrices.popitem(last=False)
+    _worker_matrices.move_to_end(array_folder)
+    return matrices
+
+
+def _solve(
+    array_folder: str,
+    initial_point: int,
+    total_time: float,
+    solver: str,
+    time_limit: float,
+    live: Sequence[str] = (),
+) -> Tuple[List[Dict[str, Any]], float]:
+    """Pool task: one routing request. Returns (route_log, solve seconds)"""
+    started = time.perf_counter()
+    matrices = _open_matrices(array_folder, live)
+    if solver == "anytime":
+        route_log, _ = ambulance_routing_anytime(
+            None, None, initial_point, total_time, time_limit=time_limit, matrices=matrices
+        )
+    else:
+        order = greedy_order_matrices(matrices, initial_point, total_time)
+        route_log = route_log_from_order(matrices, initial_point, order)
+    return route_log, time.perf_counter() - started
+
+
+def _warm_up() -> int:
+    return os.getpid()
+
+
+class RoutingService:
+    """
+    Scenario registry, result cache and solver pool behind the HTTP handler.
+    load_scenario and route can also be awaited directly.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, cache: Optional[ResultCache] = None):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.executor = ProcessPoolExecutor(
+            max_workers=self.max_workers, mp_context=multiprocessing.get_context("spawn")
+        )
+        self.cache = cache or ResultCache()
+        self.scenarios: Dict[str, Dict[str, Any]] = {}
+        self._in_flight: Dict[str, "asyncio.Future[Any]"] = {}
+        # Solves running on each array folder; replaced folders are removed
+        # once their last solve finishes
+        self._folder_solves: Dict[str, int] = {}
+        self._retired: Set[str] = set()
+        self.stats = {"requests": 0, "solves": 0, "cache_hits": 0, "coalesced": 0}
+
+    async def warm_up(self) -> None:
+        """Start the solver processes now instead of on the first request"""
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(
+            *(loop.run_in_executor(self.executor, _warm_up) for _ in range(self.max_workers))
+        )
+
+    async def _coalesced(self, key: str, work: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """Run work once per key at a time; concurrent callers share its result"""
+        future = self._in_flight.get(key)
+        if future is not None:
+            self.stats["coalesced"] += 1
+            return await asyncio.shield(future), True
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        try:
+            result = await work()
+            future.set_result(result)
+            return result, False
+        except BaseException as e:
+            future.set_exception(e)
+            # Nobody else may be waiting: avoid "exception never retrieved"
+            future.exception()
+            raise
+        finally:
+            del self._in_flight[key]
+
+    async def load_scenario(self, folder: str, name: Optional[str] = None) -> Dict[str, Any]:
+        """Load (or reload) a scenario folder under name (the folder by default)"""
+        folder = os.path.normpath(folder)
+        name = name or folder
+
+        async def load() -> Dict[str, Any]:
+            array_folder = tempfile.mkdtemp(prefix="scitech_scenario_", dir=SHARED_DIR)
+            try:
+                summary = await asyncio.get_running_loop().run_in_executor(
+                    self.executor, _load_scenario, folder, array_folder
+                )
+            except BaseException:
+                shutil.rmtree(array_folder, ignore_errors=True)
+                raise
+            old = self.scenarios.get(name)
+            self.scenarios[name] = dict(
+                summary, name=name, folder=folder, array_folder=array_folder
+            )
+            if old is not None:
+                self._retired.add(old["array_folder"])
+                self._release(old["array_folder"])
+            return self._summary(name)
+
+        summary, _ = await self._coalesced(f"load:{name}", load)
+        return summary
+
+    def _release(self, array_folder: str) -> None:
+        """Remove a replaced array folder unless solves still read it"""
+        if array_folder in self._retired and not self._folder_solves.get(array_folder):
+            self._retired.discard(array_folder)
+            self._folder_solves.pop(array_folder, None)
+            shutil.rmtree(array_folder, ignore_errors=True)
+
+    def _live_folders(self) -> List[str]:
+        """Array folders solver processes may keep mapped"""
+        live = {info["array_folder"] for info in self.scenarios.values()}
+        return sorted(live | {f for f, count in self._folder_solves.items() if count})
+
+    def _summary(self, name: str) -> Dict[str, Any]:
+        return {k: v for k, v in self.scenarios[name].items() if k != "array_folder"}
+
+    async def route(
+        self,
+        scenario: str,
+        initial_point: Optional[int] = None,
+        total_time: Optional[float] = None,
+        solver: str = "greedy",
+        time_limit: float = DEFAULT_TIME_LIMIT,
+    ) -> Dict[str, Any]:
+        """Route of a loaded scenario: {"route_log", "metadata"}"""
+        self.stats["requests"] += 1
+        if scenario not in self.scenarios:
+            raise KeyError(f"Unknown scenario: {scenario}")
+        if solver not in SOLVERS:
+            raise ValueError(f"Unknown solver: {solver}")
+        info = self.scenarios[scenario]
+        initial_point = int(info["initial_point"] if initial_point is None else initial_point)
+        total_time = float(info["total_time"] if total_time is None else total_time)
+        if not 0 <= initial_point < info["vertices"]:
+            raise ValueError(f"Unknown initial point: {initial_point}")
+        parameters = [info["fingerprint"], solver, initial_point, total_time]
+        if solver == "anytime":
+            parameters.append(float(time_limit))
+        key = hashlib.sha256(json.dumps(parameters).encode()).hexdigest()
+
+        cached = self.cache.get(key)
+        if cached is not None:
+            self.stats["cache_hits"] += 1
+            cached["metadata"]["cached"] = True
+            return cached
+
+        async def solve() -> Dict[str, Any]:
+            array_folder = info["array_folder"]
+            self._folder_solves[array_folder] = self._folder_solves.get(array_folder, 0) + 1
+            try:
+                route_log, elapsed = await asyncio.get_running_loop().run_in_executor(
+                    self.executor,
+                    _solve,
+                    array_folder,
+                    initial_point,
+                    total_time,
+                    solver,
+                    float(time_limit),
+                    self._live_folders(),
+                )
+            finally:
+                self._folder_solves[array_folder] -= 1
+                self._release(array_folder)
+            self.stats["solves"] += 1
+            self.cache.put(key, route_log, solver=solver, elapsed=elapsed)
+            return self.cache.get(key)
+
+        result, coalesced = await self._coalesced(f"route:{key}", solve)
+        # Coalesced callers share the route_log, but each gets its own metadata
+        return {
+            "route_log": result["route_log"],
+            "metadata": dict(result["metadata"], cached=False, coalesced=coalesced),
+        }
+
+    async def _dispatch(self, method: str, path: str, body: Any) -> Tuple[int, Any]:
+        if method == "GET" and path == "/health":
+            return 200, dict(self.stats, status="ok", scenarios=len(self.scenarios))
+        if method == "GET" and path == "/scenarios":
+            return 200, [self._summary(name) for name in self.scenarios]
+        if method == "POST" and path == "/scenarios":
+            return 200, await self.load_scenario(body["folder"], body.get("name"))
+        if method == "POST" and path == "/route":
+            return 200, await self.route(
+                body["scenario"],
+                body.get("initial_point"),
+                body.get("total_time"),
+                body.get("solver", "greedy"),
+                body.get("time_limit", DEFAULT_TIME_LIMIT),
+            )
+        return 404, {"error": f"No endpoint {method} {path}"}
+
+    async def handle_connection(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        """Minimal HTTP/1.1 with keep-alive: one JSON request and response at a time"""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                method, path, version = request_line.decode("latin-1").split()
+                headers = {}
+                while True:
+                    line = (await reader.readline()).decode("latin-1").strip()
+                    if not line:
+                        break
+                    header, _, value = line.partition(":")
+                    headers[header.strip().lower()] = value.strip()
+
+                length = int(headers.get("content-length", 0))
+                if length > MAX_BODY_BYTES:
+                    status, payload = 413, {"error": "Request body too large"}
+                    await reader.readexactly(length)
+                else:
+                    raw = await reader.readexactly(length) if length else b""
+                    try:
+                        body = json.loads(raw) if raw else {}
+                        status, payload = await self._dispatch(method, path, body)
+                    except KeyError as e:
+                        status, payload = 404, {"error": str(e).strip("'\"")}
+                    except (ValueError, TypeError) as e:
+                        status, payload = 400, {"error": str(e)}
+                    except Exception as e:
+                        status, payload = 500, {"error": str(e)}
+
+                keep_alive = (
+                    headers.get("connection", "").lower() != "close" and version == "HTTP/1.1"
+                )
+                content = json.dumps(payload, default=_json_value).encode()
+                writer.write(
+                    (
+                        f"HTTP/1.1 {status} {'OK' if status == 200 else 'Error'}\r\n"
+                        "Content-Type: application/json\r\n"
+                        f"Content-Length: {len(content)}\r\n"
+                        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+                    ).encode("latin-1")
+                    + content
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass  # Client went away or sent something that is not HTTP
+        except asyncio.CancelledError:
+            pass  # Server shutting down with idle keep-alive connections
+        finally:
+            writer.close()
+
+    async def serve(
+        self, host: str = "127.0.0.1", port: int = 8765, unix_path: Optional[str] = None
+    ) -> asyncio.AbstractServer:
+        """Start listening on host:port, or on a Unix socket when unix_path is given"""
+        if unix_path:
+            return await asyncio.start_unix_server(self.handle_connection, path=unix_path)
+        return await asyncio.start_server(self.handle_connection, host, port)
+
+    def close(self) -> None:
+        """Stop the solver pool and remove the shared matrices"""
+        self.executor.shutdown(wait=True, cancel_futures=True)
+        for info in self.scenarios.values():
+            shutil.rmtree(info["array_folder"], ignore_errors=True)
+        for array_folder in self._retired:
+            shutil.rmtree(array_folder, ignore_errors=True)
+        self.scenarios.clear()
+        self._retired.clear()
+        self._folder_solves.clear()
+
+
+async def run_service(
+    address: str, folders: List[str], max_workers: Optional[int] = None
+) -> None:
+    """Serve until cancelled; address is a TCP port on localhost or a socket path"""
+    service = RoutingService(max_workers)
+    try:
+        await service.warm_up()
+        for folder in folders:
+            await service.load_scenario(folder)
+        if address.isdigit():
+            server = await service.serve(port=int(address))
+        else:
+            server = await service.serve(unix_path=address)
+        print(f"Routing service on {address} with {len(service.scenarios)} scenarios")
+        async with server:
+            await server.serve_forever()
+    finally:
+        service.close()
+
+
+if __name__ == "__main__":
+    # Usage: python -m Code.routing_service <port | unix socket path> [scenario folder ...]
+    try:
+        asyncio.run(run_service(sys.argv[1] if len(sys.argv) > 1 else "8765", sys.argv[2:]))
+    except KeyboardInterrupt:
+        pass
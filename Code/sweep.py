@@ -0,0 +1,173 @@
+"""
+SciTech Ambulance Routing - Parameter Sweep
+===========================================
+
+Capacity planning runs: the greedy route for every (ponto_inicial,
+tempo_total) pair of a grid, from one shortest path precompute. All budgets
+of a start point advance in lockstep as rows of NumPy arrays, and blocks of
+start points are solved in parallel worker processes.
+
+    python -m Code.sweep <scenario folder> <output.csv> <budget> [budget ...]
+"""
+
+import multiprocessing
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+import igraph  # type: ignore
+
+from .alg import _patient_need, precompute_routing_matrices  # type: ignore
+from .csr_graph import CSRGraph  # type: ignore
+
+SWEEP_COLUMNS = [
+    "ponto_inicial",
+    "tempo_total",
+    "patients",
+    "total_priority",
+    "time_used",
+    "patient_order",
+]
+BLOCKS_PER_WORKER = 4  # Start point blocks per worker, to even out the load
+
+
+def _greedy_lockstep(
+    start_need: np.ndarray,
+    hospital_need: np.ndarray,
+    next_row: np.ndarray,
+    priorities: np.ndarray,
+    budgets: np.ndarray,
+) -> Tuple[List[List[int]], np.ndarray]:
+    """
+    greedy_order_matrices for one start point and every budget at once.
+    Row 0 of the need table is the start point, row 1 + j hospital j;
+    next_row[k] is the row of the hospital patient k is taken to.
+    Returns (patient index orders, time used), one entry per budget.
+    """
+    need_table = np.vstack([start_need[None, :], hospital_need])
+    n_budgets = len(budgets)
+    rows = np.zeros(n_budgets, dtype=np.int64)
+    time_left = budgets.astype(np.float64)
+    time_used = np.zeros(n_budgets)
+    available = np.ones((n_budgets, len(priorities)), dtype=bool)
+    orders: List[List[int]] = [[] for _ in range(n_budgets)]
+    active = np.flatnonzero(time_left > 0)
+
+    while len(active):
+        need = need_table[rows[active]]
+        feasible = available[active] & (need <= time_left[active, None])
+        found = feasible.any(axis=1)
+        active, need, feasible = active[found], need[found], feasible[found]
+        if not len(active):
+            break
+        # Highest priority first, then the smallest need (first one on ties)
+        top = np.where(feasible, priorities, -np.inf).max(axis=1)
+        candidates = feasible & (priorities == top[:, None])
+        chosen = np.argmin(np.where(candidates, need, np.inf), axis=1)
+
+        chosen_need = need[np.arange(len(active)), chosen]
+        time_left[active] -= chosen_need
+        time_used[active] += chosen_need
+        available[active, chosen] = False
+        rows[active] = next_row[chosen]
+        for b, k in zip(active.tolist(), chosen.tolist()):
+            orders[b].append(k)
+        active = active[time_left[active] > 0]
+    return orders, time_used
+
+
+def _sweep_block(
+    start_needs: np.ndarray,
+    hospital_need: np.ndarray,
+    next_row: np.ndarray,
+    priorities: np.ndarray,
+    budgets: np.ndarray,
+) -> List[Tuple[List[List[int]], np.ndarray]]:
+    """Pool task: the lockstep greedy of a block of start points"""
+    return [
+        _greedy_lockstep(row, hospital_need, next_row, priorities, budgets)
+        for row in start_needs
+    ]
+
+
+def parameter_sweep(
+    graph: Union[igraph.Graph, CSRGraph],
+    points_data: pd.DataFrame,
+    budgets: Sequence[float],
+    starts: Optional[Sequence[int]] = None,
+    matrices: Optional[Dict[str, Any]] = None,
+    max_workers: Optional[int] = None,
+) -> pd.DataFrame:
+    """
+    Greedy routes for every start point (all vertices by default) and every
+    budget, sharing one precompute. Returns one row per (start, budget) with
+    the columns of SWEEP_COLUMNS; patient_order lists patient ids.
+    """
+    if matrices is None:
+        matrices = precompute_routing_matrices(graph, points_data)
+    if starts is None:
+        starts = range(len(matrices["dist"]))
+    starts = np.asarray(starts, dtype=np.int64)
+    budgets = np.asarray(budgets, dtype=np.float64)
+    priorities = matrices["priorities"]
+    patient_ids = matrices["patient_ids"]
+
+    # Need rows of every node a route can be at: the start and the hospitals
+    hospital_ids = matrices["hospital_ids"]
+    hospital_need = np.array(
+        [_patient_need(matrices, int(h)) for h in hospital_ids]
+    ).reshape(len(hospital_ids), len(patient_ids))
+    hospital_row = {int(h): 1 + j for j, h in enumerate(hospital_ids)}
+    # Patients without a reachable hospital are never feasible: any row will do
+    next_row = np.array(
+        [hospital_row.get(int(h), 0) for h in matrices["nearest_hospital"]], dtype=np.int64
+    )
+    start_needs = np.array([_patient_need(matrices, int(s)) for s in starts]).reshape(
+        len(starts), len(patient_ids)
+    )
+
+    max_workers = max_workers or os.cpu_count() or 1
+    shared = (hospital_need, next_row, priorities, budgets)
+    if max_workers == 1 or len(starts) < 2:
+        solved = _sweep_block(start_needs, *shared)
+    else:
+        blocks = np.array_split(
+            np.arange(len(starts)), min(len(starts), max_workers * BLOCKS_PER_WORKER)
+        )
+        with ProcessPoolExecutor(
+            max_workers=max_workers, mp_context=multiprocessing.get_context("spawn")
+        ) as executor:
+            futures = [
+                executor.submit(_sweep_block, start_needs[block], *shared) for block in blocks
+            ]
+            solved = [result for future in futures for result in future.result()]
+
+    records = []
+    for start, (orders, time_used) in zip(starts.tolist(), solved):
+        for budget, order, used in zip(budgets.tolist(), orders, time_used.tolist()):
+            records.append(
+                (
+                    start,
+                    budget,
+                    len(order),
+                    priorities[order].sum() if order else 0,
+                    used,
+                    patient_ids[order].tolist(),
+                )
+            )
+    return pd.DataFrame.from_records(records, columns=SWEEP_COLUMNS)
+
+
+if __name__ == "__main__":
+    # Usage: python -m Code.sweep <scenario folder> <output.csv> <budget> [budget ...]
+    from .Data_Import import problem_data_dict_by_folder  # type: ignore
+
+    scenario = problem_data_dict_by_folder(sys.argv[1])
+    sweep = parameter_sweep(
+        scenario["graph"], scenario["points_data"], [float(b) for b in sys.argv[3:]]
+    )
+    sweep.to_csv(sys.argv[2], index=False)
+    print(f"Swept {len(sweep)} (start, budget) pairs into {sys.argv[2]}")
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Import the Code package from the repository root whatever the pytest rootdir
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
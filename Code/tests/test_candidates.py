@@ -0,0 +1,96 @@
+import numpy as np
+import pytest
+
+from Code import alg, kernels
+from Code.benchmarks import DATASETS_ROOT, synthetic_instance
+from Code.csr_graph import CSRGraph
+from Code.Data_Import import pd_to_igraph, problem_data_dict_by_folder
+from Code.Data_Store import find_scenario_folders
+
+
+def _instances():
+    """(name, graph, points_data, initial point, total time)"""
+    instances = []
+    for folder in find_scenario_folders(DATASETS_ROOT):
+        data = problem_data_dict_by_folder(folder)
+        initial = data["initial_data"].iloc[0]
+        instances.append(
+            (folder, data["graph"], data["points_data"],
+             int(initial["ponto_inicial"]), float(initial["tempo_total"]))
+        )
+    for patients in (40, 150):
+        # Few distinct street times: many ties in total time
+        ruas, pontos = synthetic_instance(vertices=300, streets=600, patients=patients, seed=patients)
+        instances.append(
+            (f"synthetic/{patients}", pd_to_igraph(ruas), pontos,
+             int(pontos["id"].iloc[0]), 15.0 * patients)
+        )
+    return instances
+
+
+INSTANCES = _instances()
+IDS = [name for name, *_ in INSTANCES]
+
+
+@pytest.fixture(scope="module", params=INSTANCES, ids=IDS)
+def instance(request):
+    name, graph, points_data, initial_point, total_time = request.param
+    matrices = alg.precompute_routing_matrices(CSRGraph.from_igraph(graph), points_data)
+    return graph, points_data, matrices, initial_point, total_time
+
+
+def _full_scan(matrices, current_node, time_left):
+    """Greedy reference: every patient, highest priority, then least time, then index"""
+    priorities = matrices["priorities"]
+    available = np.ones(len(priorities), dtype=bool)
+    order = []
+    while time_left > 0:
+        need = alg._patient_need(matrices, current_node)
+        fits = np.flatnonzero(available & (need <= time_left))
+        if not len(fits):
+            break
+        best = fits[priorities[fits] == priorities[fits].max()]
+        k = int(best[np.argmin(need[best])])
+        order.append(k)
+        time_left -= need[k]
+        current_node = int(matrices["nearest_hospital"][k])
+        available[k] = False
+    return order
+
+
+@pytest.mark.parametrize("size", [1, 2, 16])
+def test_candidate_lists_match_full_scan(instance, size):
+    _, _, matrices, current_node, time_left = instance
+    expected = _full_scan(matrices, current_node, time_left)
+
+    candidates = alg.PatientCandidates(matrices, size=size)
+    order = []
+    while time_left > 0:
+        k = candidates.select(current_node, time_left)
+        if k is None:
+            break
+        order.append(k)
+        time_left -= candidates.need(current_node, k)
+        current_node = int(matrices["nearest_hospital"][k])
+        candidates.remove(k)
+    assert order == expected
+
+
+@pytest.mark.parametrize("use_numba", [False, True] if kernels.HAS_NUMBA else [False])
+def test_greedy_order_matrices_matches_full_scan(instance, monkeypatch, use_numba):
+    _, _, matrices, initial_point, total_time = instance
+    monkeypatch.setattr(kernels, "USE_NUMBA", use_numba)
+    order = alg.greedy_order_matrices(matrices, initial_point, total_time)
+    assert order == _full_scan(matrices, initial_point, total_time)
+
+
+def test_dict_solver_matches_full_scan(instance):
+    graph, points_data, matrices, initial_point, total_time = instance
+    route_log = alg.ambulance_routing_optimized(graph, points_data, initial_point, total_time)
+    expected = _full_scan(matrices, initial_point, total_time)
+    assert [step["to_patient"] for step in route_log] == [
+        int(matrices["patient_ids"][k]) for k in expected
+    ]
+    assert [step["time_needed"] for step in route_log] == pytest.approx(
+        [step["time_needed"] for step in alg.route_log_from_order(matrices, initial_point, expected)]
+    )
@@ -0,0 +1,31 @@
+import pytest
+
+from Code.Data_Export import HAS_PYARROW, RouteExportWriter, iter_runs
+
+# Only one-vertex and empty hospital paths: CSV would infer that column as float
+ROUTE_LOG = [
+    {"from": 0, "to_patient": 5, "path_to_patient": [0, 3, 5], "path_to_hospital": [5],
+     "time_needed": 12.5, "priority": 3},
+    {"from": 5, "to_patient": 7, "path_to_patient": [5, 7], "path_to_hospital": [],
+     "time_needed": 4.0, "priority": 1},
+    {"from": 7, "to_patient": 8, "path_to_patient": [8], "path_to_hospital": [2],
+     "time_needed": 6.25, "priority": 5},
+]
+ONE_VERTEX_LOG = [
+    dict(step, path_to_patient=[step["to_patient"]], path_to_hospital=[step["to_patient"]])
+    for step in ROUTE_LOG
+]
+
+FORMATS = ["jsonl", "csv"] + (["parquet"] if HAS_PYARROW else [])
+
+
+@pytest.mark.parametrize("extension", FORMATS)
+def test_round_trip(tmp_path, extension):
+    path = str(tmp_path / f"runs.{extension}")
+    with RouteExportWriter(path) as writer:
+        writer.write_run(ROUTE_LOG, scenario="a", initial_point=0, total_time=60)
+        writer.write_run(ONE_VERTEX_LOG, scenario="b", initial_point=5, total_time=30)
+
+    runs = list(iter_runs(path))
+    assert [run["scenario"] for run, _ in runs] == ["a", "b"]
+    assert [route_log for _, route_log in runs] == [ROUTE_LOG, ONE_VERTEX_LOG]
@@ -0,0 +1,73 @@
+import os
+
+import pandas as pd
+import pytest
+
+from Code import Data_Store
+from Code.alg import ambulance_routing_optimized
+from Code.batch_view import solve_scenario_folder
+from Code.benchmarks import DATASETS_ROOT
+
+
+@pytest.fixture(scope="module")
+def store(tmp_path_factory):
+    db_path = str(tmp_path_factory.mktemp("store") / "scenarios.sqlite3")
+    Data_Store.import_scenario_tree(db_path, DATASETS_ROOT)
+    return db_path
+
+
+def test_stored_scenarios_load_like_their_folders(store):
+    folders = dict(Data_Store.find_scenarios(DATASETS_ROOT))
+    stored = dict(Data_Store.find_scenarios(store))
+    assert folders and sorted(stored) == sorted(folders)
+    assert not Data_Store.is_store(DATASETS_ROOT)
+
+    for name, folder in folders.items():
+        from_folder = Data_Store.load_scenario(folder)
+        from_store = Data_Store.load_scenario(stored[name])
+        assert stored[name] == Data_Store.store_source(store, name)
+        for frame in ("points_data", "ruas_data"):
+            pd.testing.assert_frame_equal(from_store[frame], from_folder[frame])
+        pd.testing.assert_frame_equal(
+            from_store["initial_data"], from_folder["initial_data"].iloc[:1]
+        )
+        assert from_store["graph"].get_edgelist() == from_folder["graph"].get_edgelist()
+        assert from_store["graph"].es["weight"] == from_folder["graph"].es["weight"]
+
+
+def test_route_logs_round_trip(store):
+    name = "hard/10"
+    data = Data_Store.problem_data_dict_by_scenario(store, name)
+    initial = data["initial_data"].iloc[0]
+    route_log = ambulance_routing_optimized(
+        data["graph"], data["points_data"], initial["ponto_inicial"], initial["tempo_total"]
+    )
+    assert route_log
+
+    run_id = Data_Store.save_route_logs(store, [(name, route_log), (name, [])], solver="test")[0]
+    assert Data_Store.load_route_log(store, run_id) == [
+        {
+            key: [int(v) for v in step[key]] if key.startswith("path") else step[key]
+            for key in ("from", "to_patient", "path_to_patient", "path_to_hospital",
+                        "time_needed", "priority")
+        }
+        for step in route_log
+    ]
+    history = Data_Store.run_history(store, name)
+    run = history[history["run_id"] == run_id].iloc[0]
+    assert run["solver"] == "test"
+    assert run["patients"] == len(route_log)
+    assert run["total_priority"] == sum(step["priority"] for step in route_log)
+
+
+def test_batch_runs_from_store_match_folders(store):
+    runs = Data_Store.run_batch_from_store(store, ["easy/1", "hard/10"])
+    assert sorted(runs["scenario"]) == ["easy/1", "hard/10"]
+    for _, run in runs.iterrows():
+        folder = os.path.join(DATASETS_ROOT, *run["scenario"].split("/"))
+        from_folder = solve_scenario_folder(folder, cache_folder=None)
+        from_store = solve_scenario_folder(
+            Data_Store.store_source(store, run["scenario"]), cache_folder=None
+        )
+        assert from_store["priority"] == from_folder["priority"] == run["total_priority"]
+        assert from_store["patients"] == from_folder["patients"] == run["patients"]
@@ -0,0 +1,50 @@
+import pandas as pd
+import pytest
+
+from Code.Data_Import import pd_to_igraph
+from Code.Folder_Watch import apply_edges_diff, diff_edges
+
+
+def _ruas(rows):
+    return pd.DataFrame(rows, columns=["ponto_origem", "ponto_destino", "tempo_transporte"])
+
+
+def _streets(graph):
+    """(ordered endpoints, weight) of every edge, in edge id order"""
+    return [(tuple(sorted(e.tuple)), e["weight"]) for e in graph.es]
+
+
+def _patched(old_rows, new_rows):
+    old, new = _ruas(old_rows), _ruas(new_rows)
+    graph = pd_to_igraph(old)
+    apply_edges_diff(graph, diff_edges(old, new))
+    return graph, pd_to_igraph(new)
+
+
+PARALLEL = [(0, 1, 5), (0, 1, 9), (1, 2, 3)]
+
+
+@pytest.mark.parametrize(
+    "new_rows",
+    [
+        [(1, 2, 3)],  # Both parallel streets deleted
+        [(0, 1, 2), (0, 1, 9), (1, 2, 3)],  # First one changed
+        [(0, 1, 5), (0, 1, 4), (1, 2, 3)],  # Second one changed
+        [(0, 1, 9), (1, 2, 3)],  # First one deleted
+        [(0, 1, 5), (0, 1, 9), (1, 0, 7), (1, 2, 3)],  # Third added, reversed
+        [(1, 0, 5), (0, 1, 9), (1, 2, 3)],  # Same street written the other way
+    ],
+)
+def test_parallel_streets_follow_the_file(new_rows):
+    patched, rebuilt = _patched(PARALLEL, new_rows)
+    assert sorted(_streets(patched)) == sorted(_streets(rebuilt))
+    # Parallel streets also keep their file order
+    for pair in {street for street, _ in _streets(rebuilt)}:
+        assert [w for s, w in _streets(patched) if s == pair] == [
+            w for s, w in _streets(rebuilt) if s == pair
+        ]
+
+
+def test_reversed_street_is_not_a_change():
+    diff = diff_edges(_ruas(PARALLEL), _ruas([(1, 0, 5), (0, 1, 9), (2, 1, 3)]))
+    assert diff == {"added": [], "removed": [], "changed": []}
@@ -0,0 +1,89 @@
+import os
+
+import igraph as ig
+import numpy as np
+import pandas as pd
+import pytest
+
+from Code import graph_view
+from Code.benchmarks import DATASETS_ROOT
+
+SCENARIO = os.path.join(DATASETS_ROOT, "hard", "10")
+
+
+@pytest.fixture
+def network(tmp_path, monkeypatch):
+    monkeypatch.setattr(graph_view, "LAYOUT_CACHE_DIR", tmp_path / "layouts")
+    monkeypatch.setattr(graph_view, "_layout_cache", {})
+    pontos = pd.read_csv(os.path.join(SCENARIO, "pontos.csv"))
+    ruas = pd.read_csv(os.path.join(SCENARIO, "ruas.csv"))
+    return pontos, ruas
+
+
+def test_layout_cache_is_outside_the_source_tree():
+    root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    assert not os.path.abspath(graph_view.LAYOUT_CACHE_DIR).startswith(root + os.sep)
+
+
+def test_same_network_same_layout_whatever_was_drawn_before(network, monkeypatch):
+    pontos, ruas = network
+    edited = ruas.iloc[:-1]
+    first, key = graph_view.layout_with_key(pontos, ruas)
+    warm, warm_key = graph_view.layout_with_key(pontos, edited, base_key=key)
+    assert warm_key != key
+
+    # Drawing the edited network after it does not make the original one move
+    assert np.array_equal(graph_view.layout_coordinates(pontos, ruas), first)
+    # Neither does a fresh process (only the cache folder is left)
+    monkeypatch.setattr(graph_view, "_layout_cache", {})
+    assert np.array_equal(graph_view.layout_coordinates(pontos, edited, base_key=key), warm)
+    cold, cold_key = graph_view.layout_with_key(pontos, edited)
+    assert cold_key not in (key, warm_key)
+    monkeypatch.setattr(graph_view, "_layout_cache", {})
+    assert np.array_equal(graph_view.layout_coordinates(pontos, edited), cold)
+
+
+def test_layout_leaves_igraph_random_generator_alone(network, monkeypatch):
+    # The render thread must not swap the process-wide generator under others
+    def swap(_generator):
+        raise AssertionError("igraph's random number generator was replaced")
+
+    pontos, ruas = network
+    monkeypatch.setattr(ig, "set_random_number_generator", swap)
+    assert graph_view.layout_coordinates(pontos, ruas).shape == (len(pontos), 2)
+
+
+def test_prerendered_canvas_blits_the_worker_pixels(network):
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    from Code.render_worker import build_figure
+
+    class AggPrerendered(graph_view.PrerenderedMixin, FigureCanvasAgg):
+        pass
+
+    pontos, ruas = network
+    fig = build_figure(pontos, ruas, figsize=(4, 4), dpi=50)
+    network_pixels = np.asarray(fig.canvas.buffer_rgba()).copy()
+    canvas = AggPrerendered(fig)
+    overlay = graph_view.RouteOverlay(canvas, fig.axes[0], fig.scitech_layout)
+    full_draw = fig.draw
+    fig.draw = None  # Any full draw would fail from here on
+
+    canvas.draw()
+    assert np.array_equal(np.asarray(canvas.buffer_rgba()), network_pixels)
+    assert overlay.background is not None
+
+    route_log = [{"to_patient": 5, "path_to_patient": [3, 5], "path_to_hospital": [5, 0]}]
+    overlay.set_route(route_log)
+    with_route = np.asarray(canvas.buffer_rgba()).copy()
+    assert not np.array_equal(with_route, network_pixels)
+    canvas.draw()  # e.g. the window is exposed again: the route stays
+    assert np.array_equal(np.asarray(canvas.buffer_rgba()), with_route)
+    overlay.set_route([])
+    assert np.array_equal(np.asarray(canvas.buffer_rgba()), network_pixels)
+
+    # Zoomed (stale) figures are drawn again
+    fig.draw = full_draw
+    fig.axes[0].set_xlim(0, 1)
+    canvas.draw()
+    assert not np.array_equal(np.asarray(canvas.buffer_rgba()), network_pixels)
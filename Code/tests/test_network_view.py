@@ -0,0 +1,80 @@
+import numpy as np
+import pytest
+
+from Code.network_view import GridIndex, LONG_EDGE_CELLS
+
+
+def _layout(seed, n_vertices=2000, n_edges=4000, n_long=20):
+    rng = np.random.default_rng(seed)
+    coords = rng.normal(size=(n_vertices, 2)) * [3.0, 1.0]
+    # Mostly short streets between close vertices, plus a few across the layout
+    order = np.argsort(coords[:, 0])
+    first = rng.integers(0, n_vertices - 3, n_edges)
+    short = np.stack([order[first], order[first + rng.integers(1, 3, n_edges)]], axis=1)
+    tail = n_vertices // 20
+    long = np.stack(
+        [order[rng.integers(0, tail, n_long)], order[-1 - rng.integers(0, tail, n_long)]], axis=1
+    )
+    loops = np.stack([np.arange(3), np.arange(3)], axis=1)  # Zero-length streets
+    return coords, np.concatenate([short, long, loops])
+
+
+def _segment_distances(coords, edges, point):
+    start, end = coords[edges[:, 0]], coords[edges[:, 1]]
+    direction = end - start
+    length2 = np.maximum((direction ** 2).sum(axis=1), 1e-18)
+    t = np.clip(((point - start) * direction).sum(axis=1) / length2, 0.0, 1.0)
+    return np.linalg.norm(start + direction * t[:, None] - point, axis=1)
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_grid_index_matches_brute_force(seed):
+    coords, edges = _layout(seed)
+    index = GridIndex(coords, edges)
+    assert len(index.long_edges)  # The long-edge list is exercised
+    rng = np.random.default_rng(100 + seed)
+    ends = coords[edges]
+    edge_low, edge_high = ends.min(axis=1), ends.max(axis=1)
+
+    for _ in range(200):
+        # Rectangles of every size, partly or fully outside the layout too
+        center = rng.normal(size=2) * [4.0, 1.5]
+        half = rng.exponential(0.5, size=2)
+        low, high = center - half, center + half
+        inside = ((coords >= low) & (coords <= high)).all(axis=1)
+        np.testing.assert_array_equal(index.vertices_in(low, high), np.flatnonzero(inside))
+        overlaps = ((edge_low <= high) & (edge_high >= low)).all(axis=1)
+        np.testing.assert_array_equal(index.edges_in(low, high), np.flatnonzero(overlaps))
+
+        point, radius = center, float(rng.uniform(0.01, 0.5))
+        vertex_distances = np.linalg.norm(coords - point, axis=1)
+        nearest = int(np.argmin(vertex_distances))
+        expected = nearest if vertex_distances[nearest] <= radius else None
+        assert index.nearest_vertex(point, radius) == expected
+
+        edge_distances = _segment_distances(coords, edges, point)
+        nearest = int(np.argmin(edge_distances))
+        expected = nearest if edge_distances[nearest] <= radius else None
+        found = index.nearest_edge(point, radius)
+        if expected is None:
+            assert found is None
+        else:
+            # Parallel streets are equally near: compare distances, not ids
+            assert edge_distances[found] == pytest.approx(edge_distances[nearest])
+
+
+def test_long_edges_stay_out_of_the_cells():
+    coords = np.array([[0.0, 0.0], [100.0, 100.0]] + [[x, x] for x in np.linspace(1, 99, 98)])
+    edges = np.array([[0, 1], [2, 3]])
+    index = GridIndex(coords, edges, items_per_cell=1)
+    assert index.long_edges.tolist() == [0]
+    assert len(index.edge_items) <= LONG_EDGE_CELLS
+    np.testing.assert_array_equal(index.edges_in(np.array([50.0, 50.0]), np.array([51.0, 51.0])), [0])
+
+
+def test_empty_layout():
+    index = GridIndex(np.zeros((0, 2)), np.zeros((0, 2), dtype=np.int64))
+    assert index.vertices_in(np.zeros(2), np.ones(2)).tolist() == []
+    assert index.edges_in(np.zeros(2), np.ones(2)).tolist() == []
+    assert index.nearest_vertex(np.zeros(2), 1.0) is None
+    assert index.nearest_edge(np.zeros(2), 1.0) is None
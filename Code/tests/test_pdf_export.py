@@ -0,0 +1,50 @@
+import pytest
+from PyPDF2 import PdfReader
+
+from Code.PDF_Export import ROWS_PER_PAGE, export_batch, export_to_pdf
+
+N_STEPS = 3 * ROWS_PER_PAGE + 3  # Four pages, the last one partly filled
+N_PAGES = 4
+
+
+def _route_log(n_steps):
+    return [
+        {"to_patient": 100 + i, "priority": i % 5 + 1, "time_needed": 7.5}
+        for i in range(n_steps)
+    ]
+
+
+def _check_pages(texts):
+    assert len(texts) == N_PAGES
+    for number, text in enumerate(texts, start=1):
+        assert f"Page {number}/{N_PAGES}" in text
+    # Every step is printed exactly once, in order
+    printed = " ".join(texts)
+    positions = [printed.index(f"{100 + i}\n") for i in range(N_STEPS)]
+    assert positions == sorted(positions)
+
+
+def test_multi_page_report_reopens(tmp_path):
+    output = tmp_path / "report.pdf"
+    assert export_to_pdf({}, _route_log(N_STEPS), str(output))
+    reader = PdfReader(str(output))
+    _check_pages([page.extract_text() for page in reader.pages])
+
+
+def test_multi_page_report_opens_in_mupdf(tmp_path):
+    pymupdf = pytest.importorskip("pymupdf")
+    output = tmp_path / "report.pdf"
+    assert export_to_pdf({}, _route_log(N_STEPS), str(output))
+    pymupdf.TOOLS.mupdf_warnings()  # Clear earlier warnings
+    with pymupdf.open(str(output)) as document:
+        _check_pages([page.get_text() for page in document])
+    assert pymupdf.TOOLS.mupdf_warnings() == ""
+
+
+@pytest.mark.parametrize("max_workers", [1, 2])
+def test_export_batch(tmp_path, max_workers):
+    outputs = [str(tmp_path / f"report_{i}.pdf") for i in range(3)]
+    results = export_batch([(_route_log(N_STEPS), path) for path in outputs], max_workers)
+    assert results == [True] * len(outputs)
+    for path in outputs:
+        _check_pages([page.extract_text() for page in PdfReader(path).pages])
@@ -0,0 +1,42 @@
+import time
+
+import pytest
+
+from Code.alg import precompute_routing_matrices
+from Code.benchmarks import synthetic_instance
+from Code.csr_graph import CSRGraph
+from Code.portfolio import SolverPortfolio
+
+# Wall-clock slack over time_limit: pool bookkeeping and the last checks
+MARGIN_S = 0.25
+
+
+@pytest.fixture(scope="module")
+def instance():
+    ruas, pontos = synthetic_instance(patients=400)
+    matrices = precompute_routing_matrices(CSRGraph.from_dataframe(ruas), pontos)
+    return matrices, int(pontos["id"].iloc[0]), 1600.0
+
+
+@pytest.fixture(scope="module")
+def portfolio():
+    with SolverPortfolio(max_workers=3) as portfolio:
+        portfolio.warm_up()
+        yield portfolio
+
+
+@pytest.mark.parametrize("time_limit", [0.2, 1.0, 0.2])
+def test_solve_stays_within_time_limit(portfolio, instance, time_limit):
+    matrices, initial_point, total_time = instance
+    started = time.perf_counter()
+    route_log, results = portfolio.solve(matrices, initial_point, total_time, time_limit)
+    assert time.perf_counter() - started <= time_limit + MARGIN_S
+
+    greedy = results[0]
+    assert greedy["strategy"] == "greedy"
+    assert {result["strategy"] for result in results[1:]} == {"exact", "local_search", "beam"}
+    for result in results[1:]:
+        # Every strategy starts from (or is bounded by) the greedy baseline
+        assert result["priority"] >= greedy["priority"]
+        assert result["time_used"] <= total_time + 1e-9
+    assert sum(step["priority"] for step in route_log) == max(r["priority"] for r in results)
@@ -0,0 +1,42 @@
+import os
+import subprocess
+import sys
+import textwrap
+
+from Code.benchmarks import DATASETS_ROOT
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+SCENARIO = os.path.join(DATASETS_ROOT, "hard", "10")
+
+
+def test_headless_export_after_pyplot_is_loaded(tmp_path):
+    # A fresh interpreter without a display, where igraph (through alg) has
+    # already imported pyplot before the render worker is imported
+    script = textwrap.dedent(
+        f"""
+        import sys
+        from pathlib import Path
+        import pandas as pd
+        import Code.alg
+        assert "matplotlib.pyplot" in sys.modules
+        from Code import graph_view
+        from Code.render_worker import export_graph_image, render_image
+
+        graph_view.LAYOUT_CACHE_DIR = Path({str(tmp_path / "layouts")!r})
+        pontos = pd.read_csv({os.path.join(SCENARIO, "pontos.csv")!r})
+        ruas = pd.read_csv({os.path.join(SCENARIO, "ruas.csv")!r})
+        route_log = [{{"to_patient": 1, "path_to_patient": [0, 1], "path_to_hospital": [1, 0]}}]
+        for name in ("graph.png", "graph.svg"):
+            assert export_graph_image(pontos, ruas, str(Path({str(tmp_path)!r}) / name), route_log)
+        pixels, width, height = render_image(pontos, ruas, size=(200, 100))
+        assert (width, height) == (200, 100) and len(pixels) == 4 * width * height
+        """
+    )
+    env = {key: value for key, value in os.environ.items() if key != "DISPLAY"}
+    env.pop("MPLBACKEND", None)
+    result = subprocess.run(
+        [sys.executable, "-c", script], cwd=ROOT, env=env, capture_output=True, text=True
+    )
+    assert result.returncode == 0, result.stderr
+    assert (tmp_path / "graph.png").stat().st_size > 0
+    assert (tmp_path / "graph.svg").read_text().lstrip().startswith("<?xml")
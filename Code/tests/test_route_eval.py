@@ -0,0 +1,97 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from Code.alg import precompute_routing_matrices, route_log_from_order
+from Code.csr_graph import CSRGraph
+from Code.route_eval import PAD, RouteEvaluator, evaluate_routes, pad_routes
+
+INITIAL_POINT = 0
+
+
+@pytest.fixture(scope="module")
+def matrices():
+    # Chain 0-1-2-3 (hospital 3) and a separate street 4-5 (hospital 5)
+    ruas = pd.DataFrame(
+        {
+            "ponto_origem": [0, 1, 2, 4],
+            "ponto_destino": [1, 2, 3, 5],
+            "tempo_transporte": [2.0, 3.0, 4.0, 1.0],
+        }
+    )
+    pontos = pd.DataFrame(
+        {
+            "id": [3, 5, 1, 2, 4],
+            "tipo": ["hospital", "hospital", "paciente", "paciente", "paciente"],
+            "prioridade": [np.nan, np.nan, 2, 3, 5],
+            "tempo_cuidados_minimos": [0, 0, 10, 20, 30],
+        }
+    )
+    return precompute_routing_matrices(CSRGraph.from_dataframe(ruas), pontos)
+
+
+def _time(matrices, order):
+    route_log = route_log_from_order(matrices, INITIAL_POINT, order)
+    return sum(step["time_needed"] for step in route_log)
+
+
+def test_valid_routes_match_route_log(matrices):
+    orders = [[0], [1], [0, 1], [1, 0], []]
+    result = evaluate_routes(matrices, INITIAL_POINT, 1000.0, pad_routes(orders))
+    assert result["feasible"].tolist() == [True] * len(orders)
+    assert result["time_used"] == pytest.approx([_time(matrices, o) for o in orders])
+    assert result["priority"].tolist() == [2, 3, 5, 5, 0]
+    assert result["patients"].tolist() == [1, 1, 2, 2, 0]
+
+
+def test_time_budget_is_inclusive(matrices):
+    budget = _time(matrices, [0, 1])
+    result = evaluate_routes(matrices, INITIAL_POINT, budget, pad_routes([[0, 1], [1, 0]]))
+    assert result["feasible"].tolist() == [True, False]
+
+
+def test_pad_in_the_middle_of_a_row(matrices):
+    result = evaluate_routes(matrices, INITIAL_POINT, 1000.0, np.array([[0, PAD, 1]]))
+    assert not result["feasible"][0]
+    # Time and priority are those of the route before the padding
+    assert result["patients"][0] == 1
+    assert result["time_used"][0] == pytest.approx(_time(matrices, [0]))
+    assert result["priority"][0] == 2
+
+
+@pytest.mark.parametrize("order", [[0, 3], [5], [0, -2]])
+def test_out_of_range_index(matrices, order):
+    result = evaluate_routes(matrices, INITIAL_POINT, 1000.0, pad_routes([order, [0]]))
+    assert result["feasible"].tolist() == [False, True]
+
+
+def test_repeated_patient(matrices):
+    result = evaluate_routes(matrices, INITIAL_POINT, 1000.0, pad_routes([[0, 1, 0], [0, 0]]))
+    assert result["feasible"].tolist() == [False, False]
+    assert np.isfinite(result["time_used"]).all()
+
+
+@pytest.mark.parametrize("total_time", [1000.0, np.inf])
+@pytest.mark.parametrize("order", [[2], [0, 2], [2, 0]])
+def test_unreachable_step(matrices, order, total_time):
+    # Patient 2 (vertex 4) is not connected to the start nor to hospital 3
+    result = evaluate_routes(matrices, INITIAL_POINT, total_time, pad_routes([order]))
+    assert not result["feasible"][0]
+    assert result["time_used"][0] == np.inf
+
+
+@pytest.mark.parametrize("n_routes", [0, 3])
+def test_zero_width_input(matrices, n_routes):
+    result = RouteEvaluator(matrices, INITIAL_POINT, 10.0).evaluate(np.empty((n_routes, 0)))
+    assert {key: len(values) for key, values in result.items()} == dict.fromkeys(
+        ("feasible", "time_used", "priority", "patients"), n_routes
+    )
+    # An empty route visits nobody and always fits
+    assert result["feasible"].all()
+    assert (result["time_used"] == 0).all() and (result["patients"] == 0).all()
+
+
+def test_pad_routes_width():
+    assert pad_routes([[1], [2, 3]]).tolist() == [[1, PAD], [2, 3]]
+    assert pad_routes([[1]], length=3).tolist() == [[1, PAD, PAD]]
+    assert pad_routes([]).shape == (0, 0)
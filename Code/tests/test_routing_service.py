@@ -0,0 +1,55 @@
+import asyncio
+import os
+from collections import OrderedDict
+
+import numpy as np
+
+from Code import routing_service
+from Code.benchmarks import DATASETS_ROOT
+from Code.routing_service import RoutingService
+
+SCENARIO = os.path.join(DATASETS_ROOT, "hard", "8")
+
+
+def test_reload_keeps_folder_until_solves_finish():
+    async def scenario():
+        service = RoutingService(max_workers=2)
+        try:
+            await service.warm_up()
+            await service.load_scenario(SCENARIO, "s")
+            old = service.scenarios["s"]["array_folder"]
+            # The anytime solver runs for its whole time limit
+            solve = asyncio.ensure_future(service.route("s", solver="anytime", time_limit=2.0))
+            await asyncio.sleep(0.2)
+            await service.load_scenario(SCENARIO, "s")
+            new = service.scenarios["s"]["array_folder"]
+            assert new != old
+            assert os.path.isdir(old) and not solve.done()
+
+            result = await solve
+            assert result["route_log"]
+            assert not os.path.isdir(old)
+            # Solves on the new folder still work after the old one is gone
+            assert (await service.route("s"))["route_log"]
+            assert os.path.isdir(new)
+        finally:
+            service.close()
+        assert not os.path.isdir(new)
+
+    asyncio.run(scenario())
+
+
+def test_worker_unmaps_replaced_folders(tmp_path, monkeypatch):
+    monkeypatch.setattr(routing_service, "_worker_matrices", OrderedDict())
+    folders = []
+    for name in ("old", "new"):
+        folder = tmp_path / name
+        folder.mkdir()
+        for array in routing_service.MATRIX_ARRAYS:
+            np.save(folder / f"{array}.npy", np.zeros(2))
+        folders.append(str(folder))
+    old, new = folders
+
+    routing_service._open_matrices(old, [old])
+    routing_service._open_matrices(new, [new])
+    assert list(routing_service._worker_matrices) == [new]
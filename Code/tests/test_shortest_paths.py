@@ -0,0 +1,41 @@
+import math
+
+import numpy as np
+import pandas as pd
+
+from Code.alg import CancellationToken, precompute_all_pairs_shortest_paths
+from Code.csr_graph import CSRGraph, LazyDistances
+from Code.Data_Import import pd_to_igraph
+
+# Chain 0-1-2-3 with a slower parallel street, and a separate street 4-5
+RUAS = pd.DataFrame(
+    {
+        "ponto_origem": [0, 1, 2, 1, 4],
+        "ponto_destino": [1, 2, 3, 2, 5],
+        "tempo_transporte": [2, 3, 4, 7, 1],
+    }
+)
+
+
+def test_both_backends_give_the_same_distance_view():
+    for graph in (pd_to_igraph(RUAS), CSRGraph.from_dataframe(RUAS)):
+        distances, paths, dist_matrix = precompute_all_pairs_shortest_paths(graph)
+        # A view over the matrix, not a dict of every pair
+        assert isinstance(distances, LazyDistances)
+        assert distances.dist is dist_matrix
+        assert len(distances) == 36
+        assert distances[(0, 3)] == 9.0
+        assert paths[(0, 3)] == [0, 1, 2, 3]
+        assert math.isinf(distances[(0, 5)])
+        assert math.isinf(distances.get((0, 6), float("inf")))
+        assert dict(distances) == {
+            (v, u): float(dist_matrix[v, u]) for v in range(6) for u in range(6)
+        }
+
+
+def test_cancelled_precompute_leaves_missing_sources_unreachable():
+    cancel = CancellationToken()
+    cancel.cancel()
+    distances, _, dist_matrix = precompute_all_pairs_shortest_paths(pd_to_igraph(RUAS), cancel)
+    assert dist_matrix is None
+    assert np.isinf(distances.dist).all()
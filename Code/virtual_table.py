@@ -0,0 +1,154 @@
+"""
+SciTech Ambulance Routing - Virtualized Table
+=============================================
+
+A ttk.Treeview wrapper that only holds the rows in view. The table data lives
+in NumPy column arrays; scrolling rewrites a small fixed pool of Treeview
+items, so filling, clearing and sorting cost the same regardless of row count.
+"""
+
+import tkinter as tk
+from tkinter import ttk
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+
+class VirtualTable(ttk.Frame):
+    """Scrollable, sortable table backed by NumPy columns"""
+
+    def __init__(
+        self,
+        parent: tk.Widget,
+        columns: Sequence[str],
+        widths: Optional[Dict[str, int]] = None,
+        formatters: Optional[Dict[str, Callable[[Any], str]]] = None,
+        height: int = 15,
+    ):
+        super().__init__(parent)
+        self.grid_columnconfigure(0, weight=1)
+        self.grid_rowconfigure(0, weight=1)
+
+        self.columns = list(columns)
+        self.formatters = formatters or {}
+        self.tree = ttk.Treeview(
+            self, columns=self.columns, show="headings", height=height, selectmode="none"
+        )
+        for column in self.columns:
+            self.tree.heading(column, text=column, command=lambda c=column: self.sort_by(c))
+            self.tree.column(
+                column, width=(widths or {}).get(column, 60), anchor="center"
+            )
+
+        self.scrollbar = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self._on_scrollbar)
+        self.tree.grid(row=0, column=0, sticky=tk.NSEW)
+        self.scrollbar.grid(row=0, column=1, sticky=tk.NS)
+
+        self.data: Dict[str, np.ndarray] = {c: np.empty(0) for c in self.columns}
+        self.order = np.empty(0, dtype=np.int64)
+        self.first = 0
+        self.sort_column: Optional[str] = None
+        self.sort_descending = False
+        self.pool: List[str] = []
+        self._visible_rows = height
+
+        self.tree.bind("<Configure>", self._on_configure)
+        for widget in (self.tree, self.scrollbar):
+            widget.bind("<MouseWheel>", self._on_wheel)
+            widget.bind("<Button-4>", lambda e: self.scroll(-3))
+            widget.bind("<Button-5>", lambda e: self.scroll(3))
+
+    def __len__(self) -> int:
+        return len(self.order)
+
+    # ------------------------------------------------------------------ model
+
+    def set_data(self, columns: Dict[str, Any]) -> None:
+        """Replace the whole table (one array per column, all the same length)"""
+        self.data = {c: np.asarray(columns[c]) for c in self.columns}
+        self.order = np.arange(len(self.data[self.columns[0]]), dtype=np.int64)
+        self.first = 0
+        if self.sort_column is not None:
+            self._sort()
+        self.refresh()
+
+    def set_column(self, column: str, values: Any) -> None:
+        """Replace one column in place (row order unchanged)"""
+        self.data[column] = np.asarray(values)
+        self.refresh()
+
+    def clear(self) -> None:
+        self.set_data({c: np.empty(0) for c in self.columns})
+
+    def sort_by(self, column: str) -> None:
+        """Sort by column; clicking the same heading again reverses the order"""
+        if self.sort_column == column:
+            self.sort_descending = not self.sort_descending
+        else:
+            self.sort_column = column
+            self.sort_descending = False
+        self._sort()
+        self.refresh()
+
+    def _sort(self) -> None:
+        order = np.argsort(self.data[self.sort_column], kind="stable")
+        self.order = order[::-1] if self.sort_descending else order
+        self.first = 0
+
+    # ------------------------------------------------------------------- view
+
+    def _format(self, column: str, value: Any) -> str:
+        formatter = self.formatters.get(column)
+        return formatter(value) if formatter else str(value)
+
+    def refresh(self) -> None:
+        """Write the rows in view into the item pool"""
+        visible = self._visible_rows
+        while len(self.pool) < visible:
+            self.pool.append(self.tree.insert("", "end"))
+
+        total = len(self.order)
+        self.first = max(0, min(self.first, total - visible))
+        rows = self.order[self.first : self.first + visible]
+
+        for slot, item in enumerate(self.pool):
+            if slot < len(rows):
+                row = rows[slot]
+                values = [self._format(c, self.data[c][row]) for c in self.columns]
+                self.tree.item(item, values=values)
+                self.tree.move(item, "", slot)
+            else:
+                self.tree.detach(item)
+
+        if total:
+            self.scrollbar.set(self.first / total, min(1.0, (self.first + visible) / total))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    def scroll(self, rows: int) -> None:
+        self.first += rows
+        self.refresh()
+
+    def _on_scrollbar(self, action: str, *args: str) -> None:
+        if action == "moveto":
+            self.first = int(float(args[0]) * len(self.order))
+            self.refresh()
+        elif action == "scroll":
+            amount = int(args[0])
+            self.scroll(amount * self._visible_rows if args[1] == "pages" else amount)
+
+    def _on_wheel(self, event: Any) -> None:
+        self.scroll(-3 if event.delta > 0 else 3)
+
+    def _on_configure(self, _event: Any) -> None:
+        # Grow or shrink the item pool to the rows that fit in the widget
+        bbox = self.tree.bbox(self.pool[0]) if self.pool else None
+        if bbox:
+            header, row_height = bbox[1], bbox[3]
+            rows = max(1, (self.tree.winfo_height() - header) // max(1, row_height))
+            if rows != self._visible_rows:
+                self._visible_rows = rows
+                for item in self.pool[rows:]:
+                    self.tree.delete(item)
+                del self.pool[rows:]
+                self.refresh()
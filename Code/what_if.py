@@ -0,0 +1,290 @@
+"""
+SciTech Ambulance Routing - What-If Editing
+===========================================
+
+Interactive edits of street times and patient attributes on a loaded problem.
+Each edit patches the shortest path matrices instead of recomputing them (see
+csr_graph.update_shortest_paths), and the route is re-solved warm: the previous
+visiting order is repaired and extended, then compared with a fresh greedy run.
+"""
+
+import tkinter as tk
+from tkinter import ttk
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .alg import (  # type: ignore
+    greedy_order_matrices,
+    precompute_routing_matrices,
+    refresh_nearest_hospitals,
+    route_log_from_order,
+    set_patient_arrays,
+)
+from .csr_graph import CSRGraph, update_shortest_paths  # type: ignore
+
+
+def _set_values(frame: pd.DataFrame, rows: pd.Series, column: str, value: float) -> None:
+    """frame.loc[rows, column] = value, upcasting integer columns for fractional values"""
+    if not float(value).is_integer() and frame[column].dtype.kind in "iu":
+        frame[column] = frame[column].astype(float)
+    frame.loc[rows, column] = value
+
+
+def ensure_routing_matrices(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Routing matrices of a problem data dictionary, computed on first use"""
+    matrices = data.get("routing_matrices")
+    if matrices is None:
+        matrices = precompute_routing_matrices(data["graph"], data["points_data"])
+        data["routing_matrices"] = matrices
+    return matrices
+
+
+def refresh_routing_matrices(
+    data: Dict[str, Any],
+    changed_streets: Optional[List[Tuple[int, int]]] = None,
+    points_changed: bool = False,
+) -> None:
+    """
+    Bring data["routing_matrices"] (if present) in line with the already
+    patched graph and points_data. New vertices drop the matrices so they are
+    rebuilt on next use.
+    """
+    matrices = data.get("routing_matrices")
+    if matrices is None:
+        return
+    graph = data["graph"]
+    if graph.vcount() != len(matrices["dist"]):
+        del data["routing_matrices"]
+        return
+
+    if changed_streets:
+        new_csr = CSRGraph.from_igraph(graph)
+        update_shortest_paths(
+            matrices["dist"], matrices["pred"], matrices["csr"], new_csr, changed_streets
+        )
+        matrices["csr"] = new_csr
+    if points_changed:
+        set_patient_arrays(matrices, data["points_data"])
+    elif changed_streets:
+        refresh_nearest_hospitals(matrices)
+
+
+def set_street_time(
+    data: Dict[str, Any], origin: int, dest: int, new_time: Optional[float]
+) -> None:
+    """
+    Set the travel time of every street between origin and dest (adding one if
+    there is none); new_time=None closes the street.
+    """
+    graph = data["graph"]
+    if not (0 <= origin < graph.vcount() and 0 <= dest < graph.vcount()):
+        raise ValueError(f"Unknown point in street {origin}-{dest}")
+
+    ruas = data["ruas_data"]
+    same_street = (
+        (ruas["ponto_origem"] == origin) & (ruas["ponto_destino"] == dest)
+    ) | ((ruas["ponto_origem"] == dest) & (ruas["ponto_destino"] == origin))
+    edges = graph.es.select(_between=([origin], [dest]))
+
+    if new_time is None:
+        graph.delete_edges(edges)
+        data["ruas_data"] = ruas[~same_street].reset_index(drop=True)
+    elif len(edges):
+        edges["weight"] = new_time
+        ruas = ruas.copy()
+        _set_values(ruas, same_street, "tempo_transporte", new_time)
+        data["ruas_data"] = ruas
+    else:
+        graph.add_edge(origin, dest, weight=new_time)
+        new_row = pd.DataFrame(
+            {"ponto_origem": [origin], "ponto_destino": [dest], "tempo_transporte": [new_time]}
+        )
+        data["ruas_data"] = pd.concat([ruas, new_row], ignore_index=True)
+
+    refresh_routing_matrices(data, changed_streets=[(origin, dest)])
+
+
+def set_patient_attributes(
+    data: Dict[str, Any],
+    patient_id: int,
+    priority: Optional[int] = None,
+    care_time: Optional[float] = None,
+) -> None:
+    """Change the priority and/or minimum care time of a patient"""
+    points = data["points_data"]
+    rows = (points["id"] == patient_id) & (points["tipo"].str.lower() == "paciente")
+    if not rows.any():
+        raise ValueError(f"Point {patient_id} is not a patient")
+
+    points = points.copy()
+    vertex = data["graph"].vs[int(patient_id)]
+    if priority is not None:
+        _set_values(points, rows, "prioridade", priority)
+        vertex["Priority"] = priority
+    if care_time is not None:
+        _set_values(points, rows, "tempo_cuidados_minimos", care_time)
+        vertex["Minimum_Care_Time"] = care_time
+    data["points_data"] = points
+
+    refresh_routing_matrices(data, points_changed=True)
+
+
+def repair_order(
+    matrices: Dict[str, Any],
+    initial_point: int,
+    total_time: float,
+    route_log: List[Dict[str, Any]],
+) -> Tuple[List[int], int, float]:
+    """
+    Replay a previous route on the edited problem, dropping patients that no
+    longer exist or no longer fit. Returns (order, last node, time left).
+    """
+    dist = matrices["dist"]
+    index = {int(pid): k for k, pid in enumerate(matrices["patient_ids"])}
+    current_node, time_left = int(initial_point), float(total_time)
+    order: List[int] = []
+
+    for step in route_log:
+        k = index.get(int(step["to_patient"]))
+        if k is None:
+            continue
+        need = (
+            dist[current_node, matrices["patient_ids"][k]]
+            + matrices["care_times"][k]
+            + matrices["hospital_dist"][k]
+        )
+        if need > time_left:
+            continue
+        order.append(k)
+        time_left -= need
+        current_node = int(matrices["nearest_hospital"][k])
+    return order, current_node, time_left
+
+
+def _score(matrices: Dict[str, Any], initial_point: int, order: List[int]) -> Tuple[float, float]:
+    """(total priority, -time used) of a visiting order: higher is better"""
+    route = route_log_from_order(matrices, initial_point, order)
+    return (
+        float(sum(step["priority"] for step in route)),
+        -float(sum(step["time_needed"] for step in route)),
+    )
+
+
+def warm_start_resolve(
+    data: Dict[str, Any], previous_route_log: Optional[List[Dict[str, Any]]] = None
+) -> List[Dict[str, Any]]:
+    """
+    Re-solve after an edit, reusing the patched matrices. The previous route
+    is repaired and greedily extended; a fresh greedy run is kept instead if
+    it scores strictly better.
+    """
+    matrices = ensure_routing_matrices(data)
+    initial_data = data["initial_data"]
+    initial_point = int(initial_data.iloc[0]["ponto_inicial"])
+    total_time = float(initial_data.iloc[0]["tempo_total"])
+
+    orders = []
+    if previous_route_log:
+        order, last_node, time_left = repair_order(
+            matrices, initial_point, total_time, previous_route_log
+        )
+        visited = np.zeros(len(matrices["patient_ids"]), dtype=bool)
+        visited[order] = True
+        orders.append(order + greedy_order_matrices(matrices, last_node, time_left, visited))
+    orders.append(greedy_order_matrices(matrices, initial_point, total_time))
+
+    # On ties the repaired route wins, so small edits keep the route stable
+    best = max(orders, key=lambda order: _score(matrices, initial_point, order))
+    return route_log_from_order(matrices, initial_point, best)
+
+
+class WhatIfWindow(tk.Toplevel):
+    """
+    Small editor for street times and patient attributes. The window does not
+    touch the data itself: submit(edit, graph_changed) hands each edit to the
+    owner, which applies edit(data) to its current data and re-solves off the
+    Tk thread. submit returns None when the edit was accepted, or the reason
+    it was refused; the owner reports the outcome through show_status.
+    """
+
+    def __init__(
+        self,
+        parent: tk.Misc,
+        submit: Callable[[Callable[[Dict[str, Any]], None], bool], Optional[str]],
+    ):
+        super().__init__(parent)
+        self.title("What-If Editing")
+        self.resizable(False, False)
+        self.submit = submit
+
+        street_frame = ttk.LabelFrame(self, text="Street", padding=10)
+        street_frame.grid(row=0, column=0, sticky=tk.EW, padx=10, pady=(10, 5))
+        self.origin_entry = self._field(street_frame, "From:", 0)
+        self.dest_entry = self._field(street_frame, "To:", 1)
+        self.time_entry = self._field(street_frame, "Time:", 2)
+        street_buttons = ttk.Frame(street_frame)
+        street_buttons.grid(row=3, column=0, columnspan=2, sticky=tk.EW, pady=(5, 0))
+        ttk.Button(street_buttons, text="Set Time", command=self._apply_street).pack(
+            side=tk.LEFT, padx=(0, 5)
+        )
+        ttk.Button(
+            street_buttons, text="Close Street", command=lambda: self._apply_street(True)
+        ).pack(side=tk.LEFT)
+
+        patient_frame = ttk.LabelFrame(self, text="Patient", padding=10)
+        patient_frame.grid(row=1, column=0, sticky=tk.EW, padx=10, pady=5)
+        self.patient_entry = self._field(patient_frame, "Patient ID:", 0)
+        self.priority_entry = self._field(patient_frame, "Priority:", 1)
+        self.care_entry = self._field(patient_frame, "Care time:", 2)
+        ttk.Button(patient_frame, text="Apply", command=self._apply_patient).grid(
+            row=3, column=0, columnspan=2, sticky=tk.W, pady=(5, 0)
+        )
+
+        self.status_label = ttk.Label(self, text="Status: Ready", foreground="gray")
+        self.status_label.grid(row=2, column=0, sticky=tk.W, padx=10, pady=(5, 10))
+
+    @staticmethod
+    def _field(parent: tk.Misc, label: str, row: int) -> ttk.Entry:
+        ttk.Label(parent, text=label).grid(row=row, column=0, sticky=tk.W, padx=(0, 5))
+        entry = ttk.Entry(parent, width=12)
+        entry.grid(row=row, column=1, sticky=tk.EW, pady=2)
+        return entry
+
+    @staticmethod
+    def _optional(entry: ttk.Entry, cast: Callable[[str], Any]) -> Any:
+        text = entry.get().strip()
+        return cast(text) if text else None
+
+    def show_status(self, text: str, foreground: str) -> None:
+        self.status_label.configure(text=f"Status: {text}", foreground=foreground)
+
+    def _apply_street(self, close: bool = False):
+        try:
+            origin = int(self.origin_entry.get())
+            dest = int(self.dest_entry.get())
+            new_time = None if close else float(self.time_entry.get())
+        except ValueError as e:
+            self.show_status(str(e), "red")
+            return
+        self._submit(lambda data: set_street_time(data, origin, dest, new_time), True)
+
+    def _apply_patient(self):
+        try:
+            patient_id = int(self.patient_entry.get())
+            priority = self._optional(self.priority_entry, int)
+            care_time = self._optional(self.care_entry, float)
+        except ValueError as e:
+            self.show_status(str(e), "red")
+            return
+        self._submit(
+            lambda data: set_patient_attributes(data, patient_id, priority, care_time), False
+        )
+
+    def _submit(self, edit: Callable[[Dict[str, Any]], None], graph_changed: bool):
+        refused = self.submit(edit, graph_changed)
+        if refused is not None:
+            self.show_status(refused, "red")
+        else:
+            self.show_status("Re-solving...", "orange")